@@ -0,0 +1,7 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Benchmarks do PizzaBot. Execute a partir da raiz do projeto, por exemplo:
+    uv run python -m benchmarks.bench_answer_cache
+"""
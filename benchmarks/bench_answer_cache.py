@@ -0,0 +1,62 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_answer_cache.py
+============================
+Simula um tráfego de perguntas quase idênticas sobre o cardápio e
+mede a taxa de acerto e a latência economizada pelo ``AnswerCache``.
+O pipeline real é substituído por uma função com latência fixa que
+imita as duas chamadas ao Groq.
+
+Run:
+    uv run python -m benchmarks.bench_answer_cache
+"""
+import random
+import time
+
+from utils.answer_cache import AnswerCache
+from utils.constants_ansi import CYAN, GREEN, RESET
+
+QUESTIONS = [
+    "qual a pizza mais cara?",
+    "Qual a pizza mais cara",
+    "QUAL A PIZZA MAIS CARA?!",
+    "Quais pizzas contêm calabresa?",
+    "quais pizzas contem calabresa",
+    "Quais são as pizzas disponíveis?",
+    "Qual a pizza mais barata?",
+    "Tem pizza vegetariana?",
+]
+
+
+def fake_pipeline(question: str, latency_s: float = 0.02) -> str:
+    """Imita as duas chamadas ao LLM (geração de SQL + resposta final)."""
+    time.sleep(latency_s)
+    return f"Resposta para: {question}"
+
+
+def run(n_requests: int = 500, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    workload = [rng.choice(QUESTIONS) for _ in range(n_requests)]
+
+    start = time.perf_counter()
+    for question in workload:
+        fake_pipeline(question)
+    baseline_s = time.perf_counter() - start
+
+    cache = AnswerCache(db_path="pizzas.db")
+    cached_pipeline = cache.wrap(fake_pipeline)
+    start = time.perf_counter()
+    for question in workload:
+        cached_pipeline(question)
+    cached_s = time.perf_counter() - start
+
+    print(f"{CYAN}Requisições:{RESET} {n_requests}")
+    print(f"{CYAN}Sem cache:{RESET} {baseline_s:.3f}s")
+    print(f"{CYAN}Com cache:{RESET} {cached_s:.3f}s")
+    print(f"{GREEN}Métricas:{RESET} {cache.metrics.as_dict()}")
+
+
+if __name__ == "__main__":
+    run()
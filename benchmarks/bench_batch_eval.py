@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_batch_eval.py
+==========================
+Roda o golden set (``benchmarks/golden_questions.jsonl``) pelo pipeline
+em lote, offline, com um LLM falso que devolve o SQL esperado após uma
+latência fixa, variando a concorrência. Reporta vazão, latência
+p50/p95/p99 por pergunta e acurácia dos resultados contra o "pizzas.db".
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_batch_eval
+"""
+import argparse
+import asyncio
+
+from utils.batch_eval import load_golden, make_golden_llm, run_batch
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+from utils.query_service import PizzaQueryService
+from utils.schema_context import SchemaContextProvider
+from utils.sql_router import SQLTemplateRouter
+
+
+async def main(args: argparse.Namespace) -> None:
+    golden = load_golden(args.golden) * args.repeat
+    db = get_sql_database("pizzas.db", pool_size=args.sql_workers)
+    print(
+        f"{GREEN}{len(golden)} perguntas, LLM falso com {args.llm_latency * 1000:.0f}ms/chamada, "
+        f"roteador {'ligado' if args.router else 'desligado'}{RESET}"
+    )
+    for concurrency in args.concurrency:
+        service = PizzaQueryService(
+            db,
+            make_golden_llm(golden, first_token_latency_s=args.llm_latency),
+            max_llm_concurrency=concurrency,
+            sql_workers=args.sql_workers,
+            sql_router=SQLTemplateRouter.from_sqlite("pizzas.db") if args.router else None,
+            schema_provider=SchemaContextProvider(db, "pizzas.db"),
+        )
+        report = await run_batch(service, golden, max_concurrency=concurrency)
+        service.close()
+        summary = report.as_dict()
+        print(
+            f"{CYAN}concorrência {concurrency:>3}:{RESET} {summary['throughput_qps']:8.1f} perguntas/s  "
+            f"p50={summary['latency_ms']['p50']:7.1f}ms  p95={summary['latency_ms']['p95']:7.1f}ms  "
+            f"p99={summary['latency_ms']['p99']:7.1f}ms  acurácia={report.accuracy:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--golden", default="benchmarks/golden_questions.jsonl")
+    parser.add_argument("--repeat", type=int, default=4, help="repetições do golden set")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="latência do LLM falso (s)")
+    parser.add_argument("--sql-workers", type=int, default=8)
+    parser.add_argument("--no-router", dest="router", action="store_false", help="todas as perguntas vão ao LLM")
+    asyncio.run(main(parser.parse_args()))
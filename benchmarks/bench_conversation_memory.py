@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_conversation_memory.py
+===================================
+Sessão longa (por padrão 600 perguntas) pelo pipeline SQL, alternando
+perguntas independentes e de acompanhamento ("e a média?", "e quais
+delas são grandes?"), em três modos:
+
+- ``sem memória``: o LLM não vê a conversa (acompanhamentos falham);
+- ``histórico completo``: toda a conversa vai ao LLM (cresce sem limite);
+- ``memória limitada``: ``ConversationMemory`` com janela + resumo.
+
+Reporta, por trecho da sessão: tokens de entrada por chamada ao LLM,
+latência p50 por pergunta, chamadas ao LLM e acompanhamentos resolvidos
+localmente (sem SQL nem LLM). O LLM é falso e sem latência: o que se
+mede é o custo do contexto e da memória.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_conversation_memory --turns 600
+"""
+import argparse
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RESET, YELLOW
+from utils.conversation_memory import ConversationMemory
+from utils.fake_llm import FakeStreamingChatModel
+from utils.query_service import PizzaQueryService
+from utils.tokens import count_tokens
+from utils.tracing import percentile
+
+SCRIPT = [
+    "Quais pizzas têm calabresa?",
+    "e a média?",
+    "e a mais cara delas?",
+    "e quais delas são grandes?",
+    "Me recomenda uma pizza com bacon?",
+    "e quantas são?",
+    "Qual o preço médio das pizzas grandes?",
+]
+
+
+def main(args: argparse.Namespace) -> None:
+    prompt_tokens: list[int] = []
+
+    def responder(messages) -> str:
+        prompt_tokens.append(sum(count_tokens(str(m.content)) for m in messages))
+        if "SQL query:" in str(messages[-1].content):
+            return "SELECT name, tamanho, preco FROM pizza WHERE ingredientes LIKE '%bacon%'"
+        return "Temos estas opções no cardápio."
+
+    llm = FakeStreamingChatModel(responder=responder)
+    service = PizzaQueryService.from_config(db_path=args.db, llm=llm, answer_cache=None)
+    modes = {
+        "sem memória": None,
+        "histórico completo": ConversationMemory(token_budget=10**9),
+        "memória limitada": ConversationMemory.from_env(),
+    }
+    checkpoints = [c for c in args.checkpoints if c <= args.turns]
+    print(f"{GREEN}{args.turns} perguntas por modo; trechos terminando em {checkpoints}{RESET}")
+    for name, memory in modes.items():
+        prompt_tokens.clear()
+        latencies: list[float] = []
+        calls_before = llm.calls
+        marks = []  # (pergunta, nº de chamadas ao LLM até aqui)
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            service.ask(SCRIPT[turn % len(SCRIPT)], memory=memory)
+            latencies.append(time.perf_counter() - start)
+            if turn + 1 in checkpoints:
+                marks.append((turn + 1, len(prompt_tokens)))
+
+        print(f"{CYAN}{name}{RESET}")
+        previous_turn, previous_calls = 0, 0
+        for turn, calls in marks:
+            window = prompt_tokens[previous_calls:calls]
+            turn_latencies = sorted(latencies[previous_turn:turn])
+            print(
+                f"    perguntas {previous_turn + 1:>4}-{turn:<4} tokens/chamada={sum(window) / max(len(window), 1):7.0f} "
+                f"(máx {max(window, default=0):6})  p50={percentile(turn_latencies, 50) * 1000:6.1f}ms"
+            )
+            previous_turn, previous_calls = turn, calls
+        resolved = memory.resolved if memory is not None else 0
+        summary = f"contexto final={memory.tokens} tokens, compactadas={memory.compacted}" if memory else ""
+        print(
+            f"    {YELLOW}chamadas ao LLM={llm.calls - calls_before}  resolvidas localmente={resolved}  {summary}{RESET}"
+        )
+    service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas.db")
+    parser.add_argument("--turns", type=int, default=600)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[10, 100, 300, 600])
+    main(parser.parse_args())
@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_ingredient_search.py
+=================================
+Compara a latência da busca por ingrediente com ``LIKE '%x%'`` (varredura
+completa da tabela) e com a tabela FTS5 ``pizza_fts``, num cardápio
+sintético grande (ver ``generate_synthetic_menu.py``). Também mostra que
+o FTS ignora acentos e maiúsculas ("brocolis" encontra "brócolis").
+
+Run:
+    uv run python -m benchmarks.generate_synthetic_menu --rows 1000000
+    uv run python -m benchmarks.bench_ingredient_search --db pizzas_synthetic.db
+"""
+import argparse
+import statistics
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import connect_reader
+from utils.menu_schema import FTS_TABLE, fts_phrase
+
+TERMS = ["calabresa", "brócolis", "brocolis", "Mussarela", "jalapeño", "tomate seco"]
+
+LIKE_SQL = "SELECT {select} FROM pizza WHERE ingredientes LIKE ? {limit}"
+FTS_SQL = (
+    f"SELECT {{select}} FROM pizza JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = pizza.id "
+    f"WHERE {FTS_TABLE} MATCH ? {{limit}}"
+)
+
+
+def timed(conn, sql: str, param: str, repeat: int) -> tuple[float, int]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql, (param,)).fetchall()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), rows[0][0] if "COUNT" in sql else len(rows)
+
+
+def run(db_path: str, repeat: int) -> None:
+    conn = connect_reader(db_path)
+    total = conn.execute("SELECT COUNT(*) FROM pizza").fetchone()[0]
+    print(f"{GREEN}{total} pizzas em '{db_path}' (mediana de {repeat} execuções){RESET}")
+    for label, select, limit in (("contagem", "COUNT(*)", ""), ("top 20", "pizza.*", "LIMIT 20")):
+        print(f"{CYAN}-- {label} --{RESET}")
+        for term in TERMS:
+            like_s, like_n = timed(conn, LIKE_SQL.format(select=select, limit=limit), f"%{term}%", repeat)
+            fts_s, fts_n = timed(conn, FTS_SQL.format(select=select, limit=limit), fts_phrase(term), repeat)
+            print(
+                f"{term:<12} LIKE {like_s * 1000:9.2f}ms ({like_n:>7} linhas)   "
+                f"FTS {fts_s * 1000:9.2f}ms ({fts_n:>7} linhas)   x{like_s / max(fts_s, 1e-9):6.1f}"
+            )
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas_synthetic.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.db, args.repeat)
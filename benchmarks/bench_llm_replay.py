@@ -0,0 +1,72 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_llm_replay.py
+==========================
+Roda o golden set pelo pipeline (roteador desligado, para que todas as
+perguntas cheguem ao LLM) nos modos do backend de LLM:
+
+1. ``live`` com um LLM falso de latência fixa (faz o papel da Groq);
+2. ``record``, primeira passada: chama o LLM e grava o armazém;
+3. ``record``, segunda passada: tudo sai do armazém (cache persistente);
+4. ``replay``, sem LLM real, numa instância nova (como após um reinício).
+
+Reporta duração, chamadas ao LLM real e o tamanho do armazém em disco.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_llm_replay
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from utils.batch_eval import load_golden, make_golden_llm, run_batch
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+from utils.llm_backend import create_llm
+from utils.query_service import PizzaQueryService
+from utils.schema_context import SchemaContextProvider
+
+
+async def run_pass(label: str, db, llm, golden, concurrency: int) -> None:
+    service = PizzaQueryService(db, llm, schema_provider=SchemaContextProvider(db, "pizzas.db"))
+    report = await run_batch(service, golden, max_concurrency=concurrency)
+    service.close()
+    print(
+        f"{CYAN}{label:<26}{RESET} {report.seconds * 1000:8.1f}ms  "
+        f"p50={report.latency_ms(50):7.1f}ms  acurácia={report.accuracy:.0%}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    golden = load_golden(args.golden)
+    db = get_sql_database("pizzas.db")
+    store_path = os.path.join(tempfile.mkdtemp(prefix="pizzabot_llm_store_"), "llm_store.db")
+    fake = make_golden_llm(golden, first_token_latency_s=args.llm_latency)
+    print(f"{GREEN}{len(golden)} perguntas, LLM falso com {args.llm_latency * 1000:.0f}ms/chamada{RESET}")
+
+    await run_pass("live", db, create_llm(mode="live", inner=fake), golden, args.concurrency)
+    calls = fake.calls
+    recorder = create_llm(mode="record", store_path=store_path, inner=fake)
+    await run_pass("record (1ª passada)", db, recorder, golden, args.concurrency)
+    first_pass_calls = fake.calls - calls
+    await run_pass("record (2ª passada)", db, recorder, golden, args.concurrency)
+    second_pass_calls = fake.calls - calls - first_pass_calls
+    await run_pass("replay (nova instância)", db, create_llm(mode="replay", store_path=store_path), golden, 1)
+
+    stats = recorder.store.stats()
+    print(
+        f"{GREEN}Chamadas ao LLM real: 1ª passada={first_pass_calls}, 2ª passada={second_pass_calls}; "
+        f"armazém com {stats['entries']} completions, {stats['bytes']} bytes comprimidos{RESET}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--golden", default="benchmarks/golden_questions.jsonl")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="latência do LLM falso (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,172 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_logging.py
+=======================
+Custo do logging na thread da requisição, em três configurações:
+
+- ``síncrono``: como antes (``basicConfig`` com ``FileHandler`` e
+  ``StreamHandler``; mensagens em f-string com cores ANSI, formatadas e
+  escritas na própria thread);
+- ``fila``: ``utils.logging_setup`` (``QueueHandler`` + listener, JSON no
+  arquivo, formatação preguiçosa), sem amostragem;
+- ``fila+amostragem``: idem, com ``PIPELINE_SAMPLING`` (a amostragem é
+  opcional; ver ``PIZZABOT_LOG_SAMPLE``).
+
+Cada "requisição" emite as linhas de log de uma pergunta do pipeline
+(roteador, SQL completo, cache), em ``--threads`` threads simultâneas.
+Reporta a latência do logging por requisição (p50/p99/média, em µs), o
+tempo para esvaziar a fila e as linhas escritas. Com ``--pipeline`` > 0,
+mede também ``PizzaQueryService.ask`` (LLM falso) em cada configuração.
+
+O console vai para ``/dev/null`` (não é um TTY, como em contêineres).
+
+Run:
+    uv run python -m benchmarks.bench_logging --threads 8 --requests 2000
+    uv run python -m benchmarks.bench_logging --pipeline 300
+"""
+import argparse
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RESET, YELLOW
+from utils.logging_setup import PIPELINE_SAMPLING, TEXT_FORMAT, setup_logging, stop_logging
+from utils.tracing import percentile
+
+SQL = (
+    "SELECT pizza.name, pizza.tamanho, pizza.preco FROM pizza JOIN pizza_fts ON pizza_fts.rowid = pizza.id "
+    "WHERE pizza_fts MATCH 'ingredientes : \"calabresa\"' AND pizza.tamanho = 'Grande' "
+    "ORDER BY pizza.preco DESC, pizza.name LIMIT 50"
+)
+
+logger = logging.getLogger("benchmarks.bench_logging")
+
+
+def emit_eager(i: int) -> None:
+    """Linhas de uma requisição, no estilo antigo (f-string + ANSI)."""
+    logger.info(f"{CYAN}Roteador SQL: pergunta atendida pelo modelo 'ingrediente'{RESET}")
+    logger.info(f"Executando consulta SQL: {SQL} -- requisição {i}")
+    logger.info(f"{GREEN}Cache de respostas: acerto no nível 'normalizado'{RESET}")
+
+
+def emit_lazy(i: int) -> None:
+    """As mesmas linhas, com formatação preguiçosa."""
+    logger.info("Roteador SQL: pergunta atendida pelo modelo '%s'", "ingrediente")
+    logger.info("Executando consulta SQL: %s -- requisição %d", SQL, i)
+    logger.info("Cache de respostas: acerto no nível '%s'", "normalizado")
+
+
+def configure(mode: str, log_file: str, devnull) -> None:
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    if mode == "síncrono":
+        logging.basicConfig(
+            level=logging.INFO,
+            format=TEXT_FORMAT,
+            handlers=[logging.FileHandler(log_file), logging.StreamHandler(devnull)],
+        )
+        return
+    with contextlib.redirect_stderr(devnull):
+        setup_logging(log_file, level="INFO", sampling=PIPELINE_SAMPLING if mode == "fila+amostragem" else {})
+
+
+def drain(mode: str) -> float:
+    """Segundos até a última linha chegar ao arquivo."""
+    start = time.perf_counter()
+    if mode == "síncrono":
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+    else:
+        stop_logging()
+    return time.perf_counter() - start
+
+
+def run_synthetic(args: argparse.Namespace, mode: str, log_file: str, devnull) -> None:
+    configure(mode, log_file, devnull)
+    emit = emit_eager if mode == "síncrono" else emit_lazy
+    latencies: list[list[float]] = [[] for _ in range(args.threads)]
+    barrier = threading.Barrier(args.threads)
+
+    def worker(slot: int) -> None:
+        barrier.wait()
+        for i in range(args.requests):
+            start = time.perf_counter()
+            emit(i)
+            latencies[slot].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    drain_s = drain(mode)
+    values = sorted(v for slot in latencies for v in slot)
+    with open(log_file, encoding="utf-8") as f:
+        lines = sum(1 for _ in f)
+    print(
+        f"{CYAN}{mode:<16}{RESET} p50={percentile(values, 50) * 1e6:7.1f}µs p99={percentile(values, 99) * 1e6:8.1f}µs "
+        f"média={sum(values) / len(values) * 1e6:7.1f}µs  {len(values) / elapsed:9.0f} req/s  "
+        f"fila esvaziada em {drain_s * 1000:6.1f}ms  linhas={lines}"
+    )
+
+
+def run_pipeline(args: argparse.Namespace, mode: str, log_file: str, devnull) -> None:
+    from utils.fake_llm import FakeStreamingChatModel
+    from utils.query_service import PizzaQueryService
+
+    def responder(messages) -> str:
+        if "SQL query:" in str(messages[-1].content):
+            return "SELECT name, tamanho, preco FROM pizza ORDER BY preco DESC LIMIT 5"
+        return "Aqui estão as opções do cardápio."
+
+    configure(mode, log_file, devnull)
+    service = PizzaQueryService.from_config(
+        db_path=args.db, llm=FakeStreamingChatModel(responder=responder), answer_cache=None
+    )
+    questions = ["Quais pizzas têm calabresa?", "Qual a pizza mais cara?", "Me recomenda uma pizza doce?"]
+    latencies = []
+    for i in range(args.pipeline):
+        start = time.perf_counter()
+        service.ask(questions[i % len(questions)])
+        latencies.append(time.perf_counter() - start)
+    service.close()
+    drain(mode)
+    latencies.sort()
+    print(
+        f"{CYAN}{mode:<16}{RESET} ask p50={percentile(latencies, 50) * 1000:6.2f}ms "
+        f"p99={percentile(latencies, 99) * 1000:6.2f}ms"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    tmp = tempfile.mkdtemp(prefix="pizzabot_logging_")
+    modes = ["síncrono", "fila", "fila+amostragem"]
+    with open(os.devnull, "w") as devnull:
+        print(f"{GREEN}{args.threads} threads x {args.requests} requisições (3 linhas de log cada){RESET}")
+        for mode in modes:
+            run_synthetic(args, mode, os.path.join(tmp, f"synthetic_{modes.index(mode)}.log"), devnull)
+        if args.pipeline:
+            print(f"{YELLOW}Pipeline SQL (LLM falso), {args.pipeline} perguntas:{RESET}")
+            for mode in modes:
+                run_pipeline(args, mode, os.path.join(tmp, f"pipeline_{modes.index(mode)}.log"), devnull)
+    stop_logging()
+    print(f"{YELLOW}Logs em {tmp}{RESET}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="requisições por thread")
+    parser.add_argument("--pipeline", type=int, default=0, help="perguntas pelo pipeline SQL (0 = não mede)")
+    parser.add_argument("--db", default="pizzas.db")
+    main(parser.parse_args())
@@ -0,0 +1,129 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_menu_facts.py
+==========================
+Ganho dos fatos pré-calculados do cardápio (``utils.menu_facts``):
+
+- golden set (``benchmarks/golden_questions.jsonl``) pelo pipeline, com o
+  roteador SQL, sem e com o ``MenuSnapshot``: latência p50/p99 por
+  pergunta, chamadas ao LLM falso (com ``--llm-latency`` por chamada),
+  perguntas respondidas pelos fatos e acurácia dos resultados;
+- ``MenuSnapshot.answer`` isolado (µs por pergunta roteada);
+- manutenção das tabelas de fatos numa cópia do DB (ou do cardápio
+  sintético, ``--refresh-db``): reconstrução completa contra a
+  atualização incremental de ``--changes`` pizzas, ambas desfeitas com
+  rollback.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_menu_facts
+    uv run python -m benchmarks.generate_synthetic_menu --rows 1000000 --db pizzas_synthetic.db
+    uv run python -m benchmarks.bench_menu_facts --refresh-db pizzas_synthetic.db --changes 100
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from utils.batch_eval import load_golden, make_golden_llm, run_batch
+from utils.constants_ansi import CYAN, GREEN, RESET, YELLOW
+from utils.db_engine import connect_writer, get_sql_database
+from utils.menu_facts import MenuSnapshot, index_pizzas, rebuild_menu_facts, refresh_price_stats
+from utils.query_service import PizzaQueryService
+from utils.schema_context import SchemaContextProvider
+from utils.sql_router import SQLTemplateRouter
+from utils.tracing import percentile
+
+
+async def run_golden(args: argparse.Namespace) -> None:
+    golden = load_golden(args.golden) * args.repeat
+    db = get_sql_database(args.db)
+    print(f"{GREEN}{len(golden)} perguntas, LLM falso com {args.llm_latency * 1000:.0f}ms/chamada{RESET}")
+    for label, facts in (("sem fatos", None), ("com fatos", MenuSnapshot.from_sqlite(args.db))):
+        llm = make_golden_llm(golden, first_token_latency_s=args.llm_latency)
+        service = PizzaQueryService(
+            db,
+            llm,
+            sql_router=SQLTemplateRouter.from_sqlite(args.db),
+            schema_provider=SchemaContextProvider(db, args.db, facts=facts),
+            menu_facts=facts,
+        )
+        report = await run_batch(service, golden, max_concurrency=1)
+        service.close()
+        latencies = sorted(r.latency_s for r in report.results)
+        hits = facts.hits if facts is not None else 0
+        print(
+            f"{CYAN}{label:<10}{RESET} p50={percentile(latencies, 50) * 1000:7.2f}ms  "
+            f"p99={percentile(latencies, 99) * 1000:7.2f}ms  chamadas ao LLM={llm.calls:4}  "
+            f"respondidas pelos fatos={hits:4}  acurácia={report.accuracy:.1%}"
+        )
+
+
+def run_snapshot(args: argparse.Namespace) -> None:
+    golden = load_golden(args.golden)
+    router = SQLTemplateRouter.from_sqlite(args.db)
+    facts = MenuSnapshot.from_sqlite(args.db)
+    routed = [r for r in (router.route(g.question) for g in golden) if r is not None and facts.answer(r)]
+    start = time.perf_counter()
+    for _ in range(args.snapshot_rounds):
+        for r in routed:
+            facts.answer(r)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{CYAN}MenuSnapshot.answer{RESET} {elapsed / (args.snapshot_rounds * len(routed)) * 1e6:7.1f}µs/pergunta "
+        f"({len(routed)} perguntas cobertas, {facts.loads} carga(s) do snapshot)"
+    )
+
+
+def run_refresh(args: argparse.Namespace) -> None:
+    conn = connect_writer(args.refresh_db)
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM pizza").fetchone()[0]
+        ids = random.Random(42).sample(range(1, total + 1), min(args.changes, total))
+
+        conn.execute("BEGIN IMMEDIATE")
+        start = time.perf_counter()
+        rebuild_menu_facts(conn)
+        rebuild_s = time.perf_counter() - start
+        conn.rollback()
+
+        conn.execute("BEGIN IMMEDIATE")
+        start = time.perf_counter()
+        conn.execute(
+            "UPDATE pizza SET preco = preco + 1 WHERE id IN (SELECT value FROM json_each(?))", (str(ids),)
+        )
+        rows = conn.execute(
+            "SELECT id, name, tamanho, preco, ingredientes FROM pizza WHERE id IN (SELECT value FROM json_each(?))",
+            (str(ids),),
+        ).fetchall()
+        index_pizzas(conn, rows)
+        refresh_price_stats(conn, {row[2] for row in rows})
+        incremental_s = time.perf_counter() - start
+        conn.rollback()
+    finally:
+        conn.close()
+    print(
+        f"{CYAN}fatos em '{args.refresh_db}'{RESET} ({total} pizzas): reconstrução {rebuild_s * 1000:9.1f}ms  "
+        f"incremental ({len(ids)} alteradas) {incremental_s * 1000:7.1f}ms"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    asyncio.run(run_golden(args))
+    run_snapshot(args)
+    run_refresh(args)
+    print(f"{YELLOW}As alterações da medição de manutenção foram desfeitas (rollback).{RESET}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas.db")
+    parser.add_argument("--golden", default="benchmarks/golden_questions.jsonl")
+    parser.add_argument("--repeat", type=int, default=4, help="repetições do golden set")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="latência do LLM falso (s)")
+    parser.add_argument("--snapshot-rounds", type=int, default=2000)
+    parser.add_argument("--refresh-db", default="pizzas.db", help="DB para medir a manutenção dos fatos")
+    parser.add_argument("--changes", type=int, default=10, help="pizzas alteradas na atualização incremental")
+    main(parser.parse_args())
@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_menu_loader.py
+===========================
+Compara a carga incremental (``utils.menu_loader.load_menu``) com o
+método antigo do ``create_database.py`` (lista inteira em memória +
+``DELETE FROM pizza`` + ``executemany``) num catálogo sintético em CSV.
+Cenários: carga inicial, recarga sem mudanças e recarga com 1% das
+linhas alteradas. Reporta tempo e linhas efetivamente escritas; com
+``--memory``, também o pico de memória Python (tracemalloc, que deixa
+as cargas bem mais lentas).
+
+Run:
+    uv run python -m benchmarks.bench_menu_loader --rows 2000000
+    uv run python -m benchmarks.bench_menu_loader --rows 2000000 --memory
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generate_synthetic_menu import generate_rows
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import connect_writer
+from utils.menu_loader import COLUMNS, load_menu
+from utils.menu_schema import create_menu_schema
+
+
+def write_csv(path: str, n_rows: int, seed: int, changed_fraction: float = 0.0) -> None:
+    step = int(1 / changed_fraction) if changed_fraction else 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in generate_rows(n_rows, seed):
+            if step and row[0] % step == 0:
+                row = row[:3] + (round(row[3] + 1.0, 2),) + row[4:]
+            writer.writerow(row)
+
+
+def legacy_load(conn, csv_path: str) -> int:
+    """Método antigo: lista inteira em memória, DELETE e reinserção de tudo."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        pizzas = [
+            (int(r["id"]), r["name"], r["tamanho"], float(r["preco"]), r["ingredientes"])
+            for r in csv.DictReader(f)
+        ]
+    conn.execute("DELETE FROM pizza")
+    conn.executemany("INSERT INTO pizza VALUES (?, ?, ?, ?, ?)", pizzas)
+    conn.commit()
+    return len(pizzas)
+
+
+def measure(label: str, fn, trace_memory: bool) -> None:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    memory = ""
+    if trace_memory:
+        memory = f"pico={tracemalloc.get_traced_memory()[1] / 2**20:8.1f} MiB  "
+        tracemalloc.stop()
+    print(f"{CYAN}{label:<38}{RESET} {elapsed:8.2f}s  {memory}{result}")
+
+
+def run(args: argparse.Namespace) -> None:
+    tmp = tempfile.mkdtemp(prefix="pizzabot_loader_")
+    base_csv = os.path.join(tmp, "menu.csv")
+    changed_csv = os.path.join(tmp, "menu_changed.csv")
+    write_csv(base_csv, args.rows, args.seed)
+    write_csv(changed_csv, args.rows, args.seed, changed_fraction=0.01)
+    print(f"{GREEN}Catálogo sintético de {args.rows} linhas em {tmp}{RESET}")
+
+    for label, loader in (
+        ("antigo", lambda conn, path: f"escritas={legacy_load(conn, path)}"),
+        ("incremental", lambda conn, path: load_menu(conn, path, chunk_size=args.chunk_size).as_dict()),
+    ):
+        db_path = os.path.join(tmp, f"{label}.db")
+        conn = connect_writer(db_path)
+        create_menu_schema(conn)
+        conn.commit()
+        measure(f"{label}: carga inicial", lambda: loader(conn, base_csv), args.memory)
+        measure(f"{label}: recarga sem mudanças", lambda: loader(conn, base_csv), args.memory)
+        measure(f"{label}: recarga com 1% alterado", lambda: loader(conn, changed_csv), args.memory)
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", action="store_true", help="mede o pico de memória com tracemalloc")
+    run(parser.parse_args())
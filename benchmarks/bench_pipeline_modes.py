@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_pipeline_modes.py
+==============================
+Compara os modos ``two_call`` e ``single_call`` do ``PizzaQueryService``
+com um LLM falso e determinístico (latência até o primeiro token e entre
+tokens). Cache de respostas e roteador SQL ficam desligados para que
+todas as perguntas passem pelo LLM. Reporta latência p50/p95/p99,
+time-to-first-token e chamadas ao LLM por pergunta.
+
+O conjunto de perguntas mistura formatos cobertos pelos templates de
+resposta (listas de pizzas, contagens, preço médio) com um formato que
+exige redação pelo LLM (agregação por tamanho).
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_pipeline_modes
+"""
+import argparse
+import asyncio
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+from utils.fake_llm import FakeStreamingChatModel
+from utils.query_service import ANSWER_SYSTEM_PROMPT, PizzaQueryService
+from utils.schema_context import SchemaContextProvider
+from utils.tracing import percentile
+
+# Pergunta -> SQL que o LLM falso "gera" para ela:
+QUESTIONS = {
+    "Quais são as três pizzas mais caras?": "SELECT name, tamanho, preco FROM pizza ORDER BY preco DESC LIMIT 3",
+    "Quantas pizzas têm queijo?": "SELECT COUNT(*) FROM pizza WHERE ingredientes LIKE '%queijo%'",
+    "Qual o preço médio das pizzas?": "SELECT AVG(preco) FROM pizza",
+    "Quais pizzas grandes custam menos de 40 reais?": "SELECT name, preco FROM pizza WHERE tamanho = 'Grande' AND preco < 40",
+    "Qual o preço médio por tamanho?": "SELECT tamanho, AVG(preco) AS media FROM pizza GROUP BY tamanho",
+}
+
+ANSWER_TEXT = (
+    "Claro! Aqui está o que encontrei no cardápio da Pizzaria Delícia: as opções e os preços "
+    "que você pediu, com todo o carinho da nossa equipe. Posso ajudar em algo mais?"
+)
+
+
+def fake_responder(messages) -> str:
+    if messages[0].content.startswith(ANSWER_SYSTEM_PROMPT):
+        return ANSWER_TEXT
+    question = messages[-1].content.split("\n\nSQL query:")[0]
+    return QUESTIONS[question]
+
+
+async def run_mode(args: argparse.Namespace, db, mode: str) -> None:
+    llm = FakeStreamingChatModel(
+        responder=fake_responder,
+        first_token_latency_s=args.first_token_latency,
+        token_latency_s=args.token_latency,
+    )
+    service = PizzaQueryService(
+        db, llm, pipeline_mode=mode, schema_provider=SchemaContextProvider(db, "pizzas.db")
+    )
+    latencies, ttfts = [], []
+    questions = list(QUESTIONS) * args.rounds
+    for question in questions:
+        start = time.perf_counter()
+        first = None
+        async for _ in service.astream(question):
+            if first is None:
+                first = time.perf_counter() - start
+        latencies.append(time.perf_counter() - start)
+        ttfts.append(first)
+    service.close()
+
+    latencies.sort()
+    ttfts.sort()
+    print(
+        f"{CYAN}{mode:<12}{RESET} p50={percentile(latencies, 50) * 1000:7.1f}ms  "
+        f"p95={percentile(latencies, 95) * 1000:7.1f}ms  p99={percentile(latencies, 99) * 1000:7.1f}ms  "
+        f"ttft p50={percentile(ttfts, 50) * 1000:7.1f}ms  "
+        f"chamadas ao LLM/pergunta={llm.calls / len(questions):.2f}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = get_sql_database("pizzas.db")
+    print(
+        f"{GREEN}LLM falso: {args.first_token_latency * 1000:.0f}ms até o 1º token, "
+        f"{args.token_latency * 1000:.0f}ms/token; {len(QUESTIONS) * args.rounds} perguntas por modo{RESET}"
+    )
+    for mode in ("two_call", "single_call"):
+        await run_mode(args, db, mode)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10, help="repetições do conjunto de perguntas")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="latência até o 1º token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="latência entre tokens (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_query_result.py
+============================
+Memória de pico (``tracemalloc``), latência e tokens do prompt por
+tamanho do resultado: ``fetchall`` + ``repr`` da lista de linhas (como o
+antigo ``db.run``) contra o ``QueryResult`` colunar lido em lotes pela
+``SQLGuard``, que guarda só as primeiras linhas e resume o resto.
+
+Run:
+    uv run python -m benchmarks.bench_query_result --rows 200000
+"""
+import argparse
+import os
+import sqlite3
+import time
+import tracemalloc
+
+from benchmarks.generate_synthetic_menu import build
+from utils.constants_ansi import CYAN, GREEN, RESET, YELLOW
+from utils.db_engine import create_readonly_engine
+from utils.sql_guard import SQLGuard
+from utils.tokens import count_tokens
+
+
+def measure(fn) -> tuple[str, float, float]:
+    """(texto do prompt, segundos, MiB de pico); a memória é medida numa segunda execução."""
+    start = time.perf_counter()
+    text = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, elapsed, peak / 1024 / 1024
+
+
+def main(args: argparse.Namespace) -> None:
+    if not os.path.exists(args.db):
+        print(f"{YELLOW}Gerando {args.rows} linhas em {args.db}...{RESET}")
+        build(args.db, args.rows)
+    conn = sqlite3.connect(args.db)
+    # Sem LIMIT e sem orçamento de tempo/tokens: só a forma do resultado muda.
+    guard = SQLGuard(create_readonly_engine(args.db), max_rows=10**9, time_budget_s=600, token_budget=10**9)
+    print(f"{GREEN}Resumo acima de {guard.summary_threshold} linhas; {guard.keep_rows} linhas guardadas{RESET}")
+    print(f"{'linhas':>8} {'modo':<10} {'ms':>9} {'MiB pico':>9} {'tokens':>9}")
+    for limit in args.sizes:
+        sql = f"SELECT * FROM pizza LIMIT {limit}"
+        for mode, fn in (
+            ("repr", lambda: str(conn.execute(sql).fetchall())),
+            ("colunar", lambda: guard.to_prompt_text(guard.execute(sql))),
+        ):
+            text, elapsed, peak = measure(fn)
+            print(f"{CYAN}{limit:>8}{RESET} {mode:<10} {elapsed * 1000:>9.1f} {peak:>9.2f} {count_tokens(text):>9}")
+    conn.close()
+    print(f"{YELLOW}Resumo enviado ao LLM para o maior resultado:{RESET}")
+    print(guard.to_prompt_text(guard.execute(f"SELECT * FROM pizza LIMIT {args.sizes[-1]}")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas_synthetic.db")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 100_000])
+    main(parser.parse_args())
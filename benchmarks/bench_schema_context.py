@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_schema_context.py
+==============================
+Mede, por requisição, o custo do contexto de esquema no prompt de SQL:
+tokens do prompt de sistema formatado e latência para obter o esquema.
+Compara o comportamento antigo (``db.get_table_info()`` a cada chamada,
+mais a descrição manual da tabela) com o ``SchemaContextProvider`` nos
+modos ``full`` e ``compact``.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_schema_context
+"""
+import statistics
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+from utils.query_service import SQL_SYSTEM_PROMPT
+from utils.schema_context import SchemaContextProvider
+from utils.tokens import count_tokens
+
+# Descrição manual da tabela que o prompt antigo enviava junto com o esquema:
+LEGACY_TABLE_DESCRIPTION = """
+# Tabela 'pizza'
+- id (INTEGER, PRIMARY KEY): Identificador único da pizza
+- name (TEXT): Nome da pizza
+- tamanho (TEXT): Tamanho da pizza (Pequena, Média, Grande)
+- preco (REAL): Preço da pizza
+- ingredientes (TEXT): Lista de ingredientes da pizza
+"""
+
+
+def measure(label: str, get_schema, extra: str = "", requests: int = 200) -> None:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        schema = get_schema()
+        latencies.append(time.perf_counter() - start)
+    tokens = count_tokens(extra + SQL_SYSTEM_PROMPT.format(schema=schema))
+    print(
+        f"{CYAN}{label:<22}{RESET} tokens do prompt={tokens:5d}  "
+        f"latência do esquema: mediana={statistics.median(latencies) * 1000:7.3f}ms "
+        f"máx={max(latencies) * 1000:7.3f}ms"
+    )
+
+
+def run() -> None:
+    # Sem as tabelas internas (FTS5 e fatos do cardápio), que não vão para o prompt:
+    db = get_sql_database("pizzas.db")
+    print(f"{GREEN}Custo por requisição do contexto de esquema:{RESET}")
+    measure("antigo (sem cache)", db.get_table_info, extra=LEGACY_TABLE_DESCRIPTION)
+    measure("provider full", SchemaContextProvider(db, "pizzas.db", mode="full").get)
+    measure("provider compact", SchemaContextProvider(db, "pizzas.db", mode="compact").get)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,110 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_sql_agent.py
+=========================
+Conta as chamadas ao LLM por pergunta do agente SQL nos modos ``legacy``
+(``create_sql_agent`` padrão) e ``bounded`` (esquema pré-carregado no
+prompt e ferramentas memoizadas), com um LLM falso roteirizado que
+imita um modelo real: enquanto não vê as tabelas e o esquema no
+contexto, ele os pede às ferramentas e revisa a consulta com o
+``sql_db_query_checker`` antes de executá-la.
+
+Também mostra o fallback para o pipeline SQL quando o agente estoura
+``max_iterations``.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_sql_agent
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_core.messages import AIMessage
+
+from utils.constants_ansi import CYAN, GREEN, RESET, YELLOW
+from utils.db_engine import get_sql_database
+from utils.fake_llm import FakeStreamingChatModel
+from utils.query_service import ANSWER_SYSTEM_PROMPT, PizzaQueryService
+from utils.schema_context import SchemaContextProvider
+from utils.sql_agent import SQLAgentFactory
+
+QUESTIONS = {
+    "Qual a pizza mais cara?": "SELECT name, preco FROM pizza ORDER BY preco DESC LIMIT 1",
+    "Quantas pizzas têm calabresa?": "SELECT COUNT(*) FROM pizza WHERE ingredientes LIKE '%calabresa%'",
+    "Qual o preço médio das pizzas grandes?": "SELECT AVG(preco) FROM pizza WHERE tamanho = 'Grande'",
+}
+
+
+def scripted_responder(messages) -> object:
+    """Próximo passo do "modelo" a partir do que já está no contexto."""
+    system = str(messages[0].content)
+    if system.startswith(ANSWER_SYSTEM_PROMPT):
+        return "Resposta redigida pelo pipeline SQL."
+    if "Double check" in str(messages[-1].content):  # prompt do sql_db_query_checker
+        return str(messages[-1].content).split("\n")[0].strip()
+    if "SQL query:" in str(messages[-1].content):  # prompt de SQL do pipeline
+        return "SELECT name, preco FROM pizza ORDER BY preco DESC LIMIT 1"
+
+    question = next(m.content for m in messages if m.type == "human")
+    sql = QUESTIONS[question]
+    called = [call["name"] for m in messages if isinstance(m, AIMessage) for call in m.tool_calls]
+    steps = [("sql_db_query", {"query": sql})]
+    if "Esquema:" not in system:
+        steps = [
+            ("sql_db_list_tables", {"tool_input": ""}),
+            ("sql_db_schema", {"table_names": "pizza"}),
+            ("sql_db_query_checker", {"query": sql}),
+        ] + steps
+    for name, args in steps:
+        if name not in called:
+            return {"name": name, "args": args}
+    return f"Resposta final do agente para: {question}"
+
+
+async def run_mode(args: argparse.Namespace, db, schema_provider, mode: str, max_iterations: int) -> None:
+    llm = FakeStreamingChatModel(responder=scripted_responder, first_token_latency_s=args.llm_latency)
+    agent = SQLAgentFactory(llm, db, schema_provider, mode=mode, max_iterations=max_iterations)
+    service = PizzaQueryService(db, llm, schema_provider=schema_provider, sql_agent=agent)
+    latencies = []
+    questions = list(QUESTIONS) * args.rounds
+    for question in questions:
+        start = time.perf_counter()
+        answer = await service.aask_agent(question)
+        latencies.append(time.perf_counter() - start)
+    service.close()
+
+    cache = agent.tool_cache
+    cache_info = ""
+    if mode == "bounded":
+        cache_info = f"  cache de ferramentas: {cache.hits} hits/{cache.hits + cache.misses}"
+    print(
+        f"{CYAN}{mode:<8} max_iterations={max_iterations:<3}{RESET} "
+        f"chamadas ao LLM/pergunta={llm.calls / len(questions):.2f}  "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms{cache_info}"
+    )
+    print(f"{YELLOW}   última resposta: {answer!r}{RESET}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = get_sql_database("pizzas.db")
+    schema_provider = SchemaContextProvider(db, "pizzas.db")
+    print(
+        f"{GREEN}LLM falso: {args.llm_latency * 1000:.0f}ms/chamada, "
+        f"{args.rounds} rodadas de {len(QUESTIONS)} perguntas{RESET}"
+    )
+    await run_mode(args, db, schema_provider, "legacy", 15)
+    await run_mode(args, db, schema_provider, "bounded", 6)
+    # Orçamento curto demais (uma iteração): o serviço cai no pipeline SQL.
+    await run_mode(args, db, schema_provider, "bounded", 1)
+    schema_provider.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="latência do LLM falso (s)")
+    asyncio.run(main(parser.parse_args()))
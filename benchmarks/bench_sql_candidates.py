@@ -0,0 +1,129 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_sql_candidates.py
+==============================
+Taxa de acerto contra latência de cauda da execução especulativa de
+consultas candidatas (``utils.sql_candidates``), com um LLM falso.
+
+O LLM falso responde o ``expected_sql`` do golden set
+(``benchmarks/golden_questions.jsonl``), mas cada consulta que escreve
+sai quebrada (coluna ou tabela inexistente, erro de sintaxe) com
+probabilidade ``--error-rate``. Com 1 candidata (o comportamento antigo)
+ele escreve uma consulta; com N, escreve N alternativas (a esperada e
+reformulações equivalentes), o que custa tokens de saída a mais
+(``--token-latency-ms`` por token). As falhas são sorteadas com a mesma
+semente em todos os modos.
+
+Todas as perguntas vão ao LLM (roteador desligado). Reporta, por número
+de candidatas: acerto, respostas com erro de SQL, latência p50/p95/p99,
+chamadas ao LLM e rodadas "resgatadas" (a primeira candidata falhou e
+outra respondeu).
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_sql_candidates --candidates 1 2 3 --error-rate 0.25
+"""
+import argparse
+import asyncio
+import random
+
+from utils.batch_eval import load_golden, run_batch
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+from utils.fake_llm import FakeStreamingChatModel
+from utils.query_service import PizzaQueryService
+from utils.schema_context import SchemaContextProvider
+
+# Quebras típicas de uma consulta gerada (a primeira que mudar o SQL):
+_BREAKS = (
+    ("FROM pizza", "FROM pizzas"),
+    ("preco", "preço"),
+    ("name", "nome"),
+)
+
+
+def variants(sql: str, n: int) -> list[str]:
+    """A consulta esperada e reformulações equivalentes (mesmo resultado)."""
+    result = [sql]
+    while len(result) < n:
+        result.append(f"SELECT * FROM ({result[-1]})")
+    return result
+
+
+def corrupt(sql: str, rng: random.Random) -> str:
+    for old, new in rng.sample(_BREAKS, len(_BREAKS)):
+        if old in sql:
+            return sql.replace(old, new, 1)
+    return f"{sql} WHERE"
+
+
+def make_llm(golden: list, args: argparse.Namespace) -> FakeStreamingChatModel:
+    sql_by_question = {g.question: g.expected_sql for g in golden}
+    occurrences: dict[str, int] = {}
+
+    def responder(messages: list) -> str:
+        human = str(messages[-1].content)
+        if human.startswith("Pergunta original:"):
+            return "Aqui está o que encontrei no cardápio da pizzaria."
+        question = human.split("\n\nSQL query:")[0]
+        expected = sql_by_question.get(question)
+        if expected is None:
+            return "Não sei responder."
+        # Mesmo sorteio em todos os modos: semente = (pergunta, ocorrência).
+        occurrence = occurrences[question] = occurrences.get(question, 0) + 1
+        rng = random.Random(f"{args.seed}:{question}:{occurrence}")
+        n = args.max_candidates if "consultas SQL SELECT alternativas" in str(messages[0].content) else 1
+        queries = [corrupt(sql, rng) if rng.random() < args.error_rate else sql for sql in variants(expected, n)]
+        return "\n".join(queries)
+
+    return FakeStreamingChatModel(
+        responder=responder,
+        first_token_latency_s=args.llm_latency_ms / 1000,
+        token_latency_s=args.token_latency_ms / 1000,
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    golden = load_golden(args.golden) * args.repeat
+    db = get_sql_database(args.db)
+    print(
+        f"{GREEN}{len(golden)} perguntas, erro por consulta gerada={args.error_rate:.0%}, "
+        f"LLM falso {args.llm_latency_ms:.0f}ms + {args.token_latency_ms:.1f}ms/token{RESET}"
+    )
+    for n in args.candidates:
+        args.max_candidates = n
+        llm = make_llm(golden, args)
+        service = PizzaQueryService(
+            db,
+            llm,
+            schema_provider=SchemaContextProvider(db, args.db),
+            sql_candidates=n,
+            sql_candidates_parallel=args.parallel,
+        )
+        report = await run_batch(service, golden, max_concurrency=args.concurrency)
+        service.close()
+        summary = report.as_dict()
+        errors = sum(1 for r in report.results if r.error)
+        rescued = service.candidate_runner.rescued if service.candidate_runner is not None else 0
+        print(
+            f"{CYAN}{n} candidata(s):{RESET} acerto={report.accuracy:6.1%}  erros de SQL={errors:3}  "
+            f"p50={summary['latency_ms']['p50']:7.1f}ms  p95={summary['latency_ms']['p95']:7.1f}ms  "
+            f"p99={summary['latency_ms']['p99']:7.1f}ms  chamadas ao LLM={llm.calls:4}  resgatadas={rescued:3}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas.db")
+    parser.add_argument("--golden", default="benchmarks/golden_questions.jsonl")
+    parser.add_argument("--repeat", type=int, default=8, help="repetições do golden set")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--parallel", type=int, default=2, help="candidatas executadas em paralelo")
+    parser.add_argument("--error-rate", type=float, default=0.25, help="chance de cada consulta gerada quebrar")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--token-latency-ms", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
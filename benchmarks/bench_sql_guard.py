@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_sql_guard.py
+=========================
+Pior caso da execução do SQL gerado pelo LLM, com e sem a ``SQLGuard``,
+num cardápio sintético grande: latência da consulta e tamanho (em
+tokens) do resultado que iria para o prompt de resposta.
+
+Consultas medidas: ``SELECT *`` no cardápio inteiro, um produto
+cartesiano e um agregado sobre ele (sem a guarda, cortados pelo
+``--max-seconds`` só para o benchmark terminar) e comandos de escrita,
+que a guarda recusa.
+
+Run:
+    uv run python -m benchmarks.bench_sql_guard --rows 200000
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from benchmarks.generate_synthetic_menu import build
+from utils.constants_ansi import CYAN, GREEN, RED, RESET, YELLOW
+from utils.db_engine import create_readonly_engine
+from utils.sql_guard import QueryTimeoutError, SQLGuard, UnsafeQueryError
+from utils.tokens import count_tokens
+
+QUERIES = {
+    "select_star": "SELECT * FROM pizza",
+    "cartesiano": "SELECT a.name, b.name FROM pizza a, pizza b WHERE a.preco + b.preco > 0",
+    # O LIMIT não ajuda aqui (o agregado varre o produto inteiro): quem corta é o orçamento de tempo.
+    "agregado": "SELECT COUNT(*) FROM pizza a, pizza b WHERE a.preco > b.preco",
+}
+UNSAFE = ["DELETE FROM pizza", "DROP TABLE pizza", "PRAGMA writable_schema = 1", "ATTACH 'x.db' AS x"]
+
+
+def unguarded(db_path: str, sql: str, max_seconds: float) -> tuple[float, int, str]:
+    """Execução direta (como o ``db._execute`` antigo); o corte em ``max_seconds`` só existe aqui."""
+    conn = sqlite3.connect(db_path)
+    deadline = time.perf_counter() + max_seconds
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, 10_000)
+    start = time.perf_counter()
+    try:
+        rows = conn.execute(sql).fetchall()
+        text, status = str(rows), f"{len(rows)} linhas"
+    except sqlite3.OperationalError:
+        text, status = "", f"{RED}ainda rodando após {max_seconds}s{RESET}"
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, count_tokens(text), status
+
+
+def guarded(guard: SQLGuard, sql: str) -> tuple[float, int, str]:
+    start = time.perf_counter()
+    try:
+        data = guard.execute(sql)
+        text = guard.to_prompt_text(data)
+        status = f"{len(data)} linhas" + (" (cortado)" if data.truncated else "")
+    except QueryTimeoutError:
+        text, status = "", "interrompida (orçamento de tempo)"
+    return time.perf_counter() - start, count_tokens(text), status
+
+
+def main(args: argparse.Namespace) -> None:
+    if not os.path.exists(args.db):
+        print(f"{YELLOW}Gerando {args.rows} linhas em {args.db}...{RESET}")
+        build(args.db, args.rows)
+    guard = SQLGuard(
+        create_readonly_engine(args.db),
+        max_rows=args.max_rows,
+        time_budget_s=args.time_budget,
+        token_budget=args.token_budget,
+    )
+    print(
+        f"{GREEN}Guarda: max_rows={args.max_rows}, orçamento={args.time_budget}s, "
+        f"{args.token_budget} tokens{RESET}"
+    )
+    print(f"{'consulta':<12} {'modo':<10} {'ms':>10} {'tokens':>10}  status")
+    for name, sql in QUERIES.items():
+        for mode, (elapsed, tokens, status) in (
+            ("sem guarda", unguarded(args.db, sql, args.max_seconds)),
+            ("com guarda", guarded(guard, sql)),
+        ):
+            print(f"{CYAN}{name:<12}{RESET} {mode:<10} {elapsed * 1000:>10.1f} {tokens:>10}  {status}")
+
+    for sql in UNSAFE:
+        try:
+            guard.execute(sql)
+            print(f"{RED}ACEITA: {sql}{RESET}")
+        except UnsafeQueryError:
+            print(f"{GREEN}recusada:{RESET} {sql}")
+    print(f"{YELLOW}Contadores: recusadas={guard.rejected} timeouts={guard.timeouts} cortes={guard.truncated}{RESET}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas_synthetic.db")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--max-rows", type=int, default=10_000)
+    parser.add_argument("--time-budget", type=float, default=2.0, help="orçamento de tempo da guarda (s)")
+    parser.add_argument("--token-budget", type=int, default=1000)
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="corte da execução sem guarda (s)")
+    main(parser.parse_args())
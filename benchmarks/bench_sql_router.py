@@ -0,0 +1,88 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_sql_router.py
+==========================
+Compara a latência ponta a ponta do pipeline de consulta com e sem o
+roteador de modelos SQL (``SQLTemplateRouter``). As chamadas ao Groq
+são substituídas por LLMs falsos com latência fixa, e a cobertura do
+roteador é reportada para o conjunto de perguntas.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_sql_router
+"""
+import statistics
+import time
+
+from langchain_community.utilities.sql_database import SQLDatabase
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.sql_router import SQLTemplateRouter
+
+QUESTIONS = [
+    "Qual a pizza mais cara?",
+    "Qual a pizza mais barata?",
+    "Quais pizzas contêm calabresa?",
+    "Tem pizza com catupiry?",
+    "Quais são os ingredientes da pizza Portuguesa?",
+    "Quanto custa a pizza Havaiana?",
+    "Quantas pizzas grandes vocês têm?",
+    "Quais são as pizzas disponíveis?",
+    "Tem pizza vegetariana?",
+    "Qual a média de preço das pizzas?",
+]
+
+LLM_LATENCY_S = 0.05
+
+
+def build_pipeline(db: SQLDatabase, router: SQLTemplateRouter | None):
+    sql_llm = FakeListChatModel(responses=["SELECT * FROM pizza LIMIT 5"], sleep=LLM_LATENCY_S)
+    answer_llm = FakeListChatModel(responses=["Aqui está a sua resposta!"], sleep=LLM_LATENCY_S)
+    sql_chain = sql_llm | StrOutputParser()
+    answer_chain = answer_llm | StrOutputParser()
+
+    def process(question: str) -> str:
+        routed = router.route(question) if router else None
+        if routed is not None:
+            sql_result = db.run(routed.sql, parameters=routed.params)
+        else:
+            sql_query = sql_chain.invoke(question).strip()
+            sql_result = db.run(sql_query)
+        return answer_chain.invoke(f"{question}\n{sql_result}")
+
+    return process
+
+
+def measure(process, rounds: int = 5) -> list[float]:
+    latencies = []
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            process(question)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run() -> None:
+    db = SQLDatabase.from_uri("sqlite:///pizzas.db")
+    router = SQLTemplateRouter.from_sqlite("pizzas.db")
+
+    for label, pipeline in (
+        ("Sem roteador", build_pipeline(db, None)),
+        ("Com roteador", build_pipeline(db, router)),
+    ):
+        latencies = measure(pipeline)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(
+            f"{CYAN}{label}:{RESET} mediana={statistics.median(latencies) * 1000:.1f}ms "
+            f"p95={p95 * 1000:.1f}ms total={sum(latencies):.2f}s"
+        )
+    print(f"{GREEN}Cobertura do roteador:{RESET} {router.coverage()}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,127 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_sqlite_readers.py
+==============================
+Microbenchmark da vazão de ``run_query`` com leitores em paralelo
+enquanto o ``create_database.py`` recarrega o cardápio em loop (em outro
+processo). Compara o engine padrão do ``SQLDatabase.from_uri`` com o
+engine somente leitura da fábrica ``utils.db_engine``. Os engines se
+alternam por ``--rounds`` rodadas e o relatório traz a mediana de cada um
+(a ordem de execução não favorece nenhum).
+
+Os dois empatam dentro do ruído, tanto no ``pizzas.db`` quanto num
+cardápio sintético de 200 mil pizzas com varredura completa (``--scan``):
+o custo é do Python e do SQLAlchemy, não do SQLite. A fábrica não existe
+por vazão, e sim por segurança: conexões ``mode=ro`` + ``query_only`` (o
+LLM não consegue escrever) e ``busy_timeout`` (sem "database is locked"
+durante a recarga). Este benchmark confere que ela não custa vazão.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_sqlite_readers --readers 8 --seconds 5
+    uv run python -m benchmarks.generate_synthetic_menu --rows 200000 --db pizzas_synthetic.db
+    uv run python -m benchmarks.bench_sqlite_readers --db pizzas_synthetic.db --scan --readers 4
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from langchain_community.utilities.sql_database import SQLDatabase
+
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+
+QUERY = "SELECT name, tamanho, preco FROM pizza WHERE ingredientes LIKE '%mussarela%' ORDER BY preco DESC"
+# Varredura completa sem devolver linhas (mede o SQLite, não a conversão do resultado):
+SCAN_QUERY = "SELECT COUNT(*) FROM pizza WHERE ingredientes LIKE '%mussarela%'"
+
+
+def reseed_loop(stop: threading.Event, counter: list[int]) -> None:
+    """Executa o create_database.py repetidamente até ``stop``."""
+    while not stop.is_set():
+        subprocess.run([sys.executable, "create_database.py"], capture_output=True, check=False)
+        counter[0] += 1
+
+
+def run_readers(db: SQLDatabase, readers: int, seconds: float, query: str = QUERY) -> tuple[int, int, list[float]]:
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+    totals = {"ok": 0, "errors": 0}
+    latencies: list[float] = []
+
+    def reader() -> None:
+        ok = errors = 0
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                db.run(query)
+                ok += 1
+            except Exception:
+                errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            totals["ok"] += ok
+            totals["errors"] += errors
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return totals["ok"], totals["errors"], latencies
+
+
+def run(args: argparse.Namespace) -> None:
+    engines = {
+        "SQLDatabase.from_uri (padrão)": SQLDatabase.from_uri(
+            f"sqlite:///{args.db}", engine_args={"connect_args": {"check_same_thread": False}}
+        ),
+        "db_engine (somente leitura + pool)": get_sql_database(args.db, pool_size=args.readers),
+    }
+    query = SCAN_QUERY if args.scan else QUERY
+    # O create_database.py só recarrega o pizzas.db:
+    with_writer = not args.no_writer and args.db == "pizzas.db"
+    results: dict[str, list[tuple[float, int, float, int]]] = {label: [] for label in engines}
+    for _ in range(args.rounds):
+        for label, db in engines.items():
+            stop_writer = threading.Event()
+            reseeds = [0]
+            writer = threading.Thread(target=reseed_loop, args=(stop_writer, reseeds))
+            if with_writer:
+                writer.start()
+            ok, errors, latencies = run_readers(db, args.readers, args.seconds, query)
+            stop_writer.set()
+            if writer.is_alive():
+                writer.join()
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+            results[label].append((ok / args.seconds, errors, p99, reseeds[0]))
+    for label, runs in results.items():
+        rates = sorted(run[0] for run in runs)
+        print(
+            f"{CYAN}{label:<34}{RESET} mediana {statistics.median(rates):9.1f} consultas/s "
+            f"(faixa {rates[0]:.1f}-{rates[-1]:.1f})  erros={sum(run[1] for run in runs)}  "
+            f"p99={statistics.median(run[2] for run in runs) * 1000:.2f}ms  recargas={sum(run[3] for run in runs)}"
+        )
+    print(
+        f"{GREEN}'{args.db}', {args.readers} leitores, {args.rounds} rodada(s) de {args.seconds:.0f}s por engine"
+        f"{', com recarga concorrente' if with_writer else ''}{RESET}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas.db")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="rodadas alternando os engines")
+    parser.add_argument("--scan", action="store_true", help="varredura completa com COUNT(*)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--no-writer", action="store_true", help="sem recarga concorrente")
+    run(parser.parse_args())
@@ -0,0 +1,227 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_startup.py
+=======================
+Custo de partida (cold start) do PizzaBot, sempre em processos novos:
+
+1. tempo de import (``python -X importtime``) dos módulos das interfaces
+   e tempo de parede de ``querying_my_sql_database.py --help``;
+2. tempo até a interface aceitar a primeira pergunta e latência da
+   primeira resposta, em dois modos:
+
+   - ``eager``: como as interfaces faziam antes — importa o serviço e
+     abre a loja padrão antes de aceitar perguntas;
+   - ``lazy``: ``create_app_components`` + ``prewarm`` — aceita perguntas
+     logo e aquece o serviço em segundo plano enquanto o usuário digita
+     (``--think-ms``).
+
+O LLM roda em modo ``replay`` (``utils.llm_backend``), com um armazém
+gravado antes por um LLM falso: o caminho de criação do LLM é o de
+produção, mas sem rede. Só ``--help`` e a CLI são medidos aqui (o
+Streamlit e o Mesop usam os mesmos ``utils.components``).
+
+``--check`` sai com código 1 se, na própria rodada, o modo ``lazy`` não
+chegar à primeira resposta antes do ``eager`` (vale em qualquer máquina).
+Tempos absolutos só valem na máquina onde foram medidos, por isso o
+baseline não é versionado: ``--update-baseline`` grava os números da
+máquina local em ``startup_baseline.json`` (ignorado pelo git) e, se o
+arquivo existir, ``--check`` também compara com ele (ex.: rode
+``--update-baseline`` antes de uma mudança e ``--check`` depois).
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_startup --repeat 5
+    uv run python -m benchmarks.bench_startup --update-baseline
+    uv run python -m benchmarks.bench_startup --check
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RED, RESET, YELLOW
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+IMPORT_MODULES = ["utils.components", "utils.store_registry", "utils.query_service"]
+QUESTION = "Qual a pizza mais cara?"
+
+
+def responder(messages) -> str:
+    if "SQL query:" in str(messages[-1].content):
+        return "SELECT name, tamanho, preco FROM pizza ORDER BY preco DESC LIMIT 1"
+    return "A pizza mais cara do cardápio."
+
+
+# ----------------------------------------------------------------------
+# Processos filhos (sem imports pesados no topo deste módulo)
+# ----------------------------------------------------------------------
+def child(mode: str, think_s: float) -> None:
+    """Simula a partida da interface e uma primeira pergunta; imprime os instantes em JSON."""
+    if mode == "record":
+        from utils.components import create_app_components
+        from utils.fake_llm import FakeStreamingChatModel
+        from utils.llm_backend import create_llm
+
+        llm = create_llm(mode="record", inner=FakeStreamingChatModel(responder=responder))
+        with create_app_components(llm=llm).get("registry").lease() as service:
+            service.ask(QUESTION)
+        return
+
+    if mode == "eager":
+        from utils.query_service import PizzaQueryService  # noqa: F401  (import do topo, como antes)
+        from utils.store_registry import StoreRegistry
+
+        registry = StoreRegistry.from_env()
+        registry.get()
+    else:
+        from utils.components import create_app_components
+
+        components = create_app_components()
+        components.prewarm()
+    ready = time.time()
+    time.sleep(think_s)  # o usuário digitando a pergunta
+    asked = time.time()
+    if mode == "eager":
+        registry.get().ask(QUESTION)
+    else:
+        with components.get("registry").lease() as service:
+            service.ask(QUESTION)
+    print(json.dumps({"ready": ready, "asked": asked, "answered": time.time()}))
+
+
+def run_child(mode: str, env: dict, think_s: float) -> dict:
+    start = time.time()
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, "--think-ms", str(think_s * 1000)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    times = json.loads(out.strip().splitlines()[-1])
+    return {
+        "ready_ms": (times["ready"] - start) * 1000,
+        "first_answer_ms": (times["answered"] - times["asked"]) * 1000,
+    }
+
+
+# ----------------------------------------------------------------------
+# Medições
+# ----------------------------------------------------------------------
+def import_ms(module: str) -> float:
+    """Tempo cumulativo de import do módulo (``-X importtime``), num processo novo."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    match = re.search(rf"\|\s*(\d+)\s*\|\s*{re.escape(module)}\s*$", err, re.M)
+    return int(match.group(1)) / 1000 if match else float("nan")
+
+
+def cli_help_ms() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "querying_my_sql_database.py", "--help"], cwd=ROOT, capture_output=True, check=True
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(args: argparse.Namespace, env: dict) -> dict:
+    def median(fn, *fn_args) -> float:
+        return statistics.median(fn(*fn_args) for _ in range(args.repeat))
+
+    results = {f"import_ms[{m}]": median(import_ms, m) for m in IMPORT_MODULES}
+    results["cli_help_ms"] = median(cli_help_ms)
+    for mode in ("eager", "lazy"):
+        runs = [run_child(mode, env, args.think_ms / 1000) for _ in range(args.repeat)]
+        for metric in ("ready_ms", "first_answer_ms"):
+            results[f"{mode}.{metric}"] = statistics.median(r[metric] for r in runs)
+    return results
+
+
+def first_answer_ms(results: dict, mode: str) -> float:
+    return results[f"{mode}.ready_ms"] + results[f"{mode}.first_answer_ms"]
+
+
+def check_lazy(results: dict) -> bool:
+    """Na mesma rodada, partida + primeira resposta com ``lazy`` tem de ser menor que com ``eager``."""
+    lazy, eager = first_answer_ms(results, "lazy"), first_answer_ms(results, "eager")
+    if lazy >= eager:
+        print(f"{RED}REGRESSÃO lazy: {lazy:.1f}ms até a primeira resposta, eager {eager:.1f}ms{RESET}")
+        return False
+    return True
+
+
+def check(results: dict, baseline: dict, tolerance: float, slack_ms: float) -> bool:
+    """Regressão: pior que o baseline local em mais de ``tolerance`` (relativa) e ``slack_ms`` (absoluta)."""
+    ok = True
+    for name, value in results.items():
+        if name.startswith("eager.") or name not in baseline:
+            continue  # o modo eager é só referência
+        limit = max(baseline[name] * (1 + tolerance), baseline[name] + slack_ms)
+        if value > limit:
+            ok = False
+            print(f"{RED}REGRESSÃO {name}: {value:.1f}ms > {limit:.1f}ms (baseline {baseline[name]:.1f}ms){RESET}")
+    return ok
+
+
+def main(args: argparse.Namespace) -> None:
+    if not os.path.exists(os.path.join(ROOT, args.db)):
+        raise SystemExit(f"{RED}Banco '{args.db}' não encontrado: rode create_database.py{RESET}")
+    store_dir = tempfile.mkdtemp(prefix="pizzabot_startup_")
+    env = dict(
+        os.environ,
+        PIZZABOT_LLM_STORE=os.path.join(store_dir, "llm_store.db"),
+        PIZZABOT_STORES_DIR=store_dir,
+        PIZZABOT_LLM_MODE="record",
+    )
+    env.pop("OPENAI_API_KEY", None)  # sem embeddings remotos no cache de respostas
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", "record"], cwd=ROOT, env=env, check=True
+    )
+    env["PIZZABOT_LLM_MODE"] = "replay"
+
+    print(f"{GREEN}Medindo partida ({args.repeat}x por métrica, mediana; pensar={args.think_ms:.0f}ms)...{RESET}")
+    results = measure(args, env)
+    for name, value in results.items():
+        print(f"{CYAN}{name:<40}{RESET} {value:9.1f} ms")
+    saved = first_answer_ms(results, "eager") - first_answer_ms(results, "lazy")
+    print(f"{YELLOW}Partida + primeira resposta: {saved:.0f}ms a menos com lazy + prewarm{RESET}")
+
+    if args.update_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump({k: round(v, 1) for k, v in results.items()}, f, indent=2)
+        print(f"{GREEN}Baseline gravado em {BASELINE}{RESET}")
+    if args.check:
+        ok = check_lazy(results)
+        if os.path.exists(BASELINE):
+            with open(BASELINE) as f:
+                ok = check(results, json.load(f), args.tolerance, args.slack_ms) and ok
+        else:
+            print(f"{YELLOW}Sem baseline local: só o lazy x eager foi conferido (gere com --update-baseline){RESET}")
+        if not ok:
+            raise SystemExit(1)
+        print(f"{GREEN}Sem regressões.{RESET}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas.db")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--think-ms", type=float, default=2000, help="tempo do usuário digitando a pergunta")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="falha (código 1) se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="regressão relativa tolerada")
+    parser.add_argument("--slack-ms", type=float, default=75.0, help="regressão absoluta tolerada (ms)")
+    parser.add_argument("--child", choices=["record", "eager", "lazy"], help=argparse.SUPPRESS)
+    cli_args = parser.parse_args()
+    if cli_args.child:
+        child(cli_args.child, cli_args.think_ms / 1000)
+    else:
+        main(cli_args)
@@ -0,0 +1,157 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bench_store_registry.py
+==============================
+Simula muitas lojas (por padrão 1.000, cada uma com uma cópia do
+"pizzas.db") com tráfego enviesado (Zipf: poucas lojas recebem a maior
+parte das perguntas) passando pelo ``StoreRegistry``, para alguns
+limites de lojas abertas (``max_open``). Reporta, para cada limite:
+memória residente, descritores de arquivo e threads abertos, latência
+(geral, de loja já aberta e de loja fria), aberturas/despejos e a taxa
+de acerto dos caches de respostas por loja.
+
+O LLM é falso e sem latência: o que se mede é o custo do registro, das
+conexões e dos caches.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.bench_store_registry --stores 1000 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from utils.answer_cache import AnswerCache
+from utils.constants_ansi import CYAN, GREEN, RESET, YELLOW
+from utils.fake_llm import FakeStreamingChatModel
+from utils.query_service import PizzaQueryService
+from utils.store_registry import TENANT_ENGINE_KWARGS, StoreRegistry
+from utils.tracing import Tracer, percentile
+
+QUESTIONS = [
+    "Qual a pizza mais cara?",
+    "Qual a pizza mais barata?",
+    "Quantas pizzas têm calabresa?",
+    "Quais pizzas têm bacon?",
+    "Qual o preço médio das pizzas grandes?",
+    "Me recomenda uma pizza doce?",
+]
+
+
+def responder(messages) -> str:
+    if "SQL query:" in str(messages[-1].content):
+        return "SELECT name, tamanho, preco FROM pizza ORDER BY preco DESC LIMIT 3"
+    return "Aqui estão as opções do cardápio."
+
+
+def create_stores(source_db: str, stores_dir: str, n_stores: int) -> None:
+    """Uma cópia consistente do DB por loja (``backup`` do SQLite, depois cópia do arquivo)."""
+    template = os.path.join(stores_dir, "_template.sqlite")
+    with sqlite3.connect(source_db) as src, sqlite3.connect(template) as dst:
+        src.backup(dst)
+    for i in range(n_stores):
+        shutil.copyfile(template, os.path.join(stores_dir, f"loja{i:04d}.db"))
+
+
+def process_stats() -> dict:
+    """Memória residente (MiB), descritores de arquivo e threads do processo."""
+    rss = None
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            rss = next((int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS:")), None)
+    if rss is None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else -1
+    return {"rss_mib": rss, "fds": fds, "threads": threading.active_count()}
+
+
+async def run(args: argparse.Namespace, stores_dir: str, max_open: int) -> None:
+    llm = FakeStreamingChatModel(responder=responder)
+    tracer = Tracer()
+    caches: list[AnswerCache] = []
+
+    def factory(tenant: str, db_path: str) -> PizzaQueryService:
+        cache = AnswerCache(db_path=db_path)
+        caches.append(cache)
+        return PizzaQueryService.from_config(
+            db_path=db_path,
+            llm=llm,
+            tracer=tracer,
+            answer_cache=cache,
+            engine_kwargs=TENANT_ENGINE_KWARGS,
+            sql_pool=registry.sql_pool,
+        )
+
+    registry = StoreRegistry(stores_dir=stores_dir, max_open=max_open, service_factory=factory)
+    rng = random.Random(args.seed)
+    tenants = [f"loja{i:04d}" for i in range(args.stores)]
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.stores)]
+    traffic = rng.choices(tenants, weights=weights, k=args.requests)
+
+    warm, cold = [], []
+    peak = process_stats()
+    start = time.perf_counter()
+    for i, tenant in enumerate(traffic):
+        opens = registry.opens
+        t0 = time.perf_counter()
+        with registry.lease(tenant) as service:
+            await service.aask(rng.choice(QUESTIONS))
+        (cold if registry.opens > opens else warm).append(time.perf_counter() - t0)
+        if i % 250 == 0:
+            now = process_stats()
+            peak = {k: max(peak[k], now[k]) for k in peak}
+    elapsed = time.perf_counter() - start
+    now = process_stats()
+    peak = {k: max(peak[k], now[k]) for k in peak}
+
+    hits = sum(c.metrics.hits for c in caches)
+    lookups = hits + sum(c.metrics.misses for c in caches)
+    stats = registry.stats()
+    everything = sorted(warm + cold)
+    print(
+        f"{CYAN}max_open={max_open:<4}{RESET} {len(traffic) / elapsed:7.1f} req/s  "
+        f"p50={percentile(everything, 50) * 1000:6.1f}ms p99={percentile(everything, 99) * 1000:7.1f}ms  "
+        f"quente p50={percentile(sorted(warm), 50) * 1000:5.1f}ms  "
+        f"fria p50={percentile(sorted(cold), 50) * 1000:6.1f}ms ({len(cold)}x)"
+    )
+    print(
+        f"    pico: RSS={peak['rss_mib']:.0f} MiB, fds={peak['fds']}, threads={peak['threads']}  "
+        f"aberturas={stats['opens']} despejos={stats['evictions']}  "
+        f"cache de respostas: {hits}/{lookups} acertos"
+    )
+    registry.close()
+
+
+def main(args: argparse.Namespace) -> None:
+    stores_dir = tempfile.mkdtemp(prefix="pizzabot_stores_")
+    try:
+        create_stores(args.db, stores_dir, args.stores)
+        print(
+            f"{GREEN}{args.stores} lojas em {stores_dir}; {args.requests} perguntas, "
+            f"Zipf s={args.zipf}{RESET}"
+        )
+        print(f"{YELLOW}Processo antes: {process_stats()}{RESET}")
+        for max_open in args.max_open:
+            asyncio.run(run(args, stores_dir, max_open))
+    finally:
+        shutil.rmtree(stores_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="pizzas.db", help="cardápio copiado para cada loja")
+    parser.add_argument("--stores", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da distribuição de tráfego")
+    parser.add_argument("--max-open", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script load_test_query_service.py
+=================================
+Teste de carga do ``PizzaQueryService`` com um LLM falso (latência fixa
+por chamada). Simula 1, 10 e 100 sessões concorrentes, cada uma fazendo
+algumas perguntas em sequência, e reporta a vazão (perguntas/s) e as
+latências p50/p95. O cache de respostas e o roteador SQL ficam
+desligados para que todas as perguntas passem pelas duas chamadas ao LLM.
+
+Run:
+    uv run create_database.py
+    uv run python -m benchmarks.load_test_query_service
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from utils.constants_ansi import CYAN, GREEN, RESET
+from utils.db_engine import get_sql_database
+from utils.fake_llm import FakeStreamingChatModel
+from utils.query_service import PizzaQueryService
+
+
+def fake_responder(messages) -> str:
+    """Gera SQL para o prompt de SQL e um texto fixo para o prompt de resposta."""
+    if "SQL" in messages[0].content:
+        return "SELECT name, tamanho, preco FROM pizza ORDER BY preco DESC LIMIT 3"
+    return "As pizzas mais caras do cardápio são Camarão, Carne Seca e Strogonoff."
+
+
+async def run_session(service: PizzaQueryService, session_id: int, questions: int, latencies: list[float]) -> None:
+    for i in range(questions):
+        start = time.perf_counter()
+        await service.aask(f"Sessão {session_id}, pergunta {i}: quais as pizzas mais caras?")
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(service: PizzaQueryService, sessions: int, questions: int) -> None:
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(service, s, questions, latencies) for s in range(sessions)))
+    elapsed = time.perf_counter() - start
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(
+        f"{CYAN}{sessions:>4} sessões:{RESET} {len(latencies) / elapsed:8.1f} perguntas/s  "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms  p95={p95 * 1000:7.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    llm = FakeStreamingChatModel(responder=fake_responder, first_token_latency_s=args.llm_latency)
+    db = get_sql_database("pizzas.db", pool_size=args.sql_workers)
+    service = PizzaQueryService(
+        db, llm, max_llm_concurrency=args.llm_concurrency, sql_workers=args.sql_workers
+    )
+    print(
+        f"{GREEN}LLM falso: {args.llm_latency * 1000:.0f}ms/chamada, "
+        f"concorrência máxima do LLM={args.llm_concurrency}, workers SQL={args.sql_workers}{RESET}"
+    )
+    for sessions in args.sessions:
+        await run_level(service, sessions, args.questions)
+    service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--questions", type=int, default=5, help="perguntas por sessão")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="latência do LLM falso (s)")
+    parser.add_argument("--llm-concurrency", type=int, default=32)
+    parser.add_argument("--sql-workers", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
@@ -7,45 +7,36 @@ Script create_database.py
 Este script cria um banco de dados SQLite chamado 
 "pizzas.db" e insere dados de pizzas nele.
 
+A carga é incremental: só as pizzas novas, alteradas ou removidas
+são gravadas. Opcionalmente, o cardápio pode vir de um arquivo
+(.csv, .jsonl, .json ou .parquet) com as colunas
+id, name, tamanho, preco e ingredientes.
+
 Run:
     uv run create_database.py
+    uv run create_database.py --menu cardapio.csv
 """
-import sqlite3
+import argparse
 import logging
 from utils.constants_ansi import *
+from utils.db_engine import connect_writer
+from utils.logging_setup import setup_logging
+from utils.menu_facts import create_menu_facts
+from utils.menu_loader import load_menu
+from utils.menu_schema import create_menu_schema
 
-def setup_logging() -> None:
-    """Configures the logging system"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("LOGs_pizzabot.log"),
-            logging.StreamHandler(),
-        ],
-    )
-
-
-setup_logging()
+setup_logging("LOGs_pizzabot.log")
 logger = logging.getLogger(__name__)
 
-# Conectar ao DB (irá criar se não existir):
-conn = sqlite3.connect("pizzas.db", timeout=30) # chinook  ou  pizzas
-cursor = conn.cursor()
+# Conectar ao DB (irá criar se não existir), em modo WAL para não bloquear os leitores:
+conn = connect_writer("pizzas.db") # chinook  ou  pizzas
 
-# Configurando PRAGMAs para melhorar o gerenciamento de bloqueio
-cursor.execute("PRAGMA journal_mode=WAL")
-cursor.execute("PRAGMA busy_timeout=5000")
+# Tabela "pizza", índices em preco/tamanho e busca full-text (FTS5) nos ingredientes:
+create_menu_schema(conn)
 
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS pizza (
-    id INTEGER PRIMARY KEY,
-    name TEXT NOT NULL,
-    tamanho TEXT NOT NULL,
-    preco REAL NOT NULL,
-    ingredientes TEXT NOT NULL
-)
-''')
+# Fatos materializados (preços por tamanho, índice de ingredientes, variantes por nome),
+# atualizados incrementalmente pela carga abaixo:
+create_menu_facts(conn)
 
 # Inserir dados de pizzas:
 pizzas = [
@@ -94,12 +85,17 @@ pizzas = [
     (43, 'Gorgonzola', 'Média', 38.50, 'Gorgonzola, tomate, orégano e azeitonas')
 ]
 
-# Remover todos os registros da tabela "pizza" existentes para evitar duplicação:
-cursor.execute("DELETE FROM pizza")
-# Inserir os dados das pizzas no DB:
-cursor.executemany("INSERT INTO pizza VALUES (?, ?, ?, ?, ?)", pizzas) # ? -> São espaços reservados para os valores que serão inseridos
-# Salvar alterações e fechar conexão:
-conn.commit()
+parser = argparse.ArgumentParser(description="Cria/atualiza o banco de dados de pizzas.")
+parser.add_argument("--menu", help="arquivo do cardápio (padrão: lista embutida acima)")
+args = parser.parse_args()
+
+# Sincronizar a tabela "pizza" com o cardápio (upsert + remoção das pizzas que saíram),
+# numa única transação:
+report = load_menu(conn, args.menu or pizzas)
 conn.close()
 
-logger.info(f"{GREEN}Banco de dados de pizzas criado com sucesso!{RESET}")
+logger.info(
+    "%sBanco de dados de pizzas criado com sucesso! "
+    "(%d inseridas, %d atualizadas, %d inalteradas, %d removidas)%s",
+    GREEN, report.inserted, report.updated, report.unchanged, report.deleted, RESET,
+)
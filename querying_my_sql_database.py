@@ -8,71 +8,104 @@ Este script mostra como realizar uma consulta ao meu
 DB SQLite chamado "pizzas.db". Ou seja, cada consulta
 pode ser realizada usando linguagem natural.
 
+Modo em lote (--batch): roda um golden set em JSON Lines pelo mesmo
+pipeline, com paralelismo configurável, e reporta vazão, latência por
+pergunta e acurácia dos resultados contra o "pizzas.db". Com --offline
+o LLM é falso (devolve o SQL esperado) e nada é enviado à Groq.
+
+Com --store a consulta vai para o cardápio de outra loja
+(``stores/<loja>.db``, ver ``utils.store_registry``).
+
+LangChain, Groq e o banco só são carregados sob demanda
+(``utils.components``); no modo interativo, o serviço e o agente são
+pré-aquecidos em segundo plano enquanto a primeira pergunta é digitada.
+
+O modo interativo lembra a conversa (``utils.conversation_memory``):
+perguntas como "e a média?" usam o resultado anterior; 'limpar' apaga a
+conversa.
+
 Run:
     uv run querying_my_sql_database.py
+    uv run querying_my_sql_database.py --store centro
+    uv run querying_my_sql_database.py --batch benchmarks/golden_questions.jsonl --concurrency 8 --offline
 """
-from langchain_community.utilities.sql_database import SQLDatabase
-from langchain_community.agent_toolkits import create_sql_agent
-from langchain_groq import ChatGroq
+import argparse
+import asyncio
 import logging
+from utils.components import ComponentFactory, create_app_components
 from utils.constants_ansi import *
-import os
+from utils.conversation_memory import ConversationMemory
+from utils.logging_setup import setup_logging
 from dotenv import load_dotenv, find_dotenv
 
 _ = load_dotenv(find_dotenv())  # read local .env file
-groq_api_key = os.getenv("GROQ_API_KEY")
-
-
-def setup_logging() -> None:
-    """Configures the logging system"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("LOGs_pizzabot.log"),
-            logging.StreamHandler(),
-        ],
-    )
 
 
-setup_logging()
+setup_logging("LOGs_pizzabot.log")
 logger = logging.getLogger(__name__)
 
-# Adicionando parâmetros de conexão para evitar bloqueios
-connect_args = {"timeout": 30, "check_same_thread": False}
-db = SQLDatabase.from_uri("sqlite:///pizzas.db", connect_args=connect_args)
-
-llm = ChatGroq(model_name="llama3-70b-8192", api_key=groq_api_key, temperature=0)
-
-agent_executor = create_sql_agent(
-    llm=llm, db=db, agent_type="openai-tools", verbose=False
-)
 
-
-def querying_interactively():
+def querying_interactively(components: ComponentFactory, tenant: str = None):
     """Função que cria uma interface interativa para consultas sobre pizzas"""
-    logger.info(f"{BLUE}🤖 Bem-vindo ao Sistema de Consulta de Pizzas 🤖!{RESET}")
-    logger.info(f"{YELLOW}Digite 'sair' para encerrar o programa.{RESET}")
+    logger.info("%s🤖 Bem-vindo ao Sistema de Consulta de Pizzas 🤖!%s", BLUE, RESET)
+    logger.info("%sDigite 'sair' para encerrar o programa ou 'limpar' para esquecer a conversa.%s", YELLOW, RESET)
+    memory = ConversationMemory.from_env(instruction="Responda em português a seguinte pergunta: ")
 
     while True:
         question = input(f"\n{GREEN}Digite sua pergunta sobre pizzas 🍕: {RESET}")
 
         # Verificar se o usuário quer sair:
         if question.lower() in ["sair", "exit", "quit"]:
-            logger.info(
-                f"{BLUE}👋 Obrigado por usar o Sistema de Consulta de Pizzas!{RESET}"
-            )
+            logger.info("%s👋 Obrigado por usar o Sistema de Consulta de Pizzas!%s", BLUE, RESET)
             break
+        if question.lower() == "limpar":
+            memory.clear()
+            continue
 
         # Processar pergunta com o PizzaBot:
         try:
-            result = agent_executor.invoke(
-                f"Responda em português a seguinte pergunta: {question}"
-            )
-            print(f"\n{CYAN}Resposta:{RESET} {result['output']}")
+            with components.get("registry").lease(tenant) as query_service:
+                answer = query_service.ask_agent(question, memory=memory)
+            print(f"\n{CYAN}Resposta:{RESET} {answer}")
         except Exception as e:
-            logger.error(f"{RED}Erro ao processar sua pergunta: {str(e)}{RESET}")
+            logger.error("%sErro ao processar sua pergunta: %s%s", RED, e, RESET)
+
+
+def run_batch_mode(args: argparse.Namespace, db_path: str) -> float:
+    """Avalia o golden set em lote e retorna a acurácia."""
+    from utils.batch_eval import load_golden, make_golden_llm, run_batch, write_report
+    from utils.query_service import PizzaQueryService
+
+    golden = load_golden(args.batch)
+    llm = make_golden_llm(golden) if args.offline else None
+    query_service = PizzaQueryService.from_config(
+        db_path=db_path, llm=llm, answer_cache=None, sql_workers=args.concurrency
+    )
+    logger.info(
+        "%sAvaliando %d perguntas de '%s' (concorrência %d)...%s", BLUE, len(golden), args.batch, args.concurrency, RESET
+    )
+    report = asyncio.run(run_batch(query_service, golden, max_concurrency=args.concurrency))
+    query_service.close()
+    print(report.render())
+    if args.report:
+        write_report(report, args.report)
+        logger.info("%sRelatório gravado em '%s'%s", GREEN, args.report, RESET)
+    return report.accuracy
 
 
 if __name__ == "__main__":
-    querying_interactively()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", help="golden set em JSON Lines (id, question, expected_sql)")
+    parser.add_argument("--concurrency", type=int, default=8, help="perguntas em paralelo no modo em lote")
+    parser.add_argument("--offline", action="store_true", help="usa um LLM falso que devolve o SQL esperado")
+    parser.add_argument("--report", help="grava o relatório do modo em lote em JSON")
+    parser.add_argument("--min-accuracy", type=float, default=0.0, help="sai com código 1 abaixo desta acurácia")
+    parser.add_argument("--store", help="loja (tenant) a consultar; padrão: pizzas.db")
+    args = parser.parse_args()
+
+    components = create_app_components(tenant=args.store, agent=True)
+    if args.batch:
+        db_path = components.get("registry").db_path(args.store)
+        raise SystemExit(0 if run_batch_mode(args, db_path) >= args.min_accuracy else 1)
+    components.prewarm()
+    querying_interactively(components, args.store)
@@ -6,19 +6,32 @@ Script streamlit_interface.py
 Este script implementa uma interface Streamlit para consultar
 o banco de dados SQLite "pizzas.db" usando linguagem natural.
 
+A loja (tenant) vem da URL (``?store=centro``) ou da seleção na barra
+lateral, e fica na sessão; cada loja tem o seu próprio cardápio e caches
+(ver ``utils.store_registry``).
+
+O registro de lojas é criado sob demanda e a loja padrão é pré-aquecida
+em segundo plano (``utils.components``): a página aparece antes de o
+LangChain e o banco estarem prontos.
+
+Cada sessão tem a sua memória de conversa (``utils.conversation_memory``),
+para perguntas de acompanhamento ("e a média?"). O histórico guardado é
+limitado (``MAX_STORED_MESSAGES``) e só as últimas ``HISTORY_WINDOW``
+mensagens são redesenhadas a cada interação; as anteriores ficam em
+páginas, sob demanda.
+
 Run:
     streamlit run streamlit_interface.py
 """
 import logging
 import streamlit as st
-from langchain_community.utilities.sql_database import SQLDatabase
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain_groq import ChatGroq
-import os
 from dotenv import load_dotenv, find_dotenv
 from utils.constants_ansi import RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, RESET
+from utils.conversation_memory import ConversationMemory
+from utils.logging_setup import setup_logging
+from utils.query_result import QueryResult
+from utils.components import create_app_components
+from utils.store_registry import StoreRegistry, UnknownStoreError
 
 # Configurar a página Streamlit:
 st.set_page_config(
@@ -27,126 +40,119 @@ st.set_page_config(
     layout="centered",
 )
 
-# Configurar logging:
-def setup_logging() -> None:
-    """Configura o sistema de logging"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("LOGs_pizzabot_streamlit.log"),
-            logging.StreamHandler(),
-        ],
-    )
-
-setup_logging()
+# Configurar logging (assíncrono, JSON no arquivo; ver utils.logging_setup):
+setup_logging("LOGs_pizzabot_streamlit.log")
 logger = logging.getLogger(__name__)
 
 # Carregar a chave API da Groq
 _ = load_dotenv(find_dotenv())  # lê o arquivo .env local
-groq_api_key = os.getenv("GROQ_API_KEY")
 
-# Inicializar o banco de dados e o LLM:
+# Inicializar o registro de lojas (um serviço de consultas por loja, LLM compartilhado):
 @st.cache_resource
 def initialize_components():
-    """Inicializa o banco de dados e o modelo LLM."""
+    """Inicializa o registro de lojas compartilhado entre as sessões."""
     try:
-        logger.info(f"{CYAN}Conectando ao banco de dados SQLite 'pizzas.db'...{RESET}")
-        db = SQLDatabase.from_uri("sqlite:///pizzas.db")
-        logger.info(f"{GREEN}Banco de dados conectado com sucesso!{RESET}")
+        logger.info("%sInicializando o registro de lojas...%s", CYAN, RESET)
+        components = create_app_components()
+        components.prewarm()  # não bloqueia: a loja padrão abre em segundo plano
+        registry = components.get("registry")
+        logger.info("%sRegistro de lojas inicializado com sucesso!%s", GREEN, RESET)
+        return registry
     except Exception as e:
-        logger.error(f"{RED}Erro ao conectar ao banco de dados: {e}{RESET}")
-        st.error(f"{RED}Erro ao conectar ao banco de dados: {e}{RESET}")
-        return None, None
-    
-    try:
-        logger.info(f"{CYAN}Inicializando o modelo LLM 'llama3-70b-8192' da Groq...{RESET}")
-        llm = ChatGroq(model_name="llama3-70b-8192", api_key=groq_api_key, temperature=0)
-        logger.info(f"{GREEN}Modelo LLM inicializado com sucesso!{RESET}")
-        
-        # Definir o template do prompt para SQL:
-        system_prompt = """Você é um assistente de SQL especializado em traduzir perguntas em linguagem natural para consultas SQL.
-        
-        Você tem acesso a um banco de dados com a seguinte tabela:
-        
-        # Tabela 'pizza'
-        - id (INTEGER, PRIMARY KEY): Identificador único da pizza
-        - name (TEXT): Nome da pizza
-        - tamanho (TEXT): Tamanho da pizza (Pequena, Média, Grande)
-        - preco (REAL): Preço da pizza
-        - ingredientes (TEXT): Lista de ingredientes da pizza
-        
-        O usuário fará perguntas em linguagem natural sobre o cardápio de pizzas.
-        Primeiro, traduza a pergunta para SQL. Em seguida, explique os resultados em português brasileiro, de forma amigável e útil.
-        IMPORTANTE: Sempre responda em português brasileiro (pt-br).
-        
-        Exemplos:
-        - "Quais pizzas contêm calabresa?" -> SELECT * FROM pizza WHERE ingredientes LIKE '%calabresa%'
-        - "Qual a pizza mais cara?" -> SELECT * FROM pizza ORDER BY preco DESC LIMIT 1
-        
-        Aqui está o esquema do banco de dados:
-        {schema}
-        
-        Lembre-se: sua resposta deve ser sempre em português brasileiro (pt-br) e ser útil para o cliente da pizzaria.
-        """
-        
-        # Criar a corrente de processamento:
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("human", "{input}\n\nSQL query:")
-        ])
+        logger.error("%sErro ao inicializar o registro de lojas: %s%s", RED, e, RESET)
+        st.error(f"Erro ao inicializar o registro de lojas: {e}")
+        return None
 
-        def run_query(query):
-            try:
-                logger.info(f"Executando consulta SQL: {query}")
-                return db.run(query)
-            except Exception as e:
-                logger.error(f"Erro ao executar consulta SQL: {e}")
-                return f"Erro na consulta SQL: {e}"
-
-        # Criar a cadeia de processamento:
-        sql_chain = (
-            RunnablePassthrough.assign(schema=lambda _: db.get_table_info())
-            | prompt
-            | llm
-            | StrOutputParser()
-        )
-        
-        def process_query_with_sql(query):
-            try:
-                # Primeiro, gerar a consulta SQL:
-                sql_query_response = sql_chain.invoke({"input": query})
-                
-                # Extrair a consulta SQL do texto de resposta:
-                sql_lines = [line for line in sql_query_response.split('\n') if line.strip().upper().startswith("SELECT")]
-                
-                if not sql_lines:
-                    return "Não consegui gerar uma consulta SQL válida para essa pergunta."
-                
-                sql_query = sql_lines[0].strip()
-                
-                # Executar a consulta SQL:
-                sql_result = run_query(sql_query)
-                
-                # Gerar resposta final com os resultados:
-                final_prompt = ChatPromptTemplate.from_messages([
-                    ("system", "Você é um atendente de pizzaria que responde perguntas sobre o cardápio. SEMPRE responda em português brasileiro (pt-br), de forma amigável e prestativa."),
-                    ("human", f"Pergunta original: {query}\n\nConsulta SQL executada: {sql_query}\n\nResultados da consulta: {sql_result}\n\nForneca uma resposta útil e amigável em português brasileiro (pt-br):")
-                ])
-                
-                final_response = final_prompt | llm | StrOutputParser()
-                return final_response.invoke({})
-                
-            except Exception as e:
-                logger.error(f"{RED}Erro ao processar consulta: {e}{RESET}")
-                return f"Desculpe, não consegui processar sua pergunta. Erro: {str(e)}"
-        
-        return db, process_query_with_sql
-        
+
+WELCOME_MESSAGE = {"role": "assistant", "content": "Olá! Sou o assistente da Pizzaria Delícia. Como posso ajudar?"}
+
+# Mensagens redesenhadas a cada interação (as anteriores ficam em páginas):
+HISTORY_WINDOW = 20
+# Mensagens guardadas na sessão (as mais antigas são descartadas):
+MAX_STORED_MESSAGES = 200
+
+
+def reset_conversation() -> None:
+    st.session_state.messages = [dict(WELCOME_MESSAGE)]
+    st.session_state.memory = ConversationMemory.from_env()
+
+
+def append_message(message: dict) -> None:
+    """Guarda a mensagem; fora da janela, descarta tabelas e as mensagens mais antigas."""
+    messages = st.session_state.messages
+    messages.append(message)
+    if len(messages) > HISTORY_WINDOW:
+        messages[-HISTORY_WINDOW - 1].pop("table", None)
+    if len(messages) > MAX_STORED_MESSAGES:
+        del messages[: len(messages) - MAX_STORED_MESSAGES]
+
+
+def render_message(message: dict) -> None:
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        if message.get("table"):
+            render_table(message["table"])
+
+
+def render_history(messages: list[dict]) -> None:
+    """Desenha as últimas ``HISTORY_WINDOW`` mensagens; as anteriores, uma página por vez."""
+    hidden = len(messages) - HISTORY_WINDOW
+    if hidden > 0 and st.toggle(f"Mostrar mensagens anteriores ({hidden})"):
+        pages = (hidden + HISTORY_WINDOW - 1) // HISTORY_WINDOW
+        page = st.number_input("Página", min_value=1, max_value=pages, value=pages) if pages > 1 else 1
+        start = (page - 1) * HISTORY_WINDOW
+        for message in messages[start: min(start + HISTORY_WINDOW, hidden)]:
+            render_message(message)
+        st.divider()
+    for message in messages[max(hidden, 0):]:
+        render_message(message)
+
+
+def select_tenant(registry: StoreRegistry) -> str:
+    """Loja da sessão: ``?store=`` na URL ou a escolhida na barra lateral."""
+    tenants = registry.tenants()
+    requested = st.query_params.get("store", st.session_state.get("tenant", registry.default_tenant))
+    if requested not in tenants:
+        requested = registry.default_tenant
+    tenant = st.sidebar.selectbox("Loja", tenants, index=tenants.index(requested))
+    if tenant != st.session_state.get("tenant"):
+        # Outra loja: outro cardápio, outra conversa.
+        st.session_state.tenant = tenant
+        reset_conversation()
+        st.query_params["store"] = tenant
+    return tenant
+
+def render_table(table) -> None:
+    """Tabela do resultado do SQL (Arrow), com a contagem de linhas."""
+    st.dataframe(table["data"], hide_index=True, use_container_width=True)
+    st.caption(table["caption"])
+
+
+def result_table(result: QueryResult):
+    """Tabela colunar para o histórico, só para resultados com mais de uma linha."""
+    if len(result) <= 1:
+        return None
+    total = f"mais de {len(result)}" if result.truncated else str(len(result))
+    caption = f"{total} linhas" if result.complete else f"Mostrando as primeiras {result.kept_rows} de {total} linhas"
+    return {"data": result.to_arrow(), "caption": caption}
+
+
+def render_metrics(registry: StoreRegistry, tenant: str) -> None:
+    """Métricas do cache de respostas e do roteador SQL da loja (se ela abrir)."""
+    try:
+        with registry.lease(tenant) as query_service:
+            if query_service.answer_cache is not None:
+                metrics = query_service.answer_cache.metrics
+                st.caption(
+                    f"Cache: {metrics.hits}/{metrics.lookups} acertos "
+                    f"({metrics.hit_rate:.0%}), {metrics.latency_saved_s:.1f}s economizados"
+                )
+            if query_service.sql_router is not None:
+                coverage = query_service.sql_router.coverage()
+                st.caption(f"Roteador SQL: {coverage['matched']}/{coverage['total']} perguntas sem LLM")
     except Exception as e:
-        logger.error(f"{RED}Erro ao inicializar o modelo LLM: {e}{RESET}")
-        st.error(f"{RED}Erro ao inicializar o modelo LLM: {e}{RESET}")
-        return db, None
+        logger.warning("Métricas da loja %s indisponíveis: %s", tenant, e)
+
 
 # Interface Streamlit
 def main():
@@ -171,27 +177,24 @@ def main():
     """)
     
     # Inicializar componentes
-    db, query_processor = initialize_components()
+    registry = initialize_components()
     
-    if not db or not query_processor:
+    if not registry:
         st.error("Não foi possível inicializar todos os componentes necessários.")
         return
+    tenant = select_tenant(registry)
     
     # Inicializar o histórico de mensagens se não existir
-    if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Olá! Sou o assistente da Pizzaria Delícia. Como posso ajudar?"}
-        ]
+    if "messages" not in st.session_state or "memory" not in st.session_state:
+        reset_conversation()
     
-    # Exibir mensagens anteriores
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Exibir mensagens anteriores (só a janela mais recente)
+    render_history(st.session_state.messages)
     
     # Input do usuário
     if prompt := st.chat_input("Faça uma pergunta sobre nossas pizzas..."):
         # Adicionar pergunta do usuário ao histórico
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        append_message({"role": "user", "content": prompt})
         
         # Exibir mensagem do usuário
         with st.chat_message("user"):
@@ -202,25 +205,34 @@ def main():
             message_placeholder = st.empty()
             
             try:
-                with st.spinner("Processando sua pergunta..."):
-                    response = query_processor(prompt)
-                
+                # Exibir a resposta token a token, conforme o LLM a produz
+                results = []
+                with registry.lease(tenant) as query_service:
+                    response = message_placeholder.write_stream(
+                        query_service.stream(prompt, on_result=results.append, memory=st.session_state.memory)
+                    )
+
+                # Tabela desenhada direto do resultado colunar (sem passar pelo LLM):
+                table = result_table(results[0]) if results else None
+                if table:
+                    render_table(table)
+
                 # Adicionar resposta ao histórico
-                st.session_state.messages.append({"role": "assistant", "content": response})
-                
-                # Exibir resposta
-                message_placeholder.markdown(response)
+                append_message({"role": "assistant", "content": response, "table": table})
+            except UnknownStoreError as e:
+                error_msg = f"Loja indisponível: {e}"
+                append_message({"role": "assistant", "content": error_msg})
+                message_placeholder.markdown(error_msg)
+                logger.error("Loja indisponível: %s", e)
             except Exception as e:
                 error_msg = f"Erro ao processar sua pergunta: {str(e)}"
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                append_message({"role": "assistant", "content": error_msg})
                 message_placeholder.markdown(error_msg)
-                logger.error(error_msg)
+                logger.error("Erro ao processar sua pergunta: %s", e)
 
     # Adicionar um botão para limpar o histórico
     if st.sidebar.button("Limpar conversa"):
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Olá! Sou o assistente da Pizzaria Delícia. Como posso ajudar?"}
-        ]
+        reset_conversation()
         st.rerun()
     
     # Informações sobre o banco de dados
@@ -236,5 +248,7 @@ def main():
         - Quais são os ingredientes da pizza Calabresa?
         """)
 
+        render_metrics(registry, tenant)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
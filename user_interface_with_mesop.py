@@ -8,80 +8,84 @@ Este script mostra como realizar uma consulta ao meu
 DB SQLite chamado "pizzas.db". Ou seja, cada consulta
 pode ser realizada usando linguagem natural.
 
+A loja (tenant) vem da URL (``?store=centro``); sem o parâmetro, a
+consulta vai para o "pizzas.db" (ver ``utils.store_registry``). O
+registro e o agente da loja padrão são construídos em segundo plano
+(``utils.components``) enquanto o servidor sobe.
+
+Cada sessão tem a sua memória de conversa (``utils.conversation_memory``),
+guardada no servidor e encontrada pelo id da sessão no ``me.state``: o
+último resultado SQL fica disponível para os acompanhamentos ("e a
+média?") e o custo de cada pergunta não cresce com o tamanho da sessão.
+Só se a memória da sessão tiver sido descartada (``MAX_SESSIONS``) ela é
+refeita a partir das últimas ``HISTORY_WINDOW`` mensagens do chat.
+
 Run:
     uv run user_interface_with_mesop.py
 """
 import logging
+import threading
+import uuid
+from collections import OrderedDict
 import mesop as me
 import mesop.labs as mel
 from mesop import stateclass
-from langchain_community.utilities.sql_database import SQLDatabase
-from langchain_community.agent_toolkits import create_sql_agent
 from utils.constants_ansi import *
-from langchain_groq import ChatGroq
-import os
+from utils.conversation_memory import ConversationMemory
+from utils.logging_setup import setup_logging
+from utils.components import create_app_components
+from utils.store_registry import UnknownStoreError
 from dotenv import load_dotenv, find_dotenv
 
 _ = load_dotenv(find_dotenv())  # read local .env file
-groq_api_key = os.getenv("GROQ_API_KEY")
 
+# Mensagens do histórico do chat usadas para refazer uma memória descartada:
+HISTORY_WINDOW = 20
+# Memórias de conversa guardadas (as das sessões menos recentes são descartadas):
+MAX_SESSIONS = 1000
 
-def setup_logging() -> None:
-    """Configures the logging system"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("LOGs_pizzabot.log"),
-            logging.StreamHandler(),
-        ],
-    )
+MEMORY_INSTRUCTION = "Responda sempre em português a questão: "
 
 
-setup_logging()
+setup_logging("LOGs_pizzabot.log")
 logger = logging.getLogger(__name__)
 
 logger.info("Iniciando aplicação Pizzaria Delícia de Vitória-ES")
 
-try:
-    logger.info(f"{GREEN}Conectando ao banco de dados SQLite 'pizzas.db' . . .{RESET}")
-    # Adicionando parâmetros de conexão para evitar bloqueios
-    connect_args = {"timeout": 30, "check_same_thread": False}
-    db = SQLDatabase.from_uri("sqlite:///pizzas.db", connect_args=connect_args)
-    logger.info(f"{GREEN}Banco de dados conectado com sucesso!{RESET}")
-except Exception as e:
-    logger.error(f"{RED}Erro ao conectar ao banco de dados: {e}{RESET}")
-    raise
-
-try:
-    logger.info(
-        f"{GREEN}Inicializando o modelo LLM 'llama3-70b-8192' da Groq . . .{RESET}"
-    )
-    llm = ChatGroq(model_name="llama3-70b-8192", api_key=groq_api_key, temperature=0)
-    logger.info(f"{GREEN}Modelo LLM inicializado com sucesso!{RESET}")
-except Exception as e:
-    logger.error(
-        f"{RED}Erro ao inicializar o modelo LLM 'llama3-70b-8192' da Groq: {e}{RESET}"
-    )
-    raise
-
-try:
-    logger.info(f"{GREEN}Criando o agente SQL . . .{RESET}")
-    agent_executor = create_sql_agent(
-        llm=llm, db=db, agent_type="openai-tools", verbose=False
-    )
-    logger.info(f"{GREEN}Agente SQL criado com sucesso!{RESET}")
-except Exception as e:
-    logger.error(f"{RED}Erro ao criar o agente SQL: {e}{RESET}")
-    raise
+logger.info("%sInicializando o registro de lojas (em segundo plano) . . .%s", GREEN, RESET)
+components = create_app_components(agent=True)
+components.prewarm()  # a loja padrão e o agente sobem enquanto o servidor inicia
 
 
 @stateclass  # Gerencia o estado da aplicação
 class State:
-    pass
+    session_id: str = ""
+
+
+# Id da sessão -> (loja, memória da conversa), em ordem de uso:
+_memories: "OrderedDict[str, tuple[str, ConversationMemory]]" = OrderedDict()
+_memories_lock = threading.Lock()
 
 
-logger.info(f"{GREEN}Configurando interface web com Mesop . . .{RESET}")
+def session_memory(tenant: str, history: list[mel.ChatMessage]) -> ConversationMemory:
+    """Memória da conversa da sessão atual (outra loja: outra conversa)."""
+    state = me.state(State)
+    if not state.session_id:
+        state.session_id = uuid.uuid4().hex
+    with _memories_lock:
+        stored = _memories.get(state.session_id)
+        if stored is None or stored[0] != tenant:
+            memory = ConversationMemory.from_messages(
+                history[-HISTORY_WINDOW:] if stored is None else [], instruction=MEMORY_INSTRUCTION
+            )
+            stored = _memories[state.session_id] = (tenant, memory)
+        _memories.move_to_end(state.session_id)
+        while len(_memories) > MAX_SESSIONS:
+            _memories.popitem(last=False)
+        return stored[1]
+
+
+logger.info("%sConfigurando interface web com Mesop . . .%s", GREEN, RESET)
 
 
 @me.page(
@@ -93,9 +97,7 @@ logger.info(f"{GREEN}Configurando interface web com Mesop . . .{RESET}")
 )
 def page():
     """Interface da página da Pizzaria Delícia de Vitória-ES"""
-    logger.info(
-        f"{GREEN}Página Mesop inicializada e pronta para receber interações . . .{RESET}"
-    )
+    logger.info("%sPágina Mesop inicializada e pronta para receber interações . . .%s", GREEN, RESET)
     mel.chat(transform, title="Pizzaria Delícia de Vitória-ES", bot_user="Pizzabot")
 
 
@@ -103,12 +105,16 @@ def transform(input: str, history: list[mel.ChatMessage]):
     """
     Processa a entrada do usuário e obtém a resposta do Pizzabot.
     Garante que as respostas sejam sempre em português.
+    Os tokens são enviados à interface assim que o LLM os produz.
     """
-    result = agent_executor.invoke("Responda sempre em português a questão: " + input)
-
-    content = result["output"]
-    if content:
-        yield content
+    tenant = me.query_params.get("store")
+    memory = session_memory(tenant or "", history)
+    try:
+        with components.get("registry").lease(tenant) as query_service:
+            yield from query_service.stream_agent(input, memory=memory)
+    except UnknownStoreError as e:
+        logger.error("%s%s%s", RED, e, RESET)
+        yield f"Loja indisponível: {e}"
 
 
-logger.info(f"{GREEN}Aplicação Pizzabot inicializada e pronta para uso.{RESET}")
+logger.info("%sAplicação Pizzabot inicializada e pronta para uso.%s", GREEN, RESET)
@@ -0,0 +1,338 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo answer_cache.py
+======================
+Cache de respostas colocado na frente do pipeline de consulta
+(``process_query_with_sql``). Possui três níveis de busca:
+
+1. exato: a pergunta literal;
+2. normalizado: minúsculas, sem acentos, sem pontuação;
+3. semântico (opcional): similaridade de embeddings, usando
+   ``lancedb`` quando instalado.
+
+As entradas expiram por TTL, são removidas por LRU e todo o cache
+é invalidado automaticamente quando o arquivo ``pizzas.db`` muda
+(por exemplo, quando ``create_database.py`` recria os dados).
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unicodedata
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[str], list[float]]
+
+
+def normalize_question(question: str) -> str:
+    """Normaliza a pergunta: minúsculas, sem acentos, sem pontuação e espaços extras."""
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def db_fingerprint(db_path: str) -> tuple:
+    """Retorna uma assinatura barata (mtime/tamanho) do DB e do seu arquivo WAL."""
+    signature = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+@dataclass
+class CacheMetrics:
+    """Métricas acumuladas do cache de respostas."""
+
+    exact_hits: int = 0
+    normalized_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    latency_saved_s: float = 0.0
+
+    @property
+    def hits(self) -> int:
+        return self.exact_hits + self.normalized_hits + self.semantic_hits
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "exact_hits": self.exact_hits,
+            "normalized_hits": self.normalized_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hit_rate, 4),
+            "latency_saved_s": round(self.latency_saved_s, 4),
+        }
+
+
+@dataclass
+class _Entry:
+    question: str
+    answer: str
+    created_at: float
+    compute_time_s: float
+    vector: Optional[list[float]] = None
+    # Dados guardados com a resposta (ex.: SQL e ``QueryResult``, para a memória de conversa):
+    payload: Any = None
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class _VectorIndex:
+    """Índice vetorial do nível semântico (LanceDB, ou busca linear como fallback)."""
+
+    def __init__(self, uri: Optional[str] = None):
+        self._vectors: dict[str, list[float]] = {}
+        self._table = None
+        # Diretório temporário próprio: removido no ``close`` (ou quando o índice é coletado).
+        self._cleanup: Optional[weakref.finalize] = None
+        try:
+            import lancedb
+        except ImportError:
+            self._lancedb = None
+            return
+        if uri is None:
+            uri = tempfile.mkdtemp(prefix="pizzabot_answer_cache_")
+            self._cleanup = weakref.finalize(self, shutil.rmtree, uri, ignore_errors=True)
+        self._uri = uri
+        self._lancedb = lancedb.connect(uri)
+
+    def add(self, key: str, vector: list[float]) -> None:
+        self._vectors[key] = vector
+        if self._lancedb is None:
+            return
+        row = [{"key": key, "vector": vector}]
+        if self._table is None:
+            self._table = self._lancedb.create_table("answers", data=row, mode="overwrite")
+        else:
+            self._table.add(row)
+
+    def remove(self, key: str) -> None:
+        if self._vectors.pop(key, None) is not None and self._table is not None:
+            self._table.delete(f"key = '{key}'")
+
+    def clear(self) -> None:
+        self._vectors.clear()
+        if self._table is not None:
+            self._lancedb.drop_table("answers")
+            self._table = None
+
+    def close(self) -> None:
+        """Libera o índice e remove o diretório temporário do LanceDB (se foi criado aqui)."""
+        self._vectors.clear()
+        self._table = None
+        self._lancedb = None
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def nearest(self, vector: list[float]) -> tuple[Optional[str], float]:
+        """Retorna (chave, similaridade cosseno) do vizinho mais próximo."""
+        if not self._vectors:
+            return None, 0.0
+        if self._table is not None:
+            hits = self._table.search(vector).metric("cosine").limit(1).to_list()
+            if not hits:
+                return None, 0.0
+            return hits[0]["key"], 1.0 - float(hits[0]["_distance"])
+        key, vec = max(self._vectors.items(), key=lambda kv: _cosine(vector, kv[1]))
+        return key, _cosine(vector, vec)
+
+
+class AnswerCache:
+    """Cache de respostas com níveis exato, normalizado e semântico."""
+
+    def __init__(
+        self,
+        db_path: str = "pizzas.db",
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+        embed_fn: Optional[EmbedFn] = None,
+        similarity_threshold: float = 0.92,
+        lancedb_uri: Optional[str] = None,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.metrics = CacheMetrics()
+
+        self._lock = threading.Lock()
+        # Chave normalizada -> entrada (ordem = recência para o LRU):
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Pergunta literal -> chave normalizada:
+        self._exact: dict[str, str] = {}
+        self._index = _VectorIndex(lancedb_uri) if embed_fn else None
+        self._fingerprint = db_fingerprint(db_path)
+
+    @staticmethod
+    def _key(normalized: str) -> str:
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def _check_db_changed(self) -> None:
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint != self._fingerprint:
+            logger.info("Banco de dados alterado, invalidando o cache de respostas.")
+            self._fingerprint = fingerprint
+            self._clear()
+            self.metrics.invalidations += 1
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._exact.clear()
+        if self._index is not None:
+            self._index.clear()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._exact.pop(entry.question, None)
+        if self._index is not None:
+            self._index.remove(key)
+
+    def _live_entry(self, key: Optional[str]) -> Optional[_Entry]:
+        if key is None or key not in self._entries:
+            return None
+        entry = self._entries[key]
+        if time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._drop(key)
+            self.metrics.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _hit(self, entry: _Entry, tier: str) -> tuple[str, Any]:
+        setattr(self.metrics, f"{tier}_hits", getattr(self.metrics, f"{tier}_hits") + 1)
+        self.metrics.latency_saved_s += entry.compute_time_s
+        logger.info("Cache de respostas: acerto no nível '%s'", tier)
+        return entry.answer, entry.payload
+
+    def get(self, question: str) -> Optional[str]:
+        """Busca uma resposta em cache para a pergunta, ou ``None``."""
+        hit = self.lookup(question)
+        return hit[0] if hit is not None else None
+
+    def lookup(self, question: str) -> Optional[tuple[str, Any]]:
+        """Busca ``(resposta, payload)`` em cache para a pergunta, ou ``None``."""
+        with self._lock:
+            self._check_db_changed()
+
+            entry = self._live_entry(self._exact.get(question))
+            if entry is not None:
+                return self._hit(entry, "exact")
+
+            entry = self._live_entry(self._key(normalize_question(question)))
+            if entry is not None:
+                return self._hit(entry, "normalized")
+
+        if self._index is not None:
+            vector = self.embed_fn(question)
+            with self._lock:
+                key, similarity = self._index.nearest(vector)
+                if similarity >= self.similarity_threshold:
+                    entry = self._live_entry(key)
+                    if entry is not None:
+                        return self._hit(entry, "semantic")
+
+        with self._lock:
+            self.metrics.misses += 1
+        return None
+
+    def put(self, question: str, answer: str, compute_time_s: float = 0.0, payload: Any = None) -> None:
+        """Armazena a resposta de uma pergunta (e o ``payload`` devolvido por ``lookup``)."""
+        normalized = normalize_question(question)
+        key = self._key(normalized)
+        vector = self.embed_fn(question) if self._index is not None else None
+        with self._lock:
+            self._check_db_changed()
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(question, answer, time.monotonic(), compute_time_s, vector, payload)
+            self._exact[question] = key
+            if vector is not None:
+                self._index.add(key, vector)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.metrics.evictions += 1
+
+    def invalidate(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._clear()
+            self.metrics.invalidations += 1
+
+    def close(self) -> None:
+        """Esvazia o cache e libera o índice vetorial (e o seu diretório temporário)."""
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def wrap(self, fn: Callable[[str], str]) -> Callable[[str], str]:
+        """Envolve uma função ``pergunta -> resposta`` com este cache."""
+
+        def cached(question: str) -> str:
+            answer = self.get(question)
+            if answer is not None:
+                return answer
+            start = time.perf_counter()
+            answer = fn(question)
+            self.put(question, answer, time.perf_counter() - start)
+            return answer
+
+        cached.__wrapped__ = fn
+        return cached
+
+
+def make_openai_embedder(model: str = "text-embedding-3-small") -> Optional[EmbedFn]:
+    """Cria uma função de embedding com a API da OpenAI, se houver ``OPENAI_API_KEY``."""
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    from openai import OpenAI
+
+    client = OpenAI()
+
+    def embed(text: str) -> list[float]:
+        return client.embeddings.create(model=model, input=normalize_question(text)).data[0].embedding
+
+    return embed
@@ -0,0 +1,118 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo answer_templates.py
+==========================
+Respostas em português renderizadas localmente a partir do resultado do
+SQL, para os formatos mais comuns do cardápio:
+
+- nenhum resultado;
+- um único valor (contagem, preço médio/mínimo/máximo, texto); colunas
+  com alias (``COUNT(*) AS total``, ``AVG(preco) AS media``) são
+  reconhecidas pelo SQL que as gerou;
+- linhas de pizzas (nome, tamanho, preço e/ou ingredientes).
+
+Quando o formato não é reconhecido, ``render_answer`` devolve ``None`` e
+o serviço pede ao LLM que redija a resposta.
+"""
+import re
+from typing import Any, Optional
+
+MAX_LISTED_ROWS = 15
+
+EMPTY_ANSWER = "Não encontrei nenhuma pizza no cardápio que atenda a essa pergunta. 🍕"
+
+# Rótulos para um agregado único de preços, pela função:
+_AGGREGATE_LABELS = {
+    "avg": "O preço médio é",
+    "min": "O menor preço é",
+    "max": "O maior preço é",
+    "sum": "A soma dos preços é",
+}
+
+# Coluna que já é a chamada do agregado ("COUNT(*)", "avg(preco)"):
+_AGGREGATE_CALL = re.compile(r"^\s*(count|avg|min|max|sum)\s*\((.*)\)\s*$", re.IGNORECASE)
+
+_PIZZA_COLUMNS = {"id", "name", "tamanho", "preco", "ingredientes"}
+
+
+def format_price(value: Any) -> str:
+    """Formata um preço no padrão brasileiro (``R$ 1.234,50``)."""
+    text = f"{float(value):,.2f}"
+    return "R$ " + text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _aggregate(column: str, sql: Optional[str]) -> Optional[tuple[str, str]]:
+    """(função, argumento) do agregado que gerou a coluna, pelo nome ou pelo alias no SQL."""
+    match = _AGGREGATE_CALL.match(column)
+    if match is None and sql:
+        alias = rf"\s+(?:as\s+)?[\"'`\[]?{re.escape(column)}\b"
+        match = re.search(rf"\b(count|avg|min|max|sum)\s*\(([^()]*)\){alias}", sql, re.IGNORECASE)
+    return (match.group(1).lower(), match.group(2).lower()) if match else None
+
+
+def _render_scalar(column: str, value: Any, sql: Optional[str] = None) -> Optional[str]:
+    key = column.lower()
+    if value is None:
+        return EMPTY_ANSWER
+    numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+    aggregate = _aggregate(column, sql) if numeric else None
+    if aggregate is not None:
+        function, argument = aggregate
+        if function == "count":
+            # Só uma contagem inteira é um número de pizzas:
+            if not isinstance(value, int):
+                return None
+            if value == 0:
+                return EMPTY_ANSWER
+            noun = "pizza" if value == 1 else "pizzas"
+            return f"Encontrei {value} {noun} no cardápio para essa pergunta. 🍕"
+        if "preco" in argument:
+            return f"{_AGGREGATE_LABELS[function]} {format_price(value)}."
+        return None  # outro agregado ("SUM(quantidade)"): o LLM redige
+    if numeric and key == "preco":
+        return f"O preço é {format_price(value)}."
+    if isinstance(value, str) and key == "ingredientes":
+        return f"Ingredientes: {value}."
+    if isinstance(value, str) and key == "name":
+        return f"A pizza é a {value}. 🍕"
+    return None
+
+
+def _render_pizza_row(row: dict) -> str:
+    parts = [row.get("name") or "Pizza"]
+    if row.get("tamanho"):
+        parts[0] += f" ({row['tamanho']})"
+    if row.get("preco") is not None:
+        parts.append(format_price(row["preco"]))
+    if row.get("ingredientes"):
+        parts.append(f"ingredientes: {row['ingredientes']}")
+    return "- " + " — ".join(parts)
+
+
+def render_answer(
+    rows: Optional[list[dict]], total: Optional[int] = None, sql: Optional[str] = None
+) -> Optional[str]:
+    """
+    Resposta pronta para o resultado do SQL, ou ``None`` se o formato não é
+    coberto. ``total`` é o número de linhas do resultado quando ``rows``
+    traz só as primeiras (``QueryResult``); ``sql`` identifica o agregado
+    por trás de uma coluna com alias.
+    """
+    if rows is None:
+        return None
+    if not rows:
+        return EMPTY_ANSWER
+    total = len(rows) if total is None else total
+    columns = list(rows[0])
+    if len(rows) == 1 and len(columns) == 1:
+        return _render_scalar(columns[0], rows[0][columns[0]], sql)
+    if "name" not in columns or not set(columns) <= _PIZZA_COLUMNS:
+        return None
+
+    header = "Encontrei esta pizza no cardápio:" if total == 1 else f"Encontrei {total} opções no cardápio:"
+    lines = [header] + [_render_pizza_row(row) for row in rows[:MAX_LISTED_ROWS]]
+    if total > MAX_LISTED_ROWS:
+        lines.append(f"... e mais {total - MAX_LISTED_ROWS} opções.")
+    return "\n".join(lines)
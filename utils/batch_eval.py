@@ -0,0 +1,183 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo batch_eval.py
+====================
+Avaliação em lote do pipeline de consulta a partir de um "golden set"
+em JSON Lines, uma pergunta por linha:
+
+    {"id": "mais_cara", "question": "Qual é a pizza mais cara?",
+     "expected_sql": "SELECT * FROM pizza ORDER BY preco DESC LIMIT 1"}
+
+As perguntas passam pelo mesmo pipeline das interfaces
+(``PizzaQueryService.aask_with_details``) via ``Runnable.abatch`` com
+``max_concurrency`` configurável; o SQL roda no pool de threads do
+serviço. Para cada pergunta, o resultado do SQL executado é comparado
+com o resultado do ``expected_sql`` no ``pizzas.db`` (como multiconjunto
+de linhas, ignorando a ordem e os nomes de colunas agregadas).
+
+Com ``make_golden_llm`` a avaliação roda totalmente offline: o LLM falso
+devolve o ``expected_sql`` de cada pergunta, de modo que os erros
+apontados vêm do roteador, dos templates ou da execução.
+"""
+import json
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from langchain_core.runnables import RunnableLambda
+
+from utils.fake_llm import FakeStreamingChatModel
+from utils.tracing import percentile
+
+
+@dataclass
+class GoldenQuestion:
+    """Pergunta do golden set com o SQL que produz o resultado esperado."""
+
+    id: str
+    question: str
+    expected_sql: str
+
+
+@dataclass
+class QuestionResult:
+    """Resultado de uma pergunta da avaliação."""
+
+    id: str
+    question: str
+    answer: str = ""
+    sql: Optional[str] = None
+    rows: int = 0
+    latency_s: float = 0.0
+    correct: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchReport:
+    """Vazão, latências e acurácia de uma execução em lote."""
+
+    results: list[QuestionResult] = field(default_factory=list)
+    seconds: float = 0.0
+    max_concurrency: int = 1
+
+    @property
+    def throughput(self) -> float:
+        return len(self.results) / self.seconds if self.seconds else 0.0
+
+    @property
+    def accuracy(self) -> float:
+        return sum(r.correct for r in self.results) / len(self.results) if self.results else 0.0
+
+    def latency_ms(self, q: float) -> float:
+        return percentile(sorted(r.latency_s for r in self.results), q) * 1000
+
+    def as_dict(self) -> dict:
+        return {
+            "questions": len(self.results),
+            "max_concurrency": self.max_concurrency,
+            "seconds": round(self.seconds, 3),
+            "throughput_qps": round(self.throughput, 2),
+            "latency_ms": {f"p{q}": round(self.latency_ms(q), 1) for q in (50, 95, 99)},
+            "accuracy": round(self.accuracy, 4),
+            "failures": [r.id for r in self.results if not r.correct],
+        }
+
+    def render(self) -> str:
+        """Tabela por pergunta seguida do resumo."""
+        lines = [f"{'id':<24} {'ok':<4} {'linhas':>6} {'ms':>9}  sql"]
+        for r in self.results:
+            status = "ok" if r.correct else "ERRO"
+            lines.append(f"{r.id:<24} {status:<4} {r.rows:>6} {r.latency_s * 1000:>9.1f}  {r.error or r.sql}")
+        summary = self.as_dict()
+        lines.append(
+            f"{summary['questions']} perguntas, concorrência {self.max_concurrency}: "
+            f"{summary['throughput_qps']} perguntas/s, p50={summary['latency_ms']['p50']}ms "
+            f"p95={summary['latency_ms']['p95']}ms p99={summary['latency_ms']['p99']}ms, "
+            f"acurácia={self.accuracy:.1%}"
+        )
+        return "\n".join(lines)
+
+
+def load_golden(path: Union[str, Path]) -> list[GoldenQuestion]:
+    """Lê o golden set (JSON Lines)."""
+    with open(path, encoding="utf-8") as f:
+        return [GoldenQuestion(**json.loads(line)) for line in f if line.strip()]
+
+
+def _normalize(value: Any) -> Any:
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def same_result_set(actual: list[dict], expected: list[dict]) -> bool:
+    """
+    Compara dois resultados como multiconjuntos de linhas. Se o resultado
+    obtido tiver todas as colunas esperadas (e possivelmente outras), ele é
+    projetado nelas; senão, as colunas são comparadas por posição.
+    """
+    if not expected or not actual:
+        return not expected and not actual
+    expected_columns = list(expected[0])
+    if set(expected_columns) <= set(actual[0]):
+        project = [tuple(_normalize(row[c]) for c in expected_columns) for row in actual]
+    elif len(actual[0]) == len(expected_columns):
+        project = [tuple(_normalize(v) for v in row.values()) for row in actual]
+    else:
+        return False
+    return Counter(project) == Counter(tuple(_normalize(v) for v in row.values()) for row in expected)
+
+
+def make_golden_llm(golden: list[GoldenQuestion], **latency: float) -> FakeStreamingChatModel:
+    """LLM falso que responde o ``expected_sql`` de cada pergunta do golden set."""
+    sql_by_question = {g.question: g.expected_sql for g in golden}
+
+    def responder(messages: list) -> str:
+        human = str(messages[-1].content)
+        if human.startswith("Pergunta original:"):
+            return "Aqui está o que encontrei no cardápio da pizzaria."
+        question = human.split("\n\nSQL query:")[0]
+        return sql_by_question.get(question, "Não sei responder.")
+
+    return FakeStreamingChatModel(responder=responder, **latency)
+
+
+async def run_batch(service: Any, golden: list[GoldenQuestion], max_concurrency: int = 8) -> BatchReport:
+    """Roda o golden set pelo pipeline do ``service`` e compara os resultados."""
+    expected_rows: dict[str, Optional[list[dict]]] = {}
+    for g in golden:
+        _, expected = await service._run_sql(g.expected_sql)
+        expected_rows[g.id] = expected.rows() if expected is not None else None
+
+    async def evaluate(g: GoldenQuestion) -> QuestionResult:
+        result = QuestionResult(g.id, g.question)
+        start = time.perf_counter()
+        try:
+            result.answer, prepared = await service.aask_with_details(g.question)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            prepared = None
+        result.latency_s = time.perf_counter() - start
+        if prepared is not None:
+            result.sql = prepared.sql
+            result.rows = len(prepared.data or [])
+            if prepared.data is None and prepared.sql is not None:
+                result.error = prepared.result
+            expected = expected_rows[g.id]
+            result.correct = expected is not None and prepared.data is not None and same_result_set(
+                prepared.rows, expected
+            )
+        return result
+
+    start = time.perf_counter()
+    results = await RunnableLambda(evaluate).abatch(golden, config={"max_concurrency": max_concurrency})
+    return BatchReport(results, time.perf_counter() - start, max_concurrency)
+
+
+def write_report(report: BatchReport, path: Union[str, Path]) -> None:
+    """Grava o resumo e os resultados por pergunta em JSON."""
+    payload = report.as_dict() | {"results": [asdict(r) for r in report.results]}
+    Path(path).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
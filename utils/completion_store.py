@@ -0,0 +1,131 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo completion_store.py
+==========================
+Armazém em disco de completions do LLM, endereçado por conteúdo: a
+chave é o SHA-256 da requisição canônica (modelo, mensagens,
+ferramentas e parâmetros) e o valor é o JSON da resposta comprimido com
+zlib. Tudo fica num único arquivo SQLite (WAL), compartilhável entre
+processos e reinícios.
+
+O tamanho é limitado por ``max_bytes``: ao passar do limite, as entradas
+usadas há mais tempo são removidas até o armazém voltar a 90% do limite.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional
+
+from utils.db_engine import BUSY_TIMEOUT_MS
+
+logger = logging.getLogger(__name__)
+
+STORE_DDL = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def content_key(request: Any) -> str:
+    """SHA-256 do JSON canônico da requisição."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionStore:
+    """Armazém persistente chave -> completion (JSON), limitado em bytes com despejo LRU."""
+
+    def __init__(self, path: str = "llm_store.db", max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(STORE_DDL)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used)")
+        self._lock = threading.Lock()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE completions SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: dict) -> None:
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT INTO completions (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "last_used = excluded.last_used",
+                (key, blob, len(blob), now, now),
+            )
+            self._total_bytes += len(blob) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+    def _evict(self, target_bytes: int) -> None:
+        """Remove as entradas menos usadas recentemente até ``target_bytes`` (chamar com o lock)."""
+        removed = 0
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM completions ORDER BY last_used"
+            ).fetchall():
+                if self._total_bytes <= target_bytes:
+                    break
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._total_bytes -= size
+                removed += 1
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self.evictions += removed
+        logger.info("Armazém de completions: %d entradas removidas (%d bytes)", removed, self._total_bytes)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,147 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo components.py
+====================
+Fábrica compartilhada dos componentes pesados das interfaces (registro
+de lojas, serviço de consultas, agente SQL), construídos sob demanda:
+
+- importar este módulo é barato: LangChain, Groq e SQLAlchemy só são
+  importados quando um componente é pedido pela primeira vez;
+- cada componente é construído uma única vez (thread-safe), com o tempo
+  de construção registrado em ``timings()``;
+- ``prewarm`` constrói (e aquece, com os ganchos ``warmup``) os
+  componentes numa thread de fundo, enquanto a interface sobe ou o
+  usuário digita a primeira pergunta; quem pedir um componente ainda em
+  construção espera por ele em vez de construí-lo de novo.
+
+Uso nas interfaces::
+
+    components = create_app_components()
+    components.prewarm()                      # não bloqueia
+    registry = components.get("registry")     # espera o prewarm, se preciso
+    with registry.lease(tenant) as service:   # serviço sempre via registro (LRU)
+        ...
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyComponent:
+    """Componente construído na primeira chamada a ``get`` (uma única vez)."""
+
+    def __init__(self, name: str, builder: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.builder = builder
+        self.warmup = warmup
+        self.build_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self._value: Any = None
+        self._built = False
+        self._warmed = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._built
+
+    def get(self) -> Any:
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                start = time.perf_counter()
+                self._value = self.builder()
+                self.build_seconds = time.perf_counter() - start
+                self._built = True
+                logger.info("Componente '%s' construído em %.0fms", self.name, self.build_seconds * 1000)
+        return self._value
+
+    def warm(self) -> Any:
+        """Constrói e roda o gancho de aquecimento (uma vez)."""
+        value = self.get()
+        if self.warmup is not None and not self._warmed:
+            with self._lock:
+                if not self._warmed:
+                    start = time.perf_counter()
+                    self.warmup(value)
+                    self.warmup_seconds = time.perf_counter() - start
+                    self._warmed = True
+        return value
+
+
+class ComponentFactory:
+    """Registro de ``LazyComponent`` por nome, com pré-aquecimento em segundo plano."""
+
+    def __init__(self):
+        self._components: dict[str, LazyComponent] = {}
+        self._prewarm_thread: Optional[threading.Thread] = None
+
+    def register(
+        self, name: str, builder: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None
+    ) -> LazyComponent:
+        component = self._components[name] = LazyComponent(name, builder, warmup)
+        return component
+
+    def get(self, name: str) -> Any:
+        return self._components[name].get()
+
+    def ready(self, name: str) -> bool:
+        return self._components[name].ready
+
+    def prewarm(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Constrói e aquece os componentes (todos, por padrão), na ordem de registro."""
+        selected = list(names) if names is not None else list(self._components)
+
+        def run() -> None:
+            for name in selected:
+                try:
+                    self._components[name].warm()
+                except Exception as e:
+                    # O erro reaparece (e é tratado) quando a interface pedir o componente.
+                    logger.error("Falha ao pré-aquecer o componente '%s': %s", name, e)
+
+        if not background:
+            run()
+            return None
+        if self._prewarm_thread is None or not self._prewarm_thread.is_alive():
+            self._prewarm_thread = threading.Thread(target=run, name="pizzabot-prewarm", daemon=True)
+            self._prewarm_thread.start()
+        return self._prewarm_thread
+
+    def timings(self) -> dict[str, dict[str, Optional[float]]]:
+        """Segundos de construção e de aquecimento de cada componente."""
+        return {
+            name: {"build_s": c.build_seconds, "warmup_s": c.warmup_seconds}
+            for name, c in self._components.items()
+        }
+
+
+def create_app_components(
+    tenant: Optional[str] = None, agent: bool = False, **registry_kwargs: Any
+) -> ComponentFactory:
+    """
+    Componentes das interfaces: ``registry`` (``StoreRegistry``). O
+    aquecimento abre a loja ``tenant`` (padrão: a loja padrão) e aquece o
+    serviço dela; com ``agent=True`` também constrói o agente SQL (usado
+    pelo Mesop e pela CLI). O serviço não é guardado aqui: as interfaces o
+    pedem ao registro a cada requisição, pois o LRU pode fechá-lo.
+    """
+    factory = ComponentFactory()
+
+    def build_registry() -> Any:
+        from utils.store_registry import StoreRegistry
+
+        return StoreRegistry.from_env(**registry_kwargs)
+
+    def warm_registry(registry: Any) -> None:
+        with registry.lease(tenant) as service:
+            service.warm_up(agent=agent)
+
+    factory.register("registry", build_registry, warmup=warm_registry)
+    return factory
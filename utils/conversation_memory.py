@@ -0,0 +1,242 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo conversation_memory.py
+=============================
+Memória de conversa de uma sessão, com custo constante por pergunta:
+
+- as últimas perguntas e respostas ficam literais enquanto cabem em
+  ``token_budget`` tokens; as mais antigas são compactadas num resumo de
+  uma linha por pergunta, limitado a ``summary_budget`` tokens (as
+  linhas mais antigas do resumo são descartadas);
+- guarda o último ``QueryResult`` (e o SQL que o gerou): perguntas de
+  acompanhamento sobre ele ("e a média?", "e quantas são?", "e a mais
+  barata delas?") são respondidas pelas estatísticas do resultado, sem
+  rodar o SQL de novo e sem chamar o LLM (``resolve``);
+- os demais acompanhamentos ("e quais delas têm bacon?") vão ao LLM com
+  o resumo, as últimas perguntas e o último SQL (``contextualize``).
+
+Acompanhamento é a pergunta que começa com "e", "só", "agora"... ou que
+cita o resultado anterior ("delas", "dessas"...). Perguntas
+independentes seguem o caminho normal (cache de respostas, roteador).
+
+Uma memória por sessão: não é compartilhada entre threads.
+Configuração: ``PIZZABOT_MEMORY_TOKENS`` e ``PIZZABOT_MEMORY_SUMMARY_TOKENS``.
+"""
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from utils.answer_cache import normalize_question
+from utils.answer_templates import format_price
+from utils.query_result import TOP_COLUMN, QueryResult
+from utils.tokens import count_tokens, truncate_to_tokens
+
+# Primeira palavra (normalizada) de uma pergunta de acompanhamento:
+_FOLLOW_UP_STARTS = {"e", "so", "somente", "apenas", "agora", "entao", "mas"}
+
+# Palavras que se referem ao resultado anterior:
+_REFERENCES = {
+    "dela", "dele", "delas", "deles", "dessa", "desse", "dessas", "desses", "destas", "destes",
+    "nelas", "neles", "essas", "esses", "estas", "estes", "mesma", "mesmas", "anterior", "acima",
+}
+
+# Agregados respondidos localmente, a partir do último resultado:
+_AGGREGATES = {
+    "mean": {"media", "medio"},
+    "max": {"maximo", "maxima", "cara", "caro", "caras", "caros", "maior"},
+    "min": {"minimo", "minima", "barata", "barato", "baratas", "baratos", "menor"},
+    "count": {"quantas", "quantos", "quantidade"},
+}
+_AGGREGATE_WORDS = set().union(*_AGGREGATES.values())
+
+# Palavras sem conteúdo próprio num acompanhamento ("e qual é o preço médio delas?"):
+_FILLER = {
+    "e", "a", "o", "as", "os", "um", "uma", "qual", "quais", "quanto", "sao", "fica", "ficou", "seria",
+    "de", "do", "da", "das", "dos", "no", "na", "preco", "precos", "valor", "mais", "me", "diga",
+    "entao", "agora", "pizza", "pizzas", "opcao", "opcoes", "tem", "ha", "resultado",
+} | _REFERENCES
+
+# Tokens de cada linha do resumo (pergunta -> início da resposta):
+SUMMARY_LINE_TOKENS = 40
+
+
+@dataclass
+class Turn:
+    """Uma pergunta e a sua resposta (cortada), com o SQL executado."""
+
+    question: str
+    answer: str
+    sql: Optional[str] = None
+    tokens: int = 0
+
+    def text(self) -> str:
+        lines = [f"Cliente: {self.question}"]
+        if self.sql:
+            lines.append(f"SQL: {self.sql}")
+        lines.append(f"Atendente: {self.answer}")
+        return "\n".join(lines)
+
+    def summary_line(self) -> str:
+        first_line = self.answer.strip().splitlines()[0] if self.answer.strip() else ""
+        return "- " + truncate_to_tokens(f"{self.question} -> {first_line}", SUMMARY_LINE_TOKENS, marker="...")
+
+
+class ConversationMemory:
+    """Janela de perguntas recentes + resumo das antigas + último resultado SQL."""
+
+    def __init__(
+        self,
+        token_budget: int = 800,
+        summary_budget: int = 300,
+        answer_tokens: int = 150,
+        instruction: str = "",
+    ):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.answer_tokens = answer_tokens
+        # Prefixo da pergunta atual na entrada do LLM (ex.: "Responda em português: "):
+        self.instruction = instruction
+        self.turns: "deque[Turn]" = deque()
+        self.turn_count = 0
+        self.compacted = 0
+        self.resolved = 0
+        self.last_result: Optional[QueryResult] = None
+        self.last_sql: Optional[str] = None
+        self._turn_tokens = 0
+        self._summary: "deque[tuple[str, int]]" = deque()
+        self._summary_tokens = 0
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "ConversationMemory":
+        kwargs.setdefault("token_budget", int(os.getenv("PIZZABOT_MEMORY_TOKENS", "800")))
+        kwargs.setdefault("summary_budget", int(os.getenv("PIZZABOT_MEMORY_SUMMARY_TOKENS", "300")))
+        return cls(**kwargs)
+
+    @classmethod
+    def from_messages(cls, messages: Iterable[Any], **kwargs: Any) -> "ConversationMemory":
+        """
+        Memória a partir de mensagens de chat (dicts ou objetos com ``role`` e
+        ``content``), pareando cada pergunta com a resposta seguinte.
+        """
+        memory = cls.from_env(**kwargs)
+        question = None
+        for message in messages:
+            role = message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", "")
+            if role == "user":
+                question = content
+            elif question is not None and content:
+                memory.add_turn(question, content)
+                question = None
+        return memory
+
+    def __len__(self) -> int:
+        return self.turn_count
+
+    @property
+    def tokens(self) -> int:
+        """Tokens do contexto (janela + resumo) que iriam para o LLM."""
+        return self._turn_tokens + self._summary_tokens
+
+    # ------------------------------------------------------------------
+    # Registro e compactação
+    # ------------------------------------------------------------------
+    def add_turn(
+        self, question: str, answer: str, sql: Optional[str] = None, result: Optional[QueryResult] = None
+    ) -> None:
+        """Registra a pergunta respondida; ``result`` passa a ser o alvo dos acompanhamentos."""
+        turn = Turn(question, truncate_to_tokens(answer, self.answer_tokens), sql)
+        turn.tokens = count_tokens(turn.text())
+        self.turns.append(turn)
+        self._turn_tokens += turn.tokens
+        self.turn_count += 1
+        self.last_result, self.last_sql = result, sql
+        self._compact()
+
+    def _compact(self) -> None:
+        # A última pergunta fica sempre literal, mesmo se sozinha passar do orçamento.
+        while len(self.turns) > 1 and self._turn_tokens > self.token_budget:
+            old = self.turns.popleft()
+            self._turn_tokens -= old.tokens
+            line = old.summary_line()
+            tokens = count_tokens(line)
+            self._summary.append((line, tokens))
+            self._summary_tokens += tokens
+            self.compacted += 1
+            while self._summary and self._summary_tokens > self.summary_budget:
+                _, dropped = self._summary.popleft()
+                self._summary_tokens -= dropped
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self._summary.clear()
+        self._turn_tokens = self._summary_tokens = 0
+        self.turn_count = self.compacted = self.resolved = 0
+        self.last_result = self.last_sql = None
+
+    # ------------------------------------------------------------------
+    # Acompanhamentos
+    # ------------------------------------------------------------------
+    def is_follow_up(self, question: str) -> bool:
+        """A pergunta depende da conversa anterior?"""
+        if not self.turns:
+            return False
+        words = normalize_question(question).split()
+        return bool(words) and (words[0] in _FOLLOW_UP_STARTS or not _REFERENCES.isdisjoint(words))
+
+    def resolve(self, question: str) -> Optional[str]:
+        """
+        Resposta local para um acompanhamento que só agrega o último resultado
+        (contagem, preço médio, mínimo ou máximo); ``None`` se não for o caso.
+        """
+        result = self.last_result
+        if result is None or result.truncated or not self.is_follow_up(question):
+            return None
+        words = normalize_question(question).split()
+        kinds = [kind for kind, vocabulary in _AGGREGATES.items() if not vocabulary.isdisjoint(words)]
+        if len(kinds) != 1 or any(w not in _FILLER and w not in _AGGREGATE_WORDS for w in words):
+            return None  # outro filtro ou agregado ("e quantas têm bacon?"): precisa de SQL novo
+
+        total = len(result)
+        if kinds[0] == "count":
+            answer = (
+                "Não havia nenhuma opção no resultado anterior." if total == 0
+                else "É 1 opção no resultado anterior." if total == 1
+                else f"São {total} opções no resultado anterior."
+            )
+        else:
+            stats = result.stats.get(TOP_COLUMN)
+            if stats is None or not stats.numeric or stats.non_null < 2:
+                return None
+            if kinds[0] == "mean":
+                answer = f"O preço médio das {stats.non_null} opções anteriores é {format_price(stats.mean)}."
+            elif kinds[0] == "min":
+                answer = f"O menor preço entre as {stats.non_null} opções anteriores é {format_price(stats.min)}."
+            else:
+                answer = f"O maior preço entre as {stats.non_null} opções anteriores é {format_price(stats.max)}"
+                top = dict(zip(result.columns, result.top()[0])) if result.top() else {}
+                if top.get("name"):
+                    answer += f": {top['name']}" + (f" ({top['tamanho']})" if top.get("tamanho") else "")
+                answer += "."
+        self.resolved += 1
+        return answer
+
+    def context_text(self) -> str:
+        """Resumo das perguntas antigas e as últimas perguntas, para o prompt."""
+        parts = []
+        if self._summary:
+            parts.append("Resumo da conversa anterior:\n" + "\n".join(line for line, _ in self._summary))
+        if self.turns:
+            parts.append("Últimas perguntas:\n" + "\n\n".join(turn.text() for turn in self.turns))
+        return "\n\n".join(parts)
+
+    def contextualize(self, question: str) -> str:
+        """Entrada do LLM: a pergunta precedida do contexto da conversa (se houver)."""
+        current = f"{self.instruction}{question}"
+        context = self.context_text()
+        if not context:
+            return current
+        return f"{context}\n\nPergunta atual (pode se referir às anteriores): {current}"
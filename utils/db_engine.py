@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo db_engine.py
+===================
+Fábrica única de conexões SQLite do projeto.
+
+- Leitura: engine SQLAlchemy com pool dimensionado, conexões URI
+  ``mode=ro`` e PRAGMAs de leitura (``query_only``, ``busy_timeout``)
+  aplicados em cada conexão. ``mmap_size``/``cache_size`` maiores não
+  mostraram ganho (``benchmarks/bench_sqlite_readers.py``: o cardápio cabe
+  no cache padrão do SQLite e o custo é do Python), então ficam os padrões.
+- Escrita: ``connect_writer`` para o ``create_database.py``, com WAL,
+  para que leitores não bloqueiem enquanto o cardápio é recarregado.
+"""
+import sqlite3
+from typing import Any
+
+from utils.menu_schema import MENU_FACT_TABLES
+
+# Espera por um escritor (recarga do cardápio) antes de falhar com "database is locked":
+BUSY_TIMEOUT_MS = 5000
+
+
+def readonly_uri(db_path: str) -> str:
+    """URI ``file:`` somente leitura do SQLite."""
+    return f"file:{db_path}?mode=ro"
+
+
+def configure_reader(conn: Any) -> None:
+    """Aplica os PRAGMAs de leitura numa conexão DB-API do SQLite."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def connect_reader(db_path: str = "pizzas.db") -> sqlite3.Connection:
+    """Conexão ``sqlite3`` somente leitura, já configurada."""
+    conn = sqlite3.connect(readonly_uri(db_path), uri=True, timeout=30, check_same_thread=False)
+    configure_reader(conn)
+    return conn
+
+
+def connect_writer(db_path: str = "pizzas.db") -> sqlite3.Connection:
+    """Conexão de escrita (WAL) usada para criar e recarregar o cardápio."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def create_readonly_engine(
+    db_path: str = "pizzas.db",
+    pool_size: int = 8,
+    max_overflow: int = 4,
+) -> Any:
+    """Engine SQLAlchemy somente leitura com pool dimensionado para leitores paralelos."""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import QueuePool
+
+    engine = create_engine(
+        f"sqlite:///{readonly_uri(db_path)}&uri=true",
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=False,
+        connect_args={"timeout": 30, "check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection: Any, _: Any) -> None:
+        configure_reader(dbapi_connection)
+
+    return engine
+
+
+def internal_tables(db_path: str = "pizzas.db") -> list[str]:
+    """
+    Tabelas virtuais (FTS5) e suas tabelas-sombra, e as tabelas de fatos do
+    cardápio (citadas no prompt como texto), que não devem ir para o LLM.
+    """
+    conn = connect_reader(db_path)
+    try:
+        names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        virtual = [
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+            )
+        ]
+    finally:
+        conn.close()
+    return [
+        name for name in names
+        if name in MENU_FACT_TABLES or any(name == vt or name.startswith(f"{vt}_") for vt in virtual)
+    ]
+
+
+def get_sql_database(db_path: str = "pizzas.db", **engine_kwargs: Any) -> Any:
+    """``SQLDatabase`` do LangChain sobre o engine somente leitura compartilhado."""
+    from langchain_community.utilities.sql_database import SQLDatabase
+
+    return SQLDatabase(
+        create_readonly_engine(db_path, **engine_kwargs),
+        ignore_tables=internal_tables(db_path) or None,
+    )
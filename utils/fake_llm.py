@@ -0,0 +1,184 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo fake_llm.py
+==================
+LLM de chat falso, determinístico e com suporte a streaming, para
+executar o pipeline offline (sem Groq e sem chave de API). Simula a
+latência até o primeiro token e a latência entre tokens, o que permite
+medir o "time-to-first-token" das interfaces.
+
+Com ferramentas ligadas (``bind_tools``), respostas que começam com
+``SELECT`` viram uma chamada à primeira ferramenta (argumento ``query``),
+como faria um LLM com suporte a tool calling. O ``responder`` também
+pode roteirizar uma chamada específica devolvendo
+``{"name": <ferramenta>, "args": {...}}``.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Sequence, Union
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+Response = Union[str, dict]
+
+
+def split_tokens(text: str) -> list[str]:
+    """Divide o texto em "tokens" (palavras com o espaço seguinte)."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model falso que percorre ``responses`` em ciclo ou usa ``responder``."""
+
+    responses: list[str] = ["Olá! Sou o assistente da Pizzaria Delícia."]
+    # Se definido, gera a resposta a partir das mensagens (tem prioridade sobre ``responses``):
+    responder: Optional[Callable[[list[BaseMessage]], Response]] = None
+    first_token_latency_s: float = 0.0
+    token_latency_s: float = 0.0
+
+    _index: int = PrivateAttr(default=0)
+    _calls: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat-model"
+
+    @property
+    def calls(self) -> int:
+        """Número de chamadas recebidas pelo modelo."""
+        return self._calls
+
+    def _next_response(self, messages: list[BaseMessage]) -> Response:
+        with self._lock:
+            self._calls += 1
+            if self.responder is not None:
+                return self.responder(messages)
+            response = self.responses[self._index % len(self.responses)]
+            self._index += 1
+            return response
+
+    @staticmethod
+    def _usage(messages: list[BaseMessage], text: str) -> dict:
+        """Contagem de tokens simulada (palavras), como o ``usage_metadata`` dos LLMs reais."""
+        input_tokens = sum(len(split_tokens(str(m.content))) for m in messages)
+        output_tokens = len(split_tokens(text))
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        """Liga as ferramentas (formato OpenAI) às chamadas seguintes do modelo."""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    @staticmethod
+    def _text(response: Response) -> str:
+        return response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
+
+    def _message(self, messages: list[BaseMessage], response: Response, tools: Optional[list[dict]]) -> AIMessage:
+        text = self._text(response)
+        usage = self._usage(messages, text)
+        if isinstance(response, dict):
+            tool_call = {"name": response["name"], "args": response.get("args", {})}
+        elif tools and text.lstrip().upper().startswith("SELECT"):
+            tool_call = {"name": tools[0]["function"]["name"], "args": {"query": text.strip()}}
+        else:
+            return AIMessage(content=text, usage_metadata=usage)
+        tool_call["id"] = f"call_{uuid.uuid4().hex[:12]}"
+        return AIMessage(content="", tool_calls=[tool_call], usage_metadata=usage)
+
+    def _tool_call_chunk(
+        self, messages: list[BaseMessage], response: Response, tools: Optional[list[dict]]
+    ) -> Optional[ChatGenerationChunk]:
+        """Chunk único com a chamada de ferramenta, quando a resposta é uma chamada de ferramenta."""
+        message = self._message(messages, response, tools)
+        if not message.tool_calls:
+            return None
+        call = message.tool_calls[0]
+        tool_call_chunk = {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}
+        chunk = AIMessageChunk(content="", tool_call_chunks=[tool_call_chunk], usage_metadata=message.usage_metadata)
+        return ChatGenerationChunk(message=chunk)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        response = self._next_response(messages)
+        time.sleep(self.first_token_latency_s + self.token_latency_s * len(split_tokens(self._text(response))))
+        message = self._message(messages, response, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        response = self._next_response(messages)
+        await asyncio.sleep(self.first_token_latency_s + self.token_latency_s * len(split_tokens(self._text(response))))
+        message = self._message(messages, response, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        response = self._next_response(messages)
+        time.sleep(self.first_token_latency_s)
+        if tool_chunk := self._tool_call_chunk(messages, response, kwargs.get("tools")):
+            yield tool_chunk
+            return
+        text = self._text(response)
+        tokens = split_tokens(text)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_latency_s)
+            usage = self._usage(messages, text) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        response = self._next_response(messages)
+        await asyncio.sleep(self.first_token_latency_s)
+        if tool_chunk := self._tool_call_chunk(messages, response, kwargs.get("tools")):
+            yield tool_chunk
+            return
+        text = self._text(response)
+        tokens = split_tokens(text)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.token_latency_s)
+            usage = self._usage(messages, text) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,264 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo llm_backend.py
+=====================
+Camada de backend do LLM usada por todo o projeto (``create_llm``), com
+três modos (``PIZZABOT_LLM_MODE``):
+
+- ``live``: chama a Groq diretamente;
+- ``record``: consulta o ``CompletionStore`` antes de chamar a Groq e
+  grava cada par prompt -> completion. Em produção, funciona como cache
+  persistente: prompts idênticos não voltam à Groq, mesmo após reinícios;
+- ``replay``: responde só a partir do armazém, sem rede e sem chave de
+  API (uma requisição não gravada levanta ``ReplayMissError``). A
+  latência gravada pode ser simulada (``replay_latency_scale=1``) ou
+  ignorada (``0``, padrão).
+
+A chave de cada completion é o hash do modelo (``model_id``), das
+mensagens, das ferramentas ligadas e dos parâmetros da chamada.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from utils.completion_store import CompletionStore, content_key
+from utils.fake_llm import split_tokens
+
+logger = logging.getLogger(__name__)
+
+LLM_MODES = ("live", "record", "replay")
+
+DEFAULT_MODEL = "llama3-70b-8192"
+
+
+class ReplayMissError(LookupError):
+    """Requisição ao LLM sem completion gravada no modo ``replay``."""
+
+
+def canonical_message(message: BaseMessage) -> dict:
+    """Campos da mensagem que definem a requisição (sem ids de execução do LangChain)."""
+    canonical = {"type": message.type, "content": message.content}
+    if getattr(message, "tool_calls", None):
+        canonical["tool_calls"] = [[c["name"], c["args"], c.get("id")] for c in message.tool_calls]
+    if getattr(message, "tool_call_id", None):
+        canonical["tool_call_id"] = message.tool_call_id
+    return canonical
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """Chat model que envolve o LLM real com gravação/reprodução num ``CompletionStore``."""
+
+    inner: Optional[BaseChatModel] = None  # dispensável no modo replay
+    store: Optional[CompletionStore] = None
+    mode: str = "live"
+    model_id: str = DEFAULT_MODEL
+    replay_latency_scale: float = 0.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"record-replay-{self.mode}"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_id": self.model_id, "mode": self.mode}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        """Liga as ferramentas no formato do LLM real (ou no formato OpenAI, no modo replay)."""
+        if self.inner is not None:
+            return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    # ------------------------------------------------------------------
+    # Armazém
+    # ------------------------------------------------------------------
+    def _key(self, messages: list[BaseMessage], stop: Optional[list[str]], kwargs: dict) -> str:
+        return content_key({
+            "model": self.model_id,
+            "messages": [canonical_message(m) for m in messages],
+            "stop": stop,
+            "params": kwargs,
+        })
+
+    def _lookup(self, key: str) -> Optional[tuple[AIMessage, float]]:
+        if self.mode == "live" or self.store is None:
+            return None
+        entry = self.store.get(key)
+        if entry is None:
+            if self.mode == "replay":
+                raise ReplayMissError(f"Nenhuma completion gravada para a requisição {key[:12]}...")
+            return None
+        return messages_from_dict([entry["message"]])[0], entry["latency_s"] * self.replay_latency_scale
+
+    def _save(self, key: str, message: BaseMessage, latency_s: float) -> None:
+        if self.mode == "record" and self.store is not None:
+            self.store.put(key, {"message": message_to_dict(message), "latency_s": round(latency_s, 4)})
+
+    def _require_inner(self) -> BaseChatModel:
+        if self.inner is None:
+            raise ReplayMissError("Modo sem LLM real configurado: nada a chamar.")
+        return self.inner
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> Iterator[ChatGenerationChunk]:
+        """Reparte a mensagem gravada em chunks (tokens de texto ou uma chamada de ferramenta)."""
+        if message.tool_calls or not isinstance(message.content, str) or not message.content:
+            tool_call_chunks = [
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c.get("id"), "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ]
+            chunk = AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=tool_call_chunks,
+                usage_metadata=message.usage_metadata,
+                additional_kwargs=message.additional_kwargs,
+                response_metadata=message.response_metadata,
+            )
+            yield ChatGenerationChunk(message=chunk)
+            return
+        tokens = split_tokens(message.content)
+        for i, token in enumerate(tokens):
+            usage = message.usage_metadata if i == len(tokens) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+
+    # ------------------------------------------------------------------
+    # Chamadas
+    # ------------------------------------------------------------------
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if (hit := self._lookup(key)) is not None:
+            message, delay = hit
+            time.sleep(delay)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        start = time.perf_counter()
+        result = self._require_inner()._generate(messages, stop=stop, **kwargs)
+        self._save(key, result.generations[0].message, time.perf_counter() - start)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if (hit := self._lookup(key)) is not None:
+            message, delay = hit
+            await asyncio.sleep(delay)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        start = time.perf_counter()
+        result = await self._require_inner()._agenerate(messages, stop=stop, **kwargs)
+        self._save(key, result.generations[0].message, time.perf_counter() - start)
+        return result
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        if (hit := self._lookup(key)) is not None:
+            message, delay = hit
+            time.sleep(delay)
+            for chunk in self._chunks(message):
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        start = time.perf_counter()
+        merged = None
+        for chunk in self._require_inner()._stream(messages, stop=stop, **kwargs):
+            merged = chunk.message if merged is None else merged + chunk.message
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if merged is not None:
+            self._save(key, message_chunk_to_message(merged), time.perf_counter() - start)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        if (hit := self._lookup(key)) is not None:
+            message, delay = hit
+            await asyncio.sleep(delay)
+            for chunk in self._chunks(message):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        start = time.perf_counter()
+        merged = None
+        async for chunk in self._require_inner()._astream(messages, stop=stop, **kwargs):
+            merged = chunk.message if merged is None else merged + chunk.message
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if merged is not None:
+            self._save(key, message_chunk_to_message(merged), time.perf_counter() - start)
+
+
+def create_llm(
+    model_name: str = DEFAULT_MODEL,
+    mode: Optional[str] = None,
+    store_path: Optional[str] = None,
+    inner: Optional[BaseChatModel] = None,
+    **kwargs: Any,
+) -> BaseChatModel:
+    """
+    LLM do projeto conforme o modo (``PIZZABOT_LLM_MODE``, padrão ``live``).
+    O armazém fica em ``PIZZABOT_LLM_STORE`` (padrão ``llm_store.db``),
+    limitado a ``PIZZABOT_LLM_STORE_MAX_MB`` MiB.
+    """
+    mode = mode or os.getenv("PIZZABOT_LLM_MODE", "live")
+    if mode not in LLM_MODES:
+        raise ValueError(f"Modo de LLM inválido: {mode!r} (use um de {LLM_MODES})")
+
+    if inner is None and mode != "replay":
+        from langchain_groq import ChatGroq
+
+        logger.info("Inicializando o modelo LLM '%s' da Groq...", model_name)
+        inner = ChatGroq(model_name=model_name, api_key=os.getenv("GROQ_API_KEY"), temperature=0)
+    if mode == "live":
+        return inner
+
+    store = CompletionStore(
+        store_path or os.getenv("PIZZABOT_LLM_STORE", "llm_store.db"),
+        max_bytes=int(float(os.getenv("PIZZABOT_LLM_STORE_MAX_MB", "64")) * 1024 * 1024),
+    )
+    logger.info("LLM em modo '%s' com o armazém '%s' (%d completions)", mode, store.path, store.stats()["entries"])
+    kwargs.setdefault("replay_latency_scale", float(os.getenv("PIZZABOT_LLM_REPLAY_LATENCY", "0")))
+    kwargs.setdefault("model_id", f"groq:{model_name}")
+    return RecordReplayChatModel(inner=inner, store=store, mode=mode, **kwargs)
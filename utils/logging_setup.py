@@ -0,0 +1,224 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo logging_setup.py
+=======================
+Configuração de logging compartilhada pelas interfaces (CLI, Streamlit,
+Mesop) e pelo ``create_database.py``, sem custo de E/S na thread da
+requisição:
+
+- o logger raiz recebe só um ``QueueHandler``: a thread da requisição
+  cria o ``LogRecord`` e o põe numa fila, sem formatar a mensagem
+  (``prepare`` não chama ``format``); um ``QueueListener`` numa thread
+  própria formata e escreve no arquivo e no console;
+- o arquivo recebe um JSON por linha (``JsonFormatter``), com os campos
+  passados em ``extra=`` e a taxa de amostragem do registro;
+- o console só recebe cores ANSI quando é um terminal (TTY); nos demais
+  destinos (arquivo, pipes, coletores de log) os códigos são removidos;
+- ``SamplingFilter`` guarda 1 de cada N registros de linhas muito
+  frequentes ("Executando consulta SQL", ...) ou de níveis inteiros
+  (``DEBUG``), antes de entrarem na fila. A amostragem é opcional
+  (``DEFAULT_SAMPLING`` é vazio); ``PIPELINE_SAMPLING`` traz as taxas
+  sugeridas para as linhas por pergunta do pipeline.
+
+As chamadas devem usar formatação preguiçosa (``logger.info("SQL: %s",
+sql)``): a mensagem só é montada pelo listener, e só se o registro
+passar pelo nível e pela amostragem.
+
+Configuração: ``PIZZABOT_LOG_LEVEL`` (padrão ``INFO``) e
+``PIZZABOT_LOG_SAMPLE`` (ex.: ``"Executando consulta SQL=0.1,DEBUG=0"``;
+chaves são nomes de nível ou prefixos da mensagem, valores são a fração
+mantida).
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+# Sem ``PIZZABOT_LOG_SAMPLE``, nenhum registro é descartado:
+DEFAULT_SAMPLING: dict[str, float] = {}
+
+# Linhas frequentes do pipeline (uma ou mais por pergunta), para quem ligar a amostragem
+# (equivale a ``PIZZABOT_LOG_SAMPLE="Executando consulta SQL=0.1,..."``):
+PIPELINE_SAMPLING = {
+    "Executando consulta SQL": 0.1,
+    "Cache de respostas: acerto": 0.1,
+    "Roteador SQL: pergunta atendida": 0.1,
+}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+# Atributos padrão de um LogRecord (o resto veio de ``extra=`` e vai para o JSON):
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def strip_ansi(text: str) -> str:
+    return _ANSI.sub("", text)
+
+
+def parse_sampling(spec: str) -> dict[str, float]:
+    """``"Executando consulta SQL=0.1,DEBUG=0"`` -> ``{"Executando consulta SQL": 0.1, "DEBUG": 0.0}``."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, rate = item.rpartition("=")
+        if not key:
+            raise ValueError(f"Amostragem de log inválida: {item!r} (use 'chave=fração')")
+        rates[key.strip()] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Mantém 1 de cada ``round(1 / taxa)`` registros por chave (nível ou
+    prefixo da mensagem; o prefixo tem precedência). Determinístico: em
+    rajadas, a fração mantida é exata. Avisos e erros só são amostrados se
+    o nível for configurado explicitamente.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.level_rates = {k: v for k, v in rates.items() if k in logging.getLevelNamesMapping()}
+        self.prefix_rates = {k: v for k, v in rates.items() if k not in self.level_rates}
+        self._counters: dict[str, "itertools.count[int]"] = {}
+        # Taxa por template de mensagem (com formatação preguiçosa, os templates são poucos):
+        self._template_rates: dict[str, Optional[tuple[str, float]]] = {}
+
+    def _rate(self, record: logging.LogRecord) -> Optional[tuple[str, float]]:
+        template = record.msg if isinstance(record.msg, str) else ""
+        if template in self._template_rates:
+            return self._template_rates[template]
+        rate = next(((p, r) for p, r in self.prefix_rates.items() if template.startswith(p)), None)
+        if rate is None and record.levelname in self.level_rates:
+            rate = (record.levelname, self.level_rates[record.levelname])
+        if len(self._template_rates) < 1024:  # mensagens em f-string não esgotam a memória
+            self._template_rates[template] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._rate(record)
+        if rate is None:
+            return True
+        key, fraction = rate
+        if fraction >= 1:
+            return True
+        if fraction <= 0:
+            return False
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        if next(counter) % round(1 / fraction):
+            return False
+        record.sample_rate = fraction
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por registro, sem códigos ANSI."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": strip_ansi(record.getMessage()),
+        }
+        entry.update({k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Formato de texto das interfaces; remove as cores se o destino não é um TTY."""
+
+    def __init__(self, color: bool):
+        super().__init__(TEXT_FORMAT)
+        self.color = color
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        return text if self.color else strip_ansi(text)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """``QueueHandler`` que não formata na thread da requisição (o listener formata)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Mesmo processo: o registro (com ``args`` e ``exc_info``) vai intacto pela fila.
+        return record
+
+
+def setup_logging(
+    log_file: Optional[str] = "LOGs_pizzabot.log",
+    level: Optional[str] = None,
+    sampling: Optional[dict[str, float]] = None,
+    console: bool = True,
+    force: bool = False,
+) -> QueueListener:
+    """
+    Liga o logging assíncrono no logger raiz (uma vez por processo; chamadas
+    seguintes devolvem o mesmo listener, a menos que ``force=True``).
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None and not force:
+            return _listener
+        stop_logging()
+
+        handlers: list[logging.Handler] = []
+        if log_file:
+            file_handler = logging.FileHandler(log_file, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(ConsoleFormatter(color=sys.stderr.isatty()))
+            handlers.append(stream_handler)
+
+        if sampling is None:
+            spec = os.getenv("PIZZABOT_LOG_SAMPLE")
+            sampling = parse_sampling(spec) if spec is not None else DEFAULT_SAMPLING
+        _queue_handler = _LazyQueueHandler(queue.SimpleQueue())
+        if sampling:
+            _queue_handler.addFilter(SamplingFilter(sampling))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):  # substitui ``basicConfig``/handlers antigos
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level or os.getenv("PIZZABOT_LOG_LEVEL", "INFO"))
+
+        _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+
+def stop_logging() -> None:
+    """Esvazia a fila, fecha os handlers e desliga o logging assíncrono."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,334 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo menu_facts.py
+====================
+Fatos do cardápio pré-calculados, para responder as perguntas mais
+comuns sem SQL de agregação e sem LLM:
+
+- no banco, as tabelas de ``utils.menu_schema`` (estatísticas de preço
+  por tamanho, índice invertido de ingredientes e variantes por nome),
+  criadas pelo ``create_database.py`` e atualizadas incrementalmente por
+  ``utils.menu_loader.load_menu`` na mesma transação da carga: só as
+  pizzas alteradas são reindexadas e só os tamanhos afetados têm as
+  estatísticas recalculadas;
+- em memória, o ``MenuSnapshot``: uma cópia dos fatos (e das linhas do
+  cardápio, até ``max_rows`` pizzas), recarregada quando o arquivo do DB
+  muda. ``answer`` responde às consultas do ``SQLTemplateRouter`` que os
+  fatos cobrem (mais cara/barata, contagem, cardápio, por tamanho, preço
+  e ingredientes de uma pizza, pizzas com um ingrediente) com as mesmas
+  linhas que o SQL devolveria; ``prompt_text`` resume os fatos para o
+  prompt de SQL.
+
+O snapshot só responde aos formatos de consulta que reproduz exatamente
+(``_EXACT_PARAMS``): uma consulta roteada com outro filtro segue pelo
+SQL. No ``PizzaQueryService``, os fatos são opcionais
+(``PIZZABOT_MENU_FACTS=1``).
+
+Se as tabelas de fatos não existem ou não batem com a tabela ``pizza``
+(escrita fora do ``load_menu``), o snapshot não responde e o pipeline
+segue pelo SQL.
+"""
+import json
+import logging
+import sqlite3
+import string
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from utils.answer_cache import db_fingerprint, normalize_question
+from utils.answer_templates import format_price
+from utils.db_engine import connect_reader
+from utils.menu_schema import MENU_FACTS_DDL, has_menu_facts
+
+logger = logging.getLogger(__name__)
+
+# Chave de ``menu_price_stats`` com as estatísticas do cardápio inteiro:
+ALL_SIZES = "*"
+
+COLUMNS = ("id", "name", "tamanho", "preco", "ingredientes")
+
+# Colunas devolvidas por cada modelo do roteador (as do SQL correspondente):
+_TEMPLATE_COLUMNS = {
+    "preco_da_pizza": ("name", "tamanho", "preco"),
+    "ingredientes_da_pizza": ("name", "tamanho", "ingredientes"),
+}
+
+# Parâmetros de cada modelo do roteador que os fatos reproduzem (outros: segue pelo SQL):
+_EXACT_PARAMS = {
+    "mais_cara": {"tamanho"},
+    "mais_barata": {"tamanho"},
+    "contagem": {"tamanho", "ingrediente"},
+    "cardapio": set(),
+    "por_tamanho": {"tamanho"},
+    "preco_da_pizza": {"name"},
+    "ingredientes_da_pizza": {"name"},
+    "com_ingrediente": {"ingrediente"},
+}
+
+# Sabores listados na resposta do cardápio:
+MAX_LISTED_NAMES = 60
+
+# ``COLLATE NOCASE`` do SQLite só ignora a caixa de letras ASCII:
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+# ----------------------------------------------------------------------
+# Tabelas materializadas
+# ----------------------------------------------------------------------
+def create_menu_facts(conn: sqlite3.Connection) -> None:
+    """Cria as tabelas de fatos; se acabaram de ser criadas, calcula todos os fatos."""
+    existed = has_menu_facts(conn)
+    for ddl in MENU_FACTS_DDL:
+        conn.execute(ddl)
+    if not existed:
+        rebuild_menu_facts(conn)
+
+
+def rebuild_menu_facts(conn: sqlite3.Connection, chunk_size: int = 5000) -> None:
+    """Recalcula todos os fatos a partir da tabela ``pizza``."""
+    for table in ("menu_ingredient_index", "menu_name_variants", "menu_price_stats"):
+        conn.execute(f"DELETE FROM {table}")
+    cursor = conn.execute("SELECT id, name, tamanho, preco, ingredientes FROM pizza")
+    while rows := cursor.fetchmany(chunk_size):
+        _insert_terms(conn, rows)
+    sizes = [row[0] for row in conn.execute("SELECT DISTINCT tamanho FROM pizza")]
+    refresh_price_stats(conn, sizes)
+
+
+def _insert_terms(conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+    terms, names = [], []
+    for pizza_id, name, _, _, ingredientes in rows:
+        terms.extend((word, pizza_id) for word in set(normalize_question(ingredientes).split()))
+        names.append((normalize_question(name), pizza_id))
+    conn.executemany("INSERT OR IGNORE INTO menu_ingredient_index (termo, pizza_id) VALUES (?, ?)", terms)
+    conn.executemany("INSERT OR IGNORE INTO menu_name_variants (name_key, pizza_id) VALUES (?, ?)", names)
+
+
+def unindex_pizzas(conn: sqlite3.Connection, pizza_ids: list[int]) -> None:
+    """Remove as pizzas do índice de ingredientes e do mapa de nomes."""
+    ids = json.dumps(pizza_ids)
+    for table in ("menu_ingredient_index", "menu_name_variants"):
+        conn.execute(f"DELETE FROM {table} WHERE pizza_id IN (SELECT value FROM json_each(?))", (ids,))
+
+
+def index_pizzas(conn: sqlite3.Connection, rows: list[tuple]) -> None:
+    """(Re)indexa pizzas inseridas ou alteradas (linhas na ordem de ``COLUMNS``)."""
+    unindex_pizzas(conn, [row[0] for row in rows])
+    _insert_terms(conn, rows)
+
+
+def refresh_price_stats(conn: sqlite3.Connection, sizes: Iterable[str]) -> None:
+    """Recalcula as estatísticas dos tamanhos afetados e do cardápio inteiro (pelo índice ``tamanho, preco``)."""
+    for size in set(sizes) | {ALL_SIZES}:
+        where, params = ("", ()) if size == ALL_SIZES else ("WHERE tamanho = ?", (size,))
+        total, low, high, mean = conn.execute(
+            f"SELECT COUNT(*), MIN(preco), MAX(preco), AVG(preco) FROM pizza {where}", params
+        ).fetchone()
+        if not total:
+            conn.execute("DELETE FROM menu_price_stats WHERE tamanho = ?", (size,))
+            continue
+        # As mesmas consultas do roteador: em empates, a mesma pizza que o SQL escolheria.
+        cheapest = conn.execute(f"SELECT id FROM pizza {where} ORDER BY preco ASC LIMIT 1", params).fetchone()[0]
+        priciest = conn.execute(f"SELECT id FROM pizza {where} ORDER BY preco DESC LIMIT 1", params).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO menu_price_stats VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (size, total, low, high, mean, cheapest, priciest),
+        )
+
+
+# ----------------------------------------------------------------------
+# Snapshot em memória
+# ----------------------------------------------------------------------
+@dataclass
+class MenuFact:
+    """Resposta dos fatos: as linhas que o SQL devolveria e a tabela de origem."""
+
+    rows: list[dict]
+    source: str
+    # Resposta pronta (quando melhor que o template genérico), p.ex. a do cardápio:
+    answer: Optional[str] = None
+
+
+@dataclass
+class _Snapshot:
+    stats: dict[str, dict]
+    rows: dict[int, tuple]
+    # Todas as linhas do cardápio estão em ``rows`` (cardápios até ``max_rows``):
+    complete: bool
+    postings: dict[str, list[int]] = field(default_factory=dict)
+    names: dict[str, list[int]] = field(default_factory=dict)
+    ingredients_text: dict[int, str] = field(default_factory=dict)
+
+
+class MenuSnapshot:
+    """Cópia em memória dos fatos do cardápio, recarregada quando o DB muda."""
+
+    def __init__(self, db_path: str = "pizzas.db", max_rows: int = 5000):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.loads = 0
+        self.hits = 0
+        self._snapshot: Optional[_Snapshot] = None
+        self._fingerprint: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_sqlite(cls, db_path: str = "pizzas.db", **kwargs: Any) -> Optional["MenuSnapshot"]:
+        """Snapshot do DB, ou ``None`` se o DB não tem as tabelas de fatos."""
+        conn = connect_reader(db_path)
+        try:
+            available = has_menu_facts(conn)
+        finally:
+            conn.close()
+        return cls(db_path, **kwargs) if available else None
+
+    def _current(self) -> Optional[_Snapshot]:
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint != self._fingerprint:
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    self._snapshot = self._load()
+                    self._fingerprint = fingerprint
+                    self.loads += 1
+        return self._snapshot
+
+    def _load(self) -> Optional[_Snapshot]:
+        conn = connect_reader(self.db_path)
+        try:
+            stats = {
+                row[0]: dict(zip(("total", "min_preco", "max_preco", "avg_preco", "cheapest_id", "priciest_id"), row[1:]))
+                for row in conn.execute("SELECT * FROM menu_price_stats")
+            }
+            total = conn.execute("SELECT COUNT(*) FROM pizza").fetchone()[0]
+            if stats.get(ALL_SIZES, {}).get("total", 0) != total:
+                logger.warning("Fatos do cardápio desatualizados (rode create_database.py); usando o SQL.")
+                return None
+            if total > self.max_rows:
+                ids = {stat[key] for stat in stats.values() for key in ("cheapest_id", "priciest_id")}
+                rows = conn.execute(
+                    "SELECT * FROM pizza WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(list(ids)),)
+                )
+                return _Snapshot(stats, {row[0]: row for row in rows}, complete=False)
+
+            snapshot = _Snapshot(stats, {row[0]: row for row in conn.execute("SELECT * FROM pizza ORDER BY id")}, True)
+            for term, pizza_id in conn.execute("SELECT termo, pizza_id FROM menu_ingredient_index"):
+                snapshot.postings.setdefault(term, []).append(pizza_id)
+            for name_key, pizza_id in conn.execute("SELECT name_key, pizza_id FROM menu_name_variants ORDER BY pizza_id"):
+                snapshot.names.setdefault(name_key, []).append(pizza_id)
+            snapshot.ingredients_text = {
+                pizza_id: f" {normalize_question(row[4])} " for pizza_id, row in snapshot.rows.items()
+            }
+            return snapshot
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Respostas
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _as_dicts(rows: Iterable[tuple], columns: tuple = COLUMNS) -> list[dict]:
+        indexes = [COLUMNS.index(c) for c in columns]
+        return [{c: row[i] for c, i in zip(columns, indexes)} for row in rows]
+
+    def answer(self, routed: Any) -> Optional[MenuFact]:
+        """Fato para a consulta do roteador (``RoutedQuery``), ou ``None`` se não coberta."""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+        fact = self._answer(snapshot, routed.template, routed.params, getattr(routed, "term", None))
+        if fact is not None:
+            self.hits += 1
+        return fact
+
+    @staticmethod
+    def _ingredient_ids(snapshot: _Snapshot, term: str) -> list[int]:
+        """Pizzas cujos ingredientes contêm ``term``, com a semântica do ``fts_phrase``."""
+        words = normalize_question(term).split()
+        if not words:
+            return []
+        postings = [set(snapshot.postings.get(word, ())) for word in words[:-1]]
+        # Última palavra como prefixo ("tomate" casa "tomates"), como ``fts_phrase``:
+        postings.append({i for key, ids in snapshot.postings.items() if key.startswith(words[-1]) for i in ids})
+        candidates = set.intersection(*postings)
+        # Frase inteira, como o MATCH de frase do FTS5:
+        phrase = f" {' '.join(words)}"
+        return sorted(i for i in candidates if phrase in snapshot.ingredients_text[i])
+
+    def _answer(self, snapshot: _Snapshot, template: str, params: dict, term: Optional[str]) -> Optional[MenuFact]:
+        allowed = _EXACT_PARAMS.get(template)
+        if allowed is None or not allowed.issuperset(params) or ("ingrediente" in params and not term):
+            return None
+        size = params.get("tamanho", ALL_SIZES)
+        stats = snapshot.stats.get(size)
+        source = f"menu_price_stats[{size}]"
+        if template in ("mais_cara", "mais_barata"):
+            if stats is None:
+                return MenuFact([], source)
+            pizza_id = stats["priciest_id" if template == "mais_cara" else "cheapest_id"]
+            return MenuFact(self._as_dicts([snapshot.rows[pizza_id]]), source)
+        if template == "contagem" and "ingrediente" not in params:
+            return MenuFact([{"total": stats["total"] if stats else 0}], source)
+        if not snapshot.complete:
+            return None
+
+        rows = snapshot.rows
+        if template == "cardapio":
+            return MenuFact(self._as_dicts(rows.values()), "menu_price_stats + menu_name_variants", self._menu_text(snapshot))
+        if template == "por_tamanho":
+            # Mesma ordem do SQL (índice ``tamanho, preco``):
+            selected = sorted((row for row in rows.values() if row[2] == size), key=lambda row: (row[3], row[0]))
+            return MenuFact(self._as_dicts(selected), "menu_snapshot")
+        if template in _TEMPLATE_COLUMNS:
+            name = params["name"].translate(_NOCASE)
+            ids = [i for i in snapshot.names.get(normalize_question(name), []) if rows[i][1].translate(_NOCASE) == name]
+            return MenuFact(self._as_dicts((rows[i] for i in ids), _TEMPLATE_COLUMNS[template]), "menu_name_variants")
+        if template == "contagem":
+            ids = self._ingredient_ids(snapshot, term)
+            total = sum(1 for i in ids if size == ALL_SIZES or rows[i][2] == size)
+            return MenuFact([{"total": total}], "menu_ingredient_index")
+        if template == "com_ingrediente":
+            ids = self._ingredient_ids(snapshot, term)
+            return MenuFact(self._as_dicts(rows[i] for i in ids), "menu_ingredient_index")
+        return None
+
+    def _sizes(self, snapshot: _Snapshot) -> list[str]:
+        return sorted(s for s in snapshot.stats if s != ALL_SIZES)
+
+    def _menu_text(self, snapshot: _Snapshot) -> str:
+        overall = snapshot.stats[ALL_SIZES]
+        # Um sabor por nome normalizado ("Quatro Queijos" e "Quatro queijos" são o mesmo):
+        unique: dict[str, str] = {}
+        for row in snapshot.rows.values():
+            unique.setdefault(normalize_question(row[1]), row[1])
+        names = list(unique.values())
+        sizes = self._sizes(snapshot)
+        listed = ", ".join(names[:MAX_LISTED_NAMES])
+        if len(names) > MAX_LISTED_NAMES:
+            listed += f" e mais {len(names) - MAX_LISTED_NAMES}"
+        return (
+            f"Temos {overall['total']} opções no cardápio: {len(names)} sabores em {len(sizes)} tamanhos "
+            f"({', '.join(sizes)}), de {format_price(overall['min_preco'])} a {format_price(overall['max_preco'])}. 🍕\n"
+            f"Sabores: {listed}."
+        )
+
+    def prompt_text(self) -> str:
+        """Resumo dos fatos para o prompt de SQL (vazio se não há fatos válidos)."""
+        snapshot = self._current()
+        if snapshot is None:
+            return ""
+        lines = ["Fatos do cardápio (pré-calculados; use-os em vez de agregar a tabela pizza):"]
+        for size in [ALL_SIZES] + self._sizes(snapshot):
+            stat = snapshot.stats[size]
+            label = "cardápio inteiro" if size == ALL_SIZES else size
+            line = (
+                f"- {label}: {stat['total']} pizzas, de {format_price(stat['min_preco'])} a "
+                f"{format_price(stat['max_preco'])} (média {format_price(stat['avg_preco'])})"
+            )
+            cheapest, priciest = snapshot.rows.get(stat["cheapest_id"]), snapshot.rows.get(stat["priciest_id"])
+            if cheapest and priciest:
+                line += f"; mais barata: {cheapest[1]}; mais cara: {priciest[1]}"
+            lines.append(line)
+        return "\n".join(lines)
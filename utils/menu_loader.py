@@ -0,0 +1,196 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo menu_loader.py
+=====================
+Carga incremental do cardápio na tabela ``pizza``, substituindo o antigo
+``DELETE FROM pizza`` + ``executemany``. As linhas são lidas em lotes
+(CSV, JSON Lines, JSON ou Parquet), comparadas por hash de conteúdo com
+o que já está no banco e gravadas com ``INSERT ... ON CONFLICT DO UPDATE``
+numa única transação. Linhas inalteradas não são reescritas, o que
+preserva os caches que dependem de ``data_version``/mtime do DB.
+
+A memória fica limitada ao tamanho do lote: os ids vistos vão para uma
+tabela temporária, usada ao final para remover as pizzas que saíram do
+cardápio.
+
+Se o banco tem os fatos do cardápio (``utils.menu_facts``), eles são
+atualizados na mesma transação: só as pizzas gravadas ou removidas são
+reindexadas e só os tamanhos afetados têm as estatísticas recalculadas.
+"""
+import csv
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+
+from utils.menu_facts import index_pizzas, refresh_price_stats, unindex_pizzas
+from utils.menu_schema import has_menu_facts
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("id", "name", "tamanho", "preco", "ingredientes")
+MenuRow = tuple[int, str, str, float, str]
+
+UPSERT_SQL = """
+INSERT INTO pizza (id, name, tamanho, preco, ingredientes) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    name = excluded.name,
+    tamanho = excluded.tamanho,
+    preco = excluded.preco,
+    ingredientes = excluded.ingredientes
+"""
+
+
+@dataclass
+class LoadReport:
+    """Resumo de uma carga do cardápio."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def normalize_row(row: Union[dict, tuple, list]) -> MenuRow:
+    """Converte um registro (dict ou sequência) para a tupla da tabela ``pizza``."""
+    try:
+        values = [row[column] for column in COLUMNS] if isinstance(row, dict) else list(row)
+        pizza_id, name, tamanho, preco, ingredientes = values
+        return int(pizza_id), str(name).strip(), str(tamanho).strip(), float(preco), str(ingredientes).strip()
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Linha inválida no cardápio: {row!r} ({e})") from e
+
+
+def row_hash(row: MenuRow) -> str:
+    """Hash de conteúdo de uma linha do cardápio."""
+    return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _chunked(rows: Iterable[Any], chunk_size: int) -> Iterator[list[Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_menu_file(path: Union[str, Path], chunk_size: int = 5000) -> Iterator[list[Any]]:
+    """Lê um arquivo de cardápio em lotes (.csv, .jsonl, .json ou .parquet)."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            yield from _chunked(csv.DictReader(f), chunk_size)
+    elif suffix in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as f:
+            yield from _chunked((json.loads(line) for line in f if line.strip()), chunk_size)
+    elif suffix == ".json":
+        # Um array JSON precisa ser lido inteiro; para catálogos grandes prefira JSON Lines.
+        with path.open(encoding="utf-8") as f:
+            yield from _chunked(json.load(f), chunk_size)
+    elif suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Leitura de Parquet requer o pacote 'pyarrow'.") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(COLUMNS)):
+            yield batch.to_pylist()
+    else:
+        raise ValueError(f"Formato de cardápio não suportado: '{path.suffix}'")
+
+
+def load_menu(
+    conn: sqlite3.Connection,
+    source: Union[str, Path, Iterable[Any]],
+    chunk_size: int = 5000,
+    delete_missing: bool = True,
+) -> LoadReport:
+    """
+    Sincroniza a tabela ``pizza`` com ``source`` (arquivo ou iterável de linhas)
+    numa única transação e retorna quantas linhas foram inseridas,
+    atualizadas, mantidas e removidas.
+    """
+    start = time.perf_counter()
+    chunks = (
+        read_menu_file(source, chunk_size)
+        if isinstance(source, (str, Path))
+        else _chunked(source, chunk_size)
+    )
+    report = LoadReport()
+    facts = has_menu_facts(conn)
+    sizes: set[str] = set()  # tamanhos com pizzas gravadas ou removidas
+
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS menu_seen (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.menu_seen")
+        for chunk in chunks:
+            rows = {}
+            for raw in chunk:
+                row = normalize_row(raw)
+                rows[row[0]] = row  # ids repetidos: vale a última ocorrência
+            existing, old_sizes = {}, {}
+            for row in conn.execute(
+                "SELECT id, name, tamanho, preco, ingredientes FROM pizza "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(rows)),),
+            ):
+                existing[row[0]], old_sizes[row[0]] = row_hash(row), row[2]
+            to_write = []
+            for pizza_id, row in rows.items():
+                old_hash = existing.get(pizza_id)
+                if old_hash is None:
+                    report.inserted += 1
+                elif old_hash != row_hash(row):
+                    report.updated += 1
+                else:
+                    report.unchanged += 1
+                    continue
+                to_write.append(row)
+                sizes.update((row[2], old_sizes.get(pizza_id, row[2])))
+            conn.executemany(UPSERT_SQL, to_write)
+            if facts and to_write:
+                index_pizzas(conn, to_write)
+            conn.executemany("INSERT OR IGNORE INTO temp.menu_seen (id) VALUES (?)", ((i,) for i in rows))
+
+        if delete_missing and facts:
+            cursor = conn.execute(
+                "DELETE FROM pizza WHERE id NOT IN (SELECT id FROM temp.menu_seen) RETURNING id, tamanho"
+            )
+            while removed := cursor.fetchmany(chunk_size):
+                report.deleted += len(removed)
+                sizes.update(tamanho for _, tamanho in removed)
+                unindex_pizzas(conn, [pizza_id for pizza_id, _ in removed])
+        elif delete_missing:
+            report.deleted = conn.execute(
+                "DELETE FROM pizza WHERE id NOT IN (SELECT id FROM temp.menu_seen)"
+            ).rowcount
+        if facts and sizes:
+            refresh_price_stats(conn, sizes)
+        conn.execute("DELETE FROM temp.menu_seen")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    report.seconds = time.perf_counter() - start
+    logger.info("Carga do cardápio: %s", report.as_dict())
+    return report
@@ -0,0 +1,138 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo menu_schema.py
+=====================
+DDL do cardápio: tabela ``pizza``, índices B-tree em ``preco`` e
+``tamanho`` e a tabela virtual FTS5 ``pizza_fts`` sobre ``name`` e
+``ingredientes`` (``unicode61 remove_diacritics``), mantida em sincronia
+com a tabela ``pizza`` por triggers.
+
+Tabelas de fatos materializados (mantidas por ``utils.menu_facts``, não
+vão para o prompt como esquema):
+
+- ``menu_price_stats``: contagem, preço mínimo/máximo/médio e as pizzas
+  mais barata e mais cara por ``tamanho`` (``'*'`` = cardápio inteiro);
+- ``menu_ingredient_index``: índice invertido palavra do ingrediente
+  (normalizada) -> pizza;
+- ``menu_name_variants``: nome normalizado -> variantes (tamanhos) da pizza.
+"""
+import sqlite3
+
+FTS_TABLE = "pizza_fts"
+
+PIZZA_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS pizza (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    tamanho TEXT NOT NULL,
+    preco REAL NOT NULL,
+    ingredientes TEXT NOT NULL
+)
+"""
+
+INDEXES_DDL = [
+    "CREATE INDEX IF NOT EXISTS idx_pizza_preco ON pizza (preco)",
+    "CREATE INDEX IF NOT EXISTS idx_pizza_tamanho_preco ON pizza (tamanho, preco)",
+]
+
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, ingredientes,
+        content='pizza', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS pizza_fts_ai AFTER INSERT ON pizza BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, ingredientes) VALUES (new.id, new.name, new.ingredientes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS pizza_fts_ad AFTER DELETE ON pizza BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, ingredientes)
+        VALUES ('delete', old.id, old.name, old.ingredientes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS pizza_fts_au AFTER UPDATE OF name, ingredientes ON pizza BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, ingredientes)
+        VALUES ('delete', old.id, old.name, old.ingredientes);
+        INSERT INTO {FTS_TABLE}(rowid, name, ingredientes) VALUES (new.id, new.name, new.ingredientes);
+    END
+    """,
+]
+
+
+MENU_FACT_TABLES = ("menu_price_stats", "menu_ingredient_index", "menu_name_variants")
+
+MENU_FACTS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS menu_price_stats (
+        tamanho TEXT PRIMARY KEY,
+        total INTEGER NOT NULL,
+        min_preco REAL NOT NULL,
+        max_preco REAL NOT NULL,
+        avg_preco REAL NOT NULL,
+        cheapest_id INTEGER NOT NULL,
+        priciest_id INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS menu_ingredient_index (
+        termo TEXT NOT NULL,
+        pizza_id INTEGER NOT NULL,
+        PRIMARY KEY (termo, pizza_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_menu_ingredient_index_pizza ON menu_ingredient_index (pizza_id)",
+    """
+    CREATE TABLE IF NOT EXISTS menu_name_variants (
+        name_key TEXT NOT NULL,
+        pizza_id INTEGER NOT NULL,
+        PRIMARY KEY (name_key, pizza_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_menu_name_variants_pizza ON menu_name_variants (pizza_id)",
+]
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    """Indica se a tabela FTS5 do cardápio existe no banco."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone()
+    return row is not None
+
+
+def has_menu_facts(conn: sqlite3.Connection) -> bool:
+    """Indica se as tabelas de fatos do cardápio existem no banco."""
+    placeholders = ", ".join("?" for _ in MENU_FACT_TABLES)
+    row = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})", MENU_FACT_TABLES
+    ).fetchone()
+    return row[0] == len(MENU_FACT_TABLES)
+
+
+def create_search_structures(conn: sqlite3.Connection) -> None:
+    """Cria índices, tabela FTS5 e triggers; reconstrói o FTS se ele acabou de ser criado."""
+    fts_existed = has_fts(conn)
+    for ddl in INDEXES_DDL + FTS_DDL:
+        conn.execute(ddl)
+    if not fts_existed:
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def create_menu_schema(conn: sqlite3.Connection) -> None:
+    """Cria a tabela ``pizza`` e as estruturas de busca."""
+    conn.execute(PIZZA_TABLE_DDL)
+    create_search_structures(conn)
+
+
+def fts_phrase(term: str, column: str = "ingredientes") -> str:
+    """
+    Expressão MATCH do FTS5 para uma frase restrita a uma coluna, com a
+    última palavra como prefixo (``"tomate"*`` também casa "tomates"), como
+    o antigo ``LIKE '%tomate%'``.
+    """
+    return f'{column} : "' + term.replace('"', '""') + '"*'
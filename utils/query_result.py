@@ -0,0 +1,218 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo query_result.py
+======================
+Resultado de consulta em formato colunar (``QueryResult``), construído em
+streaming a partir dos lotes do cursor (``fetchmany``):
+
+- guarda só as primeiras ``keep_rows`` linhas, coluna a coluna, com o
+  tipo de cada coluna (``integer``, ``real``, ``text``...);
+- conta todas as linhas lidas e mantém estatísticas incrementais por
+  coluna (mínimo, máximo e média dos números; contagem dos valores de
+  colunas categóricas, como ``tamanho``) e o top-N por ``preco``.
+
+A memória e o texto que vai para o prompt crescem com o resumo, não com o
+tamanho do resultado: acima de ``summary_threshold`` linhas,
+``to_prompt_text`` envia o resumo em vez das linhas. ``to_arrow`` monta
+uma tabela ``pyarrow`` (dependência do Streamlit) para a interface.
+"""
+import heapq
+import itertools
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+# Colunas de texto com até este número de valores distintos são tratadas como categóricas:
+MAX_CATEGORIES = 12
+
+# Coluna usada no top-N (quando presente no resultado):
+TOP_COLUMN = "preco"
+
+_TYPE_NAMES = {int: "integer", float: "real", str: "text", bytes: "blob"}
+
+
+@dataclass
+class ColumnStats:
+    """Estatísticas incrementais de uma coluna."""
+
+    name: str
+    type: str = "null"
+    non_null: int = 0
+    min: Any = None
+    max: Any = None
+    total: float = 0.0
+    categories: Optional[Counter] = field(default_factory=Counter)
+
+    @property
+    def numeric(self) -> bool:
+        return self.type in ("integer", "real")
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.non_null if self.numeric and self.non_null else None
+
+    def update(self, values: Sequence[Any]) -> None:
+        """Acumula os valores da coluna num lote (operações em C: ``min``, ``max``, ``sum``, ``Counter``)."""
+        values = [v for v in values if v is not None]
+        if not values:
+            return
+        types = {_TYPE_NAMES.get(type(v), "text") for v in values}
+        if self.type != "null":
+            types.add(self.type)
+        # SQLite não tem tipos rígidos: inteiro + real vira real; o resto vira texto.
+        self.type = types.pop() if len(types) == 1 else "real" if types == {"integer", "real"} else "text"
+        self.non_null += len(values)
+        if self.numeric:
+            self.total += sum(values)
+        try:
+            low, high = min(values), max(values)
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+        except TypeError:  # valores de tipos diferentes não se comparam
+            pass
+        if self.categories is not None:
+            if self.type != "text":
+                self.categories = None
+                return
+            self.categories.update(values)
+            if len(self.categories) > MAX_CATEGORIES:
+                self.categories = None
+
+    def describe(self) -> Optional[str]:
+        """Linha do resumo para o prompt (``None`` se não há o que resumir)."""
+        if self.numeric:
+            return f"{self.name}: mín {self.min}, máx {self.max}, média {self.mean:.2f}"
+        if self.type == "text" and self.categories:
+            counts = ", ".join(f"{value} ({count})" for value, count in self.categories.most_common())
+            return f"{self.name}: {counts}"
+        return None
+
+
+class QueryResult:
+    """Resultado colunar de uma consulta, com contagem e resumo de todas as linhas lidas."""
+
+    def __init__(self, columns: Sequence[str], keep_rows: int = 200, top_n: int = 5, summary_threshold: int = 50):
+        self.columns = list(columns)
+        self.keep_rows = keep_rows
+        self.top_n = top_n
+        self.summary_threshold = summary_threshold
+        self.data: dict[str, list] = {c: [] for c in self.columns}
+        self.stats = {c: ColumnStats(c) for c in self.columns}
+        self.row_count = 0
+        # Resultado cortado pelo limite de linhas da guarda (o total real é maior que ``row_count``):
+        self.truncated = False
+        self._top_index = self.columns.index(TOP_COLUMN) if TOP_COLUMN in self.columns else None
+        self._top: list[tuple] = []  # linhas do top-N, maior primeiro
+
+    def _top_key(self, row: tuple) -> float:
+        value = row[self._top_index]
+        return value if isinstance(value, (int, float)) else float("-inf")
+
+    @classmethod
+    def from_batches(cls, columns: Sequence[str], batches: Iterable[Sequence[tuple]], **kwargs: Any) -> "QueryResult":
+        result = cls(columns, **kwargs)
+        for batch in batches:
+            result.add_batch(batch)
+        return result
+
+    @classmethod
+    def from_rows(cls, rows: list[dict], **kwargs: Any) -> "QueryResult":
+        """Resultado a partir de linhas já materializadas (dicts)."""
+        columns = list(rows[0]) if rows else []
+        return cls.from_batches(columns, [[tuple(row.values()) for row in rows]], **kwargs)
+
+    def add_batch(self, batch: Sequence[tuple]) -> None:
+        """Acumula um lote de linhas (tuplas na ordem de ``columns``)."""
+        if not batch:
+            return
+        room = self.keep_rows - self.row_count
+        columns = list(zip(*batch))
+        for column, values in zip(self.columns, columns):
+            if room > 0:
+                self.data[column].extend(values[:room])
+            self.stats[column].update(values)
+        self.row_count += len(batch)
+        if self._top_index is not None:
+            # ``nlargest`` é estável: em empates, fica a linha lida primeiro.
+            batch_top = [
+                row for row in heapq.nlargest(self.top_n, batch, key=self._top_key)
+                if self._top_key(row) != float("-inf")
+            ]
+            self._top = heapq.nlargest(self.top_n, self._top + batch_top, key=self._top_key)
+
+    # ------------------------------------------------------------------
+    # Acesso
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self.row_count
+
+    @property
+    def types(self) -> dict[str, str]:
+        return {c: self.stats[c].type for c in self.columns}
+
+    @property
+    def kept_rows(self) -> int:
+        return min(self.row_count, self.keep_rows)
+
+    @property
+    def complete(self) -> bool:
+        """Todas as linhas do resultado estão em ``data``."""
+        return not self.truncated and self.row_count <= self.keep_rows
+
+    @property
+    def summarized(self) -> bool:
+        """O prompt recebe o resumo em vez das linhas."""
+        return self.truncated or self.row_count > self.summary_threshold
+
+    def iter_rows(self) -> Iterator[tuple]:
+        """Linhas guardadas, como tuplas."""
+        return zip(*(self.data[c] for c in self.columns)) if self.columns else iter(())
+
+    def rows(self) -> list[dict]:
+        """Linhas guardadas, como dicts (formato de ``db._execute``)."""
+        return [dict(zip(self.columns, row)) for row in self.iter_rows()]
+
+    def top(self) -> list[tuple]:
+        """Top-N linhas por ``preco`` (maior primeiro)."""
+        return [tuple(row) for row in self._top]
+
+    def to_arrow(self) -> Any:
+        """Tabela ``pyarrow`` com as linhas guardadas e os tipos das colunas."""
+        import pyarrow as pa
+
+        arrow_types = {"integer": pa.int64(), "real": pa.float64(), "blob": pa.binary(), "null": pa.null()}
+        arrays = []
+        for column in self.columns:
+            column_type = self.stats[column].type
+            values = self.data[column]
+            if column_type == "text":
+                values = [None if v is None else str(v) for v in values]
+            elif column_type == "real":
+                values = [None if v is None else float(v) for v in values]
+            arrays.append(pa.array(values, type=arrow_types.get(column_type, pa.string())))
+        return pa.Table.from_arrays(arrays, names=self.columns)
+
+    # ------------------------------------------------------------------
+    # Prompt
+    # ------------------------------------------------------------------
+    def summary_text(self, sample_rows: int = 5) -> str:
+        """Resumo do resultado: contagem, tipos, estatísticas, top-N e amostra."""
+        count = f"mais de {self.row_count}" if self.truncated else str(self.row_count)
+        lines = [
+            f"{count} linhas (resumo; as linhas completas não foram enviadas).",
+            "Colunas: " + ", ".join(f"{c} ({t})" for c, t in self.types.items()),
+        ]
+        lines += [text for stats in self.stats.values() if (text := stats.describe())]
+        if self._top:
+            lines.append(f"Top {len(self._top)} por {TOP_COLUMN}: {self.top()}")
+        sample = list(itertools.islice(self.iter_rows(), sample_rows))
+        lines.append(f"Primeiras {len(sample)} linhas: {sample}")
+        return "\n".join(lines)
+
+    def to_prompt_text(self) -> str:
+        """Linhas (resultados pequenos) ou resumo (acima de ``summary_threshold``)."""
+        if self.summarized:
+            return self.summary_text()
+        return str(list(self.iter_rows())) if self.row_count else ""
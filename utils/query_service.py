@@ -0,0 +1,677 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo query_service.py
+=======================
+Serviço de consultas compartilhado pelas três interfaces (CLI, Mesop e
+Streamlit). Todo o trabalho é assíncrono: o LLM é chamado com
+``ainvoke``/``astream`` sob um semáforo que limita a concorrência, e o
+SQL roda num pool de threads, de modo que sessões simultâneas não se
+serializam em chamadas bloqueantes.
+
+Interfaces síncronas (Streamlit, Mesop, CLI) usam os métodos ``ask``,
+``stream``, ``ask_agent`` e ``stream_agent``, que executam as corrotinas
+num event loop próprio do serviço, rodando em uma thread de fundo.
+
+Modos do pipeline (``pipeline_mode`` ou ``PIZZABOT_PIPELINE_MODE``):
+
+- ``two_call`` (padrão): o LLM gera o SQL e, numa segunda chamada,
+  redige a resposta;
+- ``single_call``: o LLM devolve o SQL como chamada de ferramenta
+  (``ExecutarSQL``), o SQL roda localmente e a resposta sai de um
+  template (``utils.answer_templates``); o LLM só é chamado de novo
+  para redigir resultados que os templates não cobrem.
+
+Todo SQL gerado passa pela ``SQLGuard`` (``utils.sql_guard``): só
+leituras, ``LIMIT`` automático, orçamento de tempo e resultado limitado
+em tokens antes de voltar ao prompt. O resultado chega como um
+``QueryResult`` colunar: resultados grandes vão ao prompt resumidos, e as
+interfaces podem desenhar a tabela a partir dele (``on_result``).
+
+Com uma ``ConversationMemory`` (``memory=``, uma por sessão), perguntas de
+acompanhamento sobre o último resultado são respondidas sem SQL nem LLM,
+e as demais vão ao LLM com o contexto da conversa
+(ver ``utils.conversation_memory``).
+
+Perguntas roteadas que os fatos pré-calculados do cardápio cobrem (mais
+cara/barata, contagem, cardápio, preço/ingredientes de uma pizza, ...)
+podem ser respondidas pelo ``MenuSnapshot`` em memória, sem SQL nem LLM
+(ver ``utils.menu_facts``; desligado por padrão, ``PIZZABOT_MENU_FACTS=1``
+liga).
+
+Com ``sql_candidates`` > 1 (``PIZZABOT_SQL_CANDIDATES``), o LLM escreve
+consultas alternativas, validadas pelo plano e executadas em paralelo
+(ver ``utils.sql_candidates``): se a primeira falha, outra já responde.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Union
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+
+from utils.answer_cache import AnswerCache, make_openai_embedder
+from utils.answer_templates import render_answer
+from utils.conversation_memory import ConversationMemory
+from utils.db_engine import get_sql_database
+from utils.menu_facts import MenuSnapshot
+from utils.query_result import QueryResult
+from utils.schema_context import SchemaContextProvider
+from utils.sql_agent import SQLAgentFactory, is_stopped
+from utils.sql_candidates import (
+    SINGLE_CALL_CANDIDATES_INSTRUCTION,
+    SQL_CANDIDATES_INSTRUCTION,
+    SpeculativeSQLRunner,
+    extract_sql_candidates,
+)
+from utils.sql_guard import SQLGuard
+from utils.sql_router import SQLTemplateRouter
+from utils.streaming import iter_async
+from utils.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+SQL_SYSTEM_PROMPT = """Você é um assistente de SQL especializado em traduzir perguntas em linguagem natural para consultas SQL.
+
+Você tem acesso ao banco de dados do cardápio, cujo esquema aparece mais abaixo.
+A tabela 'pizza' guarda nome (name), tamanho (Pequena, Média, Grande), preço (preco) e ingredientes de cada pizza.
+
+O usuário fará perguntas em linguagem natural sobre o cardápio de pizzas.
+Primeiro, traduza a pergunta para SQL. Em seguida, explique os resultados em português brasileiro, de forma amigável e útil.
+IMPORTANTE: Sempre responda em português brasileiro (pt-br).
+
+Exemplos:
+- "Quais pizzas contêm calabresa?" -> SELECT * FROM pizza WHERE ingredientes LIKE '%calabresa%'
+- "Qual a pizza mais cara?" -> SELECT * FROM pizza ORDER BY preco DESC LIMIT 1
+
+Aqui está o esquema do banco de dados:
+{schema}
+
+Lembre-se: sua resposta deve ser sempre em português brasileiro (pt-br) e ser útil para o cliente da pizzaria.
+"""
+
+ANSWER_SYSTEM_PROMPT = (
+    "Você é um atendente de pizzaria que responde perguntas sobre o cardápio. "
+    "SEMPRE responda em português brasileiro (pt-br), de forma amigável e prestativa."
+)
+
+# Variáveis no template (e não f-string) para que o prefixo do prompt seja sempre o mesmo:
+ANSWER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", ANSWER_SYSTEM_PROMPT),
+    ("human", "Pergunta original: {question}\n\nConsulta SQL executada: {sql}\n\nResultados da consulta: {result}\n\nForneca uma resposta útil e amigável em português brasileiro (pt-br):"),
+])
+
+SINGLE_CALL_SYSTEM_PROMPT = """Você é o atendente da pizzaria e consulta o cardápio em um banco SQLite.
+
+Para qualquer pergunta sobre o cardápio (pizzas, preços, tamanhos, ingredientes), chame a ferramenta
+ExecutarSQL com UMA única consulta SELECT que responda à pergunta. Não escreva o SQL no texto.
+Para mensagens que não dependem do cardápio (saudações, agradecimentos), responda diretamente,
+sempre em português brasileiro (pt-br).
+
+Aqui está o esquema do banco de dados:
+{schema}
+"""
+
+NO_SQL_MESSAGE = "Não consegui gerar uma consulta SQL válida para essa pergunta."
+
+PIPELINE_MODES = ("two_call", "single_call")
+
+
+class ExecutarSQL(BaseModel):
+    """Executa uma consulta SQL SELECT no banco de dados do cardápio de pizzas."""
+
+    query: str = Field(description="Consulta SQL SELECT (SQLite) que responde à pergunta do cliente.")
+
+
+def extract_sql(response: str) -> Optional[str]:
+    """Extrai a primeira linha ``SELECT`` da resposta do LLM."""
+    sql_lines = [line for line in response.split("\n") if line.strip().upper().startswith("SELECT")]
+    return sql_lines[0].strip() if sql_lines else None
+
+
+def tool_call_sqls(message: Any) -> list[str]:
+    """SQLs das chamadas à ferramenta ``ExecutarSQL`` na mensagem do LLM, na ordem."""
+    return [
+        tool_call["args"]["query"].strip()
+        for tool_call in getattr(message, "tool_calls", None) or []
+        if tool_call["name"] == ExecutarSQL.__name__ and tool_call["args"].get("query")
+    ]
+
+
+def tool_call_sql(message: Any) -> Optional[str]:
+    """SQL da chamada à ferramenta ``ExecutarSQL`` na mensagem do LLM (se houver)."""
+    queries = tool_call_sqls(message)
+    return queries[0] if queries else None
+
+
+@dataclass
+class PreparedAnswer:
+    """Resultado da etapa SQL de uma pergunta, antes da redação da resposta."""
+
+    question: str
+    sql: Optional[str] = None
+    result: str = ""
+    data: Optional[QueryResult] = None
+    # Resposta pronta (template ou resposta direta do LLM); ``None`` = o LLM deve redigir:
+    answer: Optional[str] = None
+
+    @property
+    def rows(self) -> Optional[list[dict]]:
+        """Linhas guardadas do resultado (``None`` se o SQL falhou)."""
+        return self.data.rows() if self.data is not None else None
+
+    def answer_inputs(self) -> dict:
+        """Entradas do ``ANSWER_PROMPT``."""
+        return {"question": self.question, "sql": self.sql, "result": self.result}
+
+
+class PizzaQueryService:
+    """Pipeline de consulta NL -> SQL -> resposta, assíncrono e seguro para concorrência."""
+
+    def __init__(
+        self,
+        db: Any,
+        llm: Any,
+        *,
+        max_llm_concurrency: int = 8,
+        sql_workers: int = 4,
+        sql_pool: Optional[ThreadPoolExecutor] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        sql_router: Optional[SQLTemplateRouter] = None,
+        schema_provider: Optional[SchemaContextProvider] = None,
+        tracer: Optional[Tracer] = None,
+        pipeline_mode: str = "two_call",
+        sql_agent: Optional[SQLAgentFactory] = None,
+        sql_guard: Optional[SQLGuard] = None,
+        menu_facts: Optional[MenuSnapshot] = None,
+        sql_candidates: int = 1,
+        sql_candidates_parallel: int = 2,
+    ):
+        if pipeline_mode not in PIPELINE_MODES:
+            raise ValueError(f"pipeline_mode inválido: '{pipeline_mode}' (use um de {PIPELINE_MODES})")
+        self.db = db
+        self.llm = llm
+        self.max_llm_concurrency = max_llm_concurrency
+        self.answer_cache = answer_cache
+        self.sql_router = sql_router
+        self.menu_facts = menu_facts
+        self.schema_provider = schema_provider
+        self.tracer = tracer or Tracer()
+        self.pipeline_mode = pipeline_mode
+        self.sql_guard = sql_guard or SQLGuard(db._engine)
+        self.sql_agent = sql_agent or SQLAgentFactory(llm, db, schema_provider, sql_guard=self.sql_guard)
+
+        # Pool externo (compartilhado entre lojas, ver ``utils.store_registry``) não é fechado aqui:
+        self._owns_sql_pool = sql_pool is None
+        self._sql_pool = sql_pool or ThreadPoolExecutor(max_workers=sql_workers, thread_name_prefix="pizzabot-sql")
+        # Um semáforo por event loop (semáforos do asyncio ficam presos ao loop em que são usados):
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+        # Consultas alternativas por pergunta (1 = só a primeira SELECT da resposta):
+        self.sql_candidates = max(1, sql_candidates)
+        self.candidate_runner = (
+            SpeculativeSQLRunner(self.sql_guard, self._sql_pool, max_parallel=sql_candidates_parallel)
+            if self.sql_candidates > 1
+            else None
+        )
+        sql_system_prompt, single_call_system_prompt = SQL_SYSTEM_PROMPT, SINGLE_CALL_SYSTEM_PROMPT
+        if self.candidate_runner is not None:
+            sql_system_prompt += SQL_CANDIDATES_INSTRUCTION.format(n=self.sql_candidates)
+            single_call_system_prompt += SINGLE_CALL_CANDIDATES_INSTRUCTION.format(n=self.sql_candidates)
+
+        prompt = ChatPromptTemplate.from_messages(
+            [("system", sql_system_prompt), ("human", "{input}\n\nSQL query:")]
+        )
+        # O esquema é passado na entrada ({"input", "schema"}) para ser medido como etapa própria:
+        self.sql_chain = prompt | llm | StrOutputParser()
+        self.answer_chain = ANSWER_PROMPT | llm | StrOutputParser()
+        self.tool_chain = None
+        if pipeline_mode == "single_call":
+            tool_prompt = ChatPromptTemplate.from_messages(
+                [("system", single_call_system_prompt), ("human", "{input}")]
+            )
+            self.tool_chain = tool_prompt | llm.bind_tools([ExecutarSQL])
+
+    @classmethod
+    def from_config(
+        cls,
+        db_path: str = "pizzas.db",
+        model_name: Optional[str] = None,
+        llm: Any = None,
+        engine_kwargs: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> "PizzaQueryService":
+        """
+        Cria o serviço com o DB SQLite, o LLM (``create_llm``: Groq ao vivo,
+        gravado ou reproduzido), o cache de respostas, o roteador SQL e os
+        fatos do cardápio.
+        ``engine_kwargs`` ajusta o pool do engine (ver ``utils.db_engine``).
+        """
+        logger.info("Conectando ao banco de dados SQLite '%s' (somente leitura)...", db_path)
+        db = get_sql_database(db_path, **(engine_kwargs or {}))
+
+        if llm is None:
+            # Importado aqui: o backend (Groq/armazém) só é carregado quando o LLM é criado.
+            from utils.llm_backend import create_llm
+
+            llm = create_llm(model_name) if model_name else create_llm()
+
+        kwargs.setdefault("answer_cache", AnswerCache(db_path=db_path, embed_fn=make_openai_embedder()))
+        kwargs.setdefault("sql_router", SQLTemplateRouter.from_sqlite(db_path))
+        kwargs.setdefault("tracer", Tracer.from_env())
+        kwargs.setdefault("pipeline_mode", os.getenv("PIZZABOT_PIPELINE_MODE", "two_call"))
+        kwargs.setdefault("sql_candidates", int(os.getenv("PIZZABOT_SQL_CANDIDATES", "1")))
+        kwargs.setdefault("sql_candidates_parallel", int(os.getenv("PIZZABOT_SQL_CANDIDATES_PARALLEL", "2")))
+        if "menu_facts" not in kwargs and os.getenv("PIZZABOT_MENU_FACTS", "0").lower() in ("1", "true", "yes"):
+            kwargs["menu_facts"] = MenuSnapshot.from_sqlite(db_path)
+        kwargs.setdefault(
+            "schema_provider",
+            SchemaContextProvider(
+                db, db_path, mode=os.getenv("PIZZABOT_SCHEMA_MODE", "auto"), facts=kwargs.get("menu_facts")
+            ),
+        )
+        kwargs.setdefault(
+            "sql_guard",
+            SQLGuard(
+                db._engine,
+                max_rows=int(os.getenv("PIZZABOT_SQL_MAX_ROWS", "10000")),
+                time_budget_s=float(os.getenv("PIZZABOT_SQL_TIME_BUDGET_S", "2")),
+                token_budget=int(os.getenv("PIZZABOT_SQL_TOKEN_BUDGET", "1000")),
+                summary_threshold=int(os.getenv("PIZZABOT_SQL_SUMMARY_ROWS", "50")),
+            ),
+        )
+        kwargs.setdefault(
+            "sql_agent",
+            SQLAgentFactory(
+                llm,
+                db,
+                kwargs["schema_provider"],
+                mode=os.getenv("PIZZABOT_AGENT_MODE", "bounded"),
+                max_iterations=int(os.getenv("PIZZABOT_AGENT_MAX_ITERATIONS", "6")),
+                max_execution_time=float(os.getenv("PIZZABOT_AGENT_TIME_BUDGET_S", "30")),
+                sql_guard=kwargs["sql_guard"],
+            ),
+        )
+        return cls(db, llm, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Infraestrutura assíncrona
+    # ------------------------------------------------------------------
+    def _llm_slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_llm_concurrency)
+        return semaphore
+
+    def _schema_context(self, _: Any = None) -> str:
+        if self.schema_provider is not None:
+            return self.schema_provider.get()
+        return self.db.get_table_info()
+
+    async def _run_sql(self, query: str, parameters: Optional[dict] = None) -> tuple[str, Optional[QueryResult]]:
+        """
+        Executa o SQL pela ``SQLGuard`` no pool de threads; retorna (texto para
+        o prompt, já limitado em tokens, e o ``QueryResult`` ou ``None`` se houve erro).
+        """
+
+        def run_query() -> tuple[str, Optional[QueryResult]]:
+            try:
+                logger.info("Executando consulta SQL: %s", query)
+                data = self.sql_guard.execute(query, parameters)
+                return self.sql_guard.to_prompt_text(data), data
+            except Exception as e:
+                logger.error("Erro ao executar consulta SQL: %s", e)
+                return f"Erro na consulta SQL: {e}", None
+
+        return await asyncio.get_running_loop().run_in_executor(self._sql_pool, run_query)
+
+    async def _cache_get(self, question: str) -> Optional[tuple[str, Any]]:
+        if self.answer_cache is None:
+            return None
+        if self.answer_cache.embed_fn is not None:
+            # O nível semântico chama a API de embeddings: não bloquear o event loop.
+            return await asyncio.to_thread(self.answer_cache.lookup, question)
+        return self.answer_cache.lookup(question)
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop de fundo usado pelos métodos síncronos."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="pizzabot-query-service", daemon=True
+                ).start()
+            return self._loop
+
+    # ------------------------------------------------------------------
+    # Pipeline SQL + resposta
+    # ------------------------------------------------------------------
+    async def _generate_sql(self, question: str, schema: str, trace: Any) -> Union[str, dict, None]:
+        """
+        Primeira chamada ao LLM: ``{"sql": ..., "candidates": [...]}``, uma
+        resposta direta (str) ou ``None``. ``candidates`` tem as consultas
+        alternativas (só a primeira se ``sql_candidates`` = 1).
+        """
+        config = {"callbacks": trace.callbacks()}
+        with trace.stage("sql_generation"):
+            async with self._llm_slot():
+                if self.tool_chain is None:
+                    response = await self.sql_chain.ainvoke({"input": question, "schema": schema}, config=config)
+                else:
+                    message = await self.tool_chain.ainvoke({"input": question, "schema": schema}, config=config)
+                    response = message.content if isinstance(message.content, str) else ""
+                    if queries := tool_call_sqls(message)[: self.sql_candidates]:
+                        return {"sql": queries[0], "candidates": queries}
+        queries = extract_sql_candidates(response, self.sql_candidates)
+        if queries:
+            return {"sql": queries[0], "candidates": queries}
+        if self.tool_chain is not None and response.strip():
+            # No modo single_call, o LLM responde diretamente o que não depende do cardápio:
+            return response.strip()
+        return None
+
+    async def _prepare_answer(
+        self, question: str, trace: Any, llm_input: Optional[str] = None
+    ) -> Optional[PreparedAnswer]:
+        """
+        Gera e executa o SQL (``None`` se não foi possível gerar um SQL).
+        ``llm_input`` (pergunta com o contexto da conversa) vai ao LLM no lugar
+        da pergunta e desliga o roteador, que só entende perguntas isoladas.
+        """
+        with trace.stage("route"):
+            routed = self.sql_router.route(question) if self.sql_router and llm_input is None else None
+        fact = None
+        if routed is not None and self.menu_facts is not None:
+            with trace.stage("menu_facts"):
+                fact = self.menu_facts.answer(routed)
+        if fact is not None:
+            # Caminho mais rápido: fatos pré-calculados, sem SQL e sem LLM:
+            trace.set(route=routed.template, menu_facts=fact.source)
+            sql_query = f"{routed.display_sql()} -- fatos do cardápio: {fact.source}"
+            data = QueryResult.from_rows(
+                fact.rows, keep_rows=self.sql_guard.keep_rows, summary_threshold=self.sql_guard.summary_threshold
+            )
+            sql_result = self.sql_guard.to_prompt_text(data)
+        elif routed is not None:
+            # Caminho rápido: consulta parametrizada sem a primeira chamada ao LLM:
+            trace.set(route=routed.template)
+            sql_query = routed.display_sql()
+            with trace.stage("sql_execution"):
+                sql_result, data = await self._run_sql(routed.sql, routed.params)
+        else:
+            loop = asyncio.get_running_loop()
+            with trace.stage("schema"):
+                schema = await loop.run_in_executor(self._sql_pool, self._schema_context)
+            question = llm_input or question
+            generated = await self._generate_sql(question, schema, trace)
+            if generated is None:
+                return None
+            if isinstance(generated, str):
+                return PreparedAnswer(question, answer=generated)
+            sql_query = generated["sql"]
+            with trace.stage("sql_execution"):
+                if self.candidate_runner is not None and len(generated["candidates"]) > 1:
+                    outcome = await self.candidate_runner.run(generated["candidates"])
+                    chosen = outcome.chosen
+                    sql_query, data = chosen.sql, chosen.data
+                    sql_result = self.sql_guard.to_prompt_text(data) if data is not None else chosen.error
+                    trace.set(
+                        sql_candidates=len(outcome.candidates),
+                        sql_candidates_valid=outcome.valid,
+                        sql_candidates_executed=outcome.executed,
+                        sql_candidate=chosen.rank,
+                    )
+                else:
+                    sql_result, data = await self._run_sql(sql_query)
+        trace.set(sql_rows=len(data or []))
+
+        prepared = PreparedAnswer(question, sql=sql_query, result=sql_result, data=data)
+        if fact is not None and not data.truncated:
+            # Em qualquer modo do pipeline: o LLM só redige o que os templates não cobrem.
+            with trace.stage("template"):
+                prepared.answer = fact.answer or render_answer(prepared.rows, total=len(data), sql=prepared.sql)
+            trace.set(answer_template=prepared.answer is not None)
+            return prepared
+        # Resultado cortado pela guarda: o total é desconhecido, então o LLM redige a partir do resumo.
+        if self.pipeline_mode == "single_call" and not (data is not None and data.truncated):
+            with trace.stage("template"):
+                prepared.answer = render_answer(
+                    prepared.rows, total=len(data) if data is not None else None, sql=prepared.sql
+                )
+            trace.set(answer_template=prepared.answer is not None)
+        return prepared
+
+    async def astream(
+        self,
+        question: str,
+        on_result: Optional[Callable[[QueryResult], None]] = None,
+        memory: Optional[ConversationMemory] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Produz a resposta token a token, assim que o LLM os gera. ``on_result``
+        recebe o ``QueryResult`` do SQL antes da resposta (para a tabela da interface).
+        ``memory`` resolve acompanhamentos e registra a pergunta respondida.
+        """
+        with self.tracer.request("sql", question) as trace:
+            llm_input = None
+            if memory is not None:
+                if (local_answer := memory.resolve(question)) is not None:
+                    trace.set(memory_resolved=True)
+                    # O resultado anterior continua sendo o alvo ("e a média?" -> "e a mais cara?"):
+                    memory.add_turn(question, local_answer, memory.last_sql, memory.last_result)
+                    yield local_answer
+                    return
+                if memory.is_follow_up(question):
+                    llm_input = memory.contextualize(question)
+                    trace.set(memory_follow_up=True)
+
+            # Acompanhamentos dependem da conversa: não passam pelo cache de respostas.
+            cached = None
+            if llm_input is None:
+                with trace.stage("cache"):
+                    cached = await self._cache_get(question)
+            trace.set(cache_hit=cached is not None)
+            if cached is not None:
+                cached_answer, (sql_query, data) = cached[0], cached[1] or (None, None)
+                if on_result is not None and data is not None:
+                    on_result(data)
+                if memory is not None:
+                    # O resultado guardado com a resposta é o alvo dos acompanhamentos ("e a média?"):
+                    memory.add_turn(question, cached_answer, sql_query, data)
+                yield cached_answer
+                return
+
+            start = time.perf_counter()
+            try:
+                prepared = await self._prepare_answer(question, trace, llm_input)
+                if prepared is None:
+                    yield NO_SQL_MESSAGE
+                    return
+                if on_result is not None and prepared.data is not None:
+                    on_result(prepared.data)
+
+                tokens = []
+                if prepared.answer is not None:
+                    trace.record("time_to_first_token", time.perf_counter() - start)
+                    tokens.append(prepared.answer)
+                    yield prepared.answer
+                else:
+                    with trace.stage("answer"):
+                        async with self._llm_slot():
+                            async for token in self.answer_chain.astream(
+                                prepared.answer_inputs(), config={"callbacks": trace.callbacks()}
+                            ):
+                                if not tokens:
+                                    trace.record("time_to_first_token", time.perf_counter() - start)
+                                tokens.append(token)
+                                yield token
+                # Só respostas de um SQL que rodou: um erro passageiro (tempo, consulta recusada)
+                # não é repetido a perguntas parecidas durante todo o TTL.
+                if self.answer_cache is not None and llm_input is None and prepared.data is not None:
+                    self.answer_cache.put(
+                        question, "".join(tokens), time.perf_counter() - start, payload=(prepared.sql, prepared.data)
+                    )
+                if memory is not None:
+                    memory.add_turn(question, "".join(tokens), prepared.sql, prepared.data)
+            except Exception as e:
+                logger.error("Erro ao processar consulta: %s", e)
+                trace.set(error=str(e))
+                yield f"Desculpe, não consegui processar sua pergunta. Erro: {str(e)}"
+
+    async def aask_with_details(self, question: str) -> tuple[str, Optional[PreparedAnswer]]:
+        """
+        Resposta completa e o SQL executado (com as linhas), sem passar pelo
+        cache de respostas; usado pela avaliação em lote (``utils.batch_eval``).
+        """
+        with self.tracer.request("sql", question) as trace:
+            prepared = await self._prepare_answer(question, trace)
+            if prepared is None:
+                return NO_SQL_MESSAGE, None
+            if prepared.answer is None:
+                with trace.stage("answer"):
+                    async with self._llm_slot():
+                        prepared.answer = await self.answer_chain.ainvoke(
+                            prepared.answer_inputs(), config={"callbacks": trace.callbacks()}
+                        )
+            return prepared.answer, prepared
+
+    async def aask(self, question: str, memory: Optional[ConversationMemory] = None) -> str:
+        """Responde à pergunta (resposta completa)."""
+        return "".join([token async for token in self.astream(question, memory=memory)])
+
+    def stream(
+        self,
+        question: str,
+        on_result: Optional[Callable[[QueryResult], None]] = None,
+        memory: Optional[ConversationMemory] = None,
+    ) -> Iterator[str]:
+        """Versão síncrona de ``astream`` (para Streamlit)."""
+        return iter_async(self.astream(question, on_result, memory), self._event_loop())
+
+    def ask(self, question: str, memory: Optional[ConversationMemory] = None) -> str:
+        """Versão síncrona de ``aask``."""
+        return asyncio.run_coroutine_threadsafe(self.aask(question, memory), self._event_loop()).result()
+
+    # ------------------------------------------------------------------
+    # Agente SQL (create_sql_agent)
+    # ------------------------------------------------------------------
+    @property
+    def agent_executor(self) -> Any:
+        """Agente SQL da versão atual do DB (ver ``utils.sql_agent``)."""
+        return self.sql_agent.get()
+
+    def _agent_timeout(self) -> Optional[float]:
+        return self.sql_agent.max_execution_time if self.sql_agent.mode == "bounded" else None
+
+    @staticmethod
+    def _agent_input(question: str, memory: Optional[ConversationMemory]) -> tuple[str, Optional[str]]:
+        """(entrada do agente, resposta local do acompanhamento ou ``None``)."""
+        if memory is None:
+            return question, None
+        if (local_answer := memory.resolve(question)) is not None:
+            memory.add_turn(question, local_answer, memory.last_sql, memory.last_result)
+            return question, local_answer
+        # Só os acompanhamentos levam o contexto da conversa; a instrução (ex.: o idioma) vai sempre:
+        if memory.is_follow_up(question):
+            return memory.contextualize(question), None
+        return f"{memory.instruction}{question}", None
+
+    async def aask_agent(self, question: str, memory: Optional[ConversationMemory] = None) -> str:
+        """Responde à pergunta com o agente SQL; se o orçamento estourar, usa o pipeline SQL."""
+        agent_input, local_answer = self._agent_input(question, memory)
+        if local_answer is not None:
+            return local_answer
+        output = None
+        with self.tracer.request("agent", question) as trace:
+            try:
+                with trace.stage("agent"):
+                    async with self._llm_slot():
+                        result = await asyncio.wait_for(
+                            self.agent_executor.ainvoke(agent_input, config={"callbacks": trace.callbacks()}),
+                            timeout=self._agent_timeout(),
+                        )
+                output = result["output"]
+            except asyncio.TimeoutError:
+                logger.warning("Agente SQL excedeu %ss; usando o pipeline SQL.", self._agent_timeout())
+            trace.set(agent_fallback=is_stopped(output))
+        if is_stopped(output):
+            # Pergunta original: o pipeline aplica roteador, cache e contexto (e registra a pergunta na memória).
+            return await self.aask(question, memory)
+        if memory is not None:
+            memory.add_turn(question, output)
+        return output
+
+    async def astream_agent(self, question: str, memory: Optional[ConversationMemory] = None) -> AsyncIterator[str]:
+        """Produz os tokens de texto do agente SQL (ignora chamadas de ferramenta)."""
+        agent_input, local_answer = self._agent_input(question, memory)
+        if local_answer is not None:
+            yield local_answer
+            return
+        streamed = False
+        stopped = False
+        tokens = []
+        with self.tracer.request("agent", question) as trace, trace.stage("agent"):
+            async with self._llm_slot():
+                async for event in self.agent_executor.astream_events(
+                    agent_input, version="v2", config={"callbacks": trace.callbacks()}
+                ):
+                    if event["event"] == "on_chain_end" and event.get("parent_ids") == []:
+                        output = (event["data"].get("output") or {}).get("output")
+                        stopped = is_stopped(output)
+                        # LLMs sem suporte a streaming: entrega a resposta completa de uma vez.
+                        if not streamed and not stopped:
+                            tokens.append(output)
+                            yield output
+                        continue
+                    if event["event"] != "on_chat_model_stream":
+                        continue
+                    chunk = event["data"]["chunk"]
+                    if getattr(chunk, "tool_call_chunks", None) or not chunk.content:
+                        continue
+                    streamed = True
+                    tokens.append(chunk.content)
+                    yield chunk.content
+            trace.set(agent_fallback=stopped and not streamed)
+        if stopped and not streamed:
+            # Orçamento de iterações/tempo estourado: responde pelo pipeline SQL, com a pergunta
+            # original (o pipeline aplica roteador, cache e contexto e registra a pergunta na memória).
+            async for token in self.astream(question, memory=memory):
+                yield token
+            return
+        if memory is not None:
+            memory.add_turn(question, "".join(tokens))
+
+    def ask_agent(self, question: str, memory: Optional[ConversationMemory] = None) -> str:
+        """Versão síncrona de ``aask_agent`` (para a CLI)."""
+        return asyncio.run_coroutine_threadsafe(self.aask_agent(question, memory), self._event_loop()).result()
+
+    def stream_agent(self, question: str, memory: Optional[ConversationMemory] = None) -> Iterator[str]:
+        """Versão síncrona de ``astream_agent`` (para o Mesop)."""
+        return iter_async(self.astream_agent(question, memory), self._event_loop())
+
+    def warm_up(self, agent: bool = False) -> None:
+        """Adianta o custo da primeira pergunta: contexto de esquema, conexão ao DB e, opcionalmente, o agente SQL."""
+        self._schema_context()
+        self.sql_guard.execute("SELECT 1")
+        if agent:
+            self.sql_agent.get()
+
+    def close(self) -> None:
+        """Libera o pool de SQL (se for próprio) e o event loop de fundo."""
+        if self._owns_sql_pool:
+            self._sql_pool.shutdown(wait=False)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
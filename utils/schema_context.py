@@ -0,0 +1,119 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo schema_context.py
+========================
+Fornece o contexto de esquema injetado no prompt de SQL. Antes, cada
+requisição chamava ``db.get_table_info()``, que reflete o esquema e roda
+SELECTs de linhas de exemplo. Aqui o texto é calculado uma única vez e
+reaproveitado enquanto ``PRAGMA schema_version``/``data_version`` não
+mudarem.
+
+Modos:
+    - ``full``: saída de ``get_table_info()`` (DDL + linhas de exemplo);
+    - ``compact``: uma linha por tabela, com colunas, tipos e valores de
+      colunas de baixa cardinalidade, limitada a um orçamento de tokens;
+    - ``auto``: ``full`` enquanto houver uma só tabela e couber no
+      orçamento, ``compact`` caso contrário.
+
+Com ``facts`` (um ``utils.menu_facts.MenuSnapshot``), o texto termina com
+os fatos pré-calculados do cardápio (preços por tamanho, mais cara e mais
+barata), para o LLM citá-los em vez de agregar a tabela ``pizza``.
+"""
+import logging
+import threading
+from typing import Any, Optional
+
+from utils.db_engine import connect_reader
+from utils.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_MODES = ("full", "compact", "auto")
+
+
+class SchemaContextProvider:
+    """Contexto de esquema em cache, versionado pelos PRAGMAs do SQLite."""
+
+    def __init__(
+        self,
+        db: Any,
+        db_path: str = "pizzas.db",
+        mode: str = "auto",
+        token_budget: int = 400,
+        max_enum_values: int = 10,
+        facts: Any = None,
+    ):
+        if mode not in SCHEMA_MODES:
+            raise ValueError(f"Modo de esquema inválido: {mode!r} (use um de {SCHEMA_MODES})")
+        self.db = db
+        self.mode = mode
+        self.token_budget = token_budget
+        self.max_enum_values = max_enum_values
+        self.facts = facts
+
+        # Conexão dedicada e persistente: ``data_version`` só detecta commits
+        # de *outras* conexões quando consultado sempre na mesma conexão.
+        self._conn = connect_reader(db_path)
+        self._lock = threading.Lock()
+        self._version: Optional[tuple[int, int]] = None
+        self._context = ""
+        self.rebuilds = 0
+
+    def version(self) -> tuple[int, int]:
+        """Par (schema_version, data_version) atual do banco."""
+        with self._lock:
+            schema_version = self._conn.execute("PRAGMA schema_version").fetchone()[0]
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return schema_version, data_version
+
+    def get(self, _: Any = None) -> str:
+        """Texto do esquema para o prompt (aceita e ignora a entrada do Runnable)."""
+        version = self.version()
+        if version != self._version:
+            self._context = self._build()
+            self._version = version
+            self.rebuilds += 1
+            logger.info(
+                "Contexto de esquema recalculado (versão %s, ~%d tokens)", version, count_tokens(self._context)
+            )
+        return self._context
+
+    def _build(self) -> str:
+        schema = self._schema()
+        facts = self.facts.prompt_text() if self.facts is not None else ""
+        return f"{schema}\n\n{facts}" if facts else schema
+
+    def _schema(self) -> str:
+        if self.mode == "compact":
+            return self._compact()
+        full = self.db.get_table_info()
+        if self.mode == "full":
+            return full
+        if len(self.db.get_usable_table_names()) == 1 and count_tokens(full) <= self.token_budget:
+            return full
+        return self._compact()
+
+    def _compact(self) -> str:
+        lines = []
+        with self._lock:
+            for table in self.db.get_usable_table_names():
+                columns = []
+                for _, name, col_type, notnull, _, pk in self._conn.execute(f'PRAGMA table_info("{table}")'):
+                    column = f"{name} {col_type or 'ANY'}{' PK' if pk else ''}"
+                    if col_type.upper() == "TEXT" and not pk:
+                        values = [
+                            row[0]
+                            for row in self._conn.execute(
+                                f'SELECT DISTINCT "{name}" FROM "{table}" LIMIT {self.max_enum_values + 1}'
+                            )
+                        ]
+                        if len(values) <= self.max_enum_values:
+                            column += " {" + ", ".join(map(str, values)) + "}"
+                    columns.append(column)
+                lines.append(f"{table}({', '.join(columns)})")
+        return truncate_to_tokens("\n".join(lines), self.token_budget)
+
+    def close(self) -> None:
+        self._conn.close()
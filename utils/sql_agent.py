@@ -0,0 +1,253 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo sql_agent.py
+===================
+Configuração do agente SQL (``create_sql_agent``, ``openai-tools``).
+
+No modo ``legacy`` o agente é o padrão do LangChain: a cada pergunta ele
+gasta iterações do LLM chamando ``sql_db_list_tables``, ``sql_db_schema``
+e ``sql_db_query_checker`` antes de rodar a consulta de verdade.
+
+No modo ``bounded`` (padrão):
+
+- a lista de tabelas e o esquema (``SchemaContextProvider``) já vão no
+  prompt, e o agente é recriado só quando a versão do DB muda;
+- as saídas das ferramentas do toolkit são memoizadas por versão do DB
+  (``ToolOutputCache``), menos os erros (um tempo estourado pode passar
+  na próxima tentativa); o ``sql_db_query_checker``, que custa uma
+  chamada extra ao LLM, fica de fora;
+- ``max_iterations`` e ``max_execution_time`` limitam o laço. Quando o
+  orçamento estoura, ``is_stopped`` sinaliza ao serviço que deve responder
+  pelo pipeline SQL comum;
+- com ``sql_guard``, o ``sql_db_query`` roda pela ``SQLGuard`` (só
+  leituras, ``LIMIT``, orçamento de tempo e de tokens).
+
+O ``langchain_community`` (toolkit e ``create_sql_agent``) só é importado
+quando o agente é construído pela primeira vez.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional
+
+from utils.schema_context import SchemaContextProvider
+from utils.sql_guard import SQLGuard
+
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+AGENT_MODES = ("bounded", "legacy")
+
+# Saída do AgentExecutor quando max_iterations/max_execution_time estouram:
+AGENT_STOPPED_PREFIX = "Agent stopped"
+
+# Saída das ferramentas de SQL quando a consulta falha (não é memoizada):
+TOOL_ERROR_PREFIX = "Error:"
+
+BOUNDED_PREFIX = """Você é um agente que consulta o banco de dados {dialect} do cardápio de uma pizzaria.
+Dada a pergunta, escreva uma consulta {dialect} sintaticamente correta, execute-a com a ferramenta sql_db_query,
+observe o resultado e responda. A menos que o usuário peça um número específico de exemplos, limite a consulta a
+no máximo {top_k} resultados e selecione só as colunas relevantes.
+
+NÃO execute comandos DML (INSERT, UPDATE, DELETE, DROP etc.).
+
+As tabelas e o esquema do banco JÁ estão abaixo: não é preciso listar as tabelas nem consultar o esquema.
+Se a consulta der erro, corrija-a e tente de novo.
+
+Tabelas: {tables}
+
+Esquema:
+{schema}
+"""
+
+BOUNDED_SUFFIX = "O esquema já está no contexto; vou escrever a consulta e executá-la direto com sql_db_query."
+
+
+def is_stopped(output: Optional[str]) -> bool:
+    """Indica se o agente parou por limite de iterações/tempo (ou não respondeu)."""
+    return not output or output.startswith(AGENT_STOPPED_PREFIX)
+
+
+class ToolOutputCache:
+    """LRU das saídas (sem erro) das ferramentas do agente, descartada quando a versão do DB muda."""
+
+    def __init__(self, version_fn: Callable[[], Hashable], max_entries: int = 256):
+        self.version_fn = version_fn
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[str, str], str]" = OrderedDict()
+        self._version: Hashable = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_run(self, tool_name: str, tool_input: dict, run: Callable[[], str]) -> str:
+        key = (tool_name, json.dumps(tool_input, sort_keys=True, ensure_ascii=False))
+        version = self.version_fn()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        output = run()
+        if output.startswith(TOOL_ERROR_PREFIX):
+            return output
+        with self._lock:
+            if self._version == version:
+                self._entries[key] = output
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return output
+
+
+def memoize_tool(tool: "BaseTool", cache: ToolOutputCache) -> "BaseTool":
+    """Ferramenta com o mesmo nome/descrição/argumentos cuja saída passa pelo ``cache``."""
+    from langchain_core.tools import StructuredTool
+
+    def run(**tool_input: Any) -> str:
+        return cache.get_or_run(tool.name, tool_input, lambda: str(tool.invoke(tool_input)))
+
+    return StructuredTool.from_function(
+        func=run, name=tool.name, description=tool.description, args_schema=tool.args_schema
+    )
+
+
+def guard_tool(tool: "BaseTool", guard: SQLGuard) -> "BaseTool":
+    """``sql_db_query`` executado pela ``SQLGuard`` (erros voltam ao agente como texto, como no original)."""
+    from langchain_core.tools import StructuredTool
+
+    def run(query: str) -> str:
+        try:
+            return guard.to_prompt_text(guard.execute(query))
+        except Exception as e:
+            return f"{TOOL_ERROR_PREFIX} {e}"
+
+    return StructuredTool.from_function(
+        func=run, name=tool.name, description=tool.description, args_schema=tool.args_schema
+    )
+
+
+class MemoizedSQLDatabaseToolkit:
+    """
+    ``SQLDatabaseToolkit`` cujas ferramentas passam pelo ``ToolOutputCache``
+    (sem o ``query_checker``); com ``sql_guard``, o ``sql_db_query`` roda
+    pela guarda. Composição em vez de herança: a classe do toolkit só é
+    importada quando o agente é construído.
+    """
+
+    def __init__(self, db: Any, llm: Any, tool_cache: ToolOutputCache, sql_guard: Optional[SQLGuard] = None):
+        from langchain_community.agent_toolkits import SQLDatabaseToolkit
+
+        self.toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+        self.tool_cache = tool_cache
+        self.sql_guard = sql_guard
+
+    @property
+    def dialect(self) -> str:
+        return self.toolkit.dialect
+
+    def get_context(self) -> dict:
+        return self.toolkit.get_context()
+
+    def get_tools(self) -> list["BaseTool"]:
+        tools = []
+        for tool in self.toolkit.get_tools():
+            if tool.name == "sql_db_query_checker":
+                continue
+            if tool.name == "sql_db_query" and self.sql_guard is not None:
+                tool = guard_tool(tool, self.sql_guard)
+            tools.append(memoize_tool(tool, self.tool_cache))
+        return tools
+
+
+class SQLAgentFactory:
+    """Cria (e recria quando o DB muda) o ``AgentExecutor`` do agente SQL."""
+
+    def __init__(
+        self,
+        llm: Any,
+        db: Any,
+        schema_provider: Optional[SchemaContextProvider] = None,
+        *,
+        mode: str = "bounded",
+        max_iterations: int = 6,
+        max_execution_time: float = 30.0,
+        top_k: int = 10,
+        sql_guard: Optional[SQLGuard] = None,
+    ):
+        if mode not in AGENT_MODES:
+            raise ValueError(f"Modo de agente inválido: {mode!r} (use um de {AGENT_MODES})")
+        self.llm = llm
+        self.db = db
+        self.schema_provider = schema_provider
+        self.mode = mode
+        self.max_iterations = max_iterations
+        self.max_execution_time = max_execution_time
+        self.top_k = top_k
+        self.sql_guard = sql_guard
+        self.tool_cache = ToolOutputCache(self.version)
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_version: Hashable = None
+
+    def version(self) -> Hashable:
+        """Versão do DB que invalida o agente e o cache das ferramentas."""
+        return self.schema_provider.version() if self.schema_provider is not None else 0
+
+    def get(self) -> Any:
+        """``AgentExecutor`` da versão atual do DB."""
+        version = self.version() if self.mode == "bounded" else None
+        with self._lock:
+            if self._executor is None or version != self._executor_version:
+                self._executor = self._build()
+                self._executor_version = version
+            return self._executor
+
+    def _build(self) -> Any:
+        from langchain_community.agent_toolkits import create_sql_agent
+        from langchain_core.messages import AIMessage, SystemMessage
+        from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder
+
+        if self.mode == "legacy":
+            logger.info("Criando o agente SQL (modo legacy)...")
+            return create_sql_agent(llm=self.llm, db=self.db, agent_type="openai-tools", verbose=False)
+
+        logger.info(
+            "Criando o agente SQL (modo bounded, max_iterations=%d, max_execution_time=%ss)...",
+            self.max_iterations,
+            self.max_execution_time,
+        )
+        schema = self.schema_provider.get() if self.schema_provider is not None else self.db.get_table_info()
+        prefix = BOUNDED_PREFIX.format(
+            dialect=self.db.dialect,
+            top_k=self.top_k,
+            tables=", ".join(self.db.get_usable_table_names()),
+            schema=schema,
+        )
+        # Prompt já pronto (create_sql_agent não o reformata), com esquema e tabelas embutidos:
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(content=prefix),
+            HumanMessagePromptTemplate.from_template("{input}"),
+            AIMessage(content=BOUNDED_SUFFIX),
+            MessagesPlaceholder(variable_name="agent_scratchpad"),
+        ])
+        return create_sql_agent(
+            llm=self.llm,
+            toolkit=MemoizedSQLDatabaseToolkit(
+                db=self.db, llm=self.llm, tool_cache=self.tool_cache, sql_guard=self.sql_guard
+            ),
+            agent_type="openai-tools",
+            prompt=prompt,
+            max_iterations=self.max_iterations,
+            max_execution_time=self.max_execution_time,
+            verbose=False,
+        )
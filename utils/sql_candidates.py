@@ -0,0 +1,182 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo sql_candidates.py
+========================
+Execução especulativa de consultas candidatas. Com
+``PIZZABOT_SQL_CANDIDATES`` > 1, o LLM escreve várias consultas SELECT
+alternativas (da mais provável para a menos provável) e, em vez de ficar
+só com a primeira:
+
+1. todas são validadas em paralelo com ``EXPLAIN QUERY PLAN``
+   (``SQLGuard.explain``): compila sem executar, então erros de sintaxe,
+   colunas inexistentes e escritas são descartados em microssegundos;
+2. o primeiro lote, de ``max_parallel`` candidatas, roda em paralelo no
+   pool de leitores: sempre a válida mais bem colocada pelo LLM e, nas
+   vagas restantes, as mais baratas pelo plano (``plan_cost``: varredura
+   completa > varredura de índice > ordenação temporária > busca por
+   índice); só se todas falharem, roda o próximo lote, também por custo;
+3. vence a candidata mais bem colocada pelo LLM que rodou sem erro e
+   devolveu linhas; se nenhuma devolveu linhas, a melhor que rodou sem
+   erro; se todas falharam, o erro da primeira.
+
+Uma consulta com erro deixa de custar uma nova pergunta ao cliente (ou
+uma segunda ida ao LLM): a alternativa já está pronta na mesma rodada.
+"""
+import asyncio
+import logging
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.query_result import QueryResult
+from utils.sql_guard import SQLGuard
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada passo do plano do SQLite (o primeiro prefixo que casar):
+_PLAN_WEIGHTS = (
+    ("SEARCH", 5),
+    ("SCAN CONSTANT ROW", 1),
+    ("USE TEMP B-TREE", 10),
+)
+_FULL_SCAN_WEIGHT = 100
+_INDEX_SCAN_WEIGHT = 20
+_VIRTUAL_TABLE_WEIGHT = 5
+
+SQL_CANDIDATES_INSTRUCTION = """
+Escreva até {n} consultas SQL SELECT alternativas para a pergunta, uma por linha e sem numeração,
+da mais provável para a menos provável (por exemplo, variando filtros, acentos ou a forma de busca).
+"""
+
+SINGLE_CALL_CANDIDATES_INSTRUCTION = """
+Para perguntas sobre o cardápio, você pode chamar a ferramenta ExecutarSQL até {n} vezes, com consultas
+alternativas, da mais provável para a menos provável.
+"""
+
+
+def extract_sql_candidates(response: str, limit: int) -> list[str]:
+    """Linhas ``SELECT`` distintas da resposta do LLM, na ordem em que aparecem (até ``limit``)."""
+    candidates: list[str] = []
+    seen = set()
+    for line in response.split("\n"):
+        sql = line.strip()
+        if not sql.upper().startswith("SELECT"):
+            continue
+        key = " ".join(sql.rstrip(";").split()).lower()
+        if key not in seen:
+            seen.add(key)
+            candidates.append(sql)
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+def plan_cost(plan: list[str]) -> int:
+    """Custo relativo de um plano de ``EXPLAIN QUERY PLAN`` (menor = mais barato)."""
+    cost = 0
+    for detail in plan:
+        step = detail.upper()
+        if step.startswith("SCAN"):
+            if "VIRTUAL TABLE" in step:
+                cost += _VIRTUAL_TABLE_WEIGHT
+            elif " USING " in step:
+                # Varredura de índice (ex.: ORDER BY preco LIMIT 1 pára cedo):
+                cost += _INDEX_SCAN_WEIGHT
+            elif "CONSTANT ROW" in step:
+                cost += 1
+            else:
+                cost += _FULL_SCAN_WEIGHT
+            continue
+        cost += next((weight for prefix, weight in _PLAN_WEIGHTS if step.startswith(prefix)), 1)
+    return cost
+
+
+@dataclass
+class Candidate:
+    """Uma consulta candidata e o que aconteceu com ela."""
+
+    rank: int
+    sql: str
+    cost: Optional[int] = None
+    error: Optional[str] = None
+    data: Optional[QueryResult] = None
+    executed: bool = False
+
+    @property
+    def valid(self) -> bool:
+        return self.cost is not None
+
+
+@dataclass
+class CandidateOutcome:
+    """Candidata escolhida (ou a que falhou primeiro) e o resumo da rodada."""
+
+    chosen: Candidate
+    candidates: list[Candidate]
+
+    @property
+    def valid(self) -> int:
+        return sum(c.valid for c in self.candidates)
+
+    @property
+    def executed(self) -> int:
+        return sum(c.executed for c in self.candidates)
+
+
+class SpeculativeSQLRunner:
+    """Valida as candidatas pelo plano e executa a preferida do LLM e as mais baratas em paralelo."""
+
+    def __init__(self, sql_guard: SQLGuard, executor: Executor, max_parallel: int = 2):
+        self.sql_guard = sql_guard
+        self.executor = executor
+        self.max_parallel = max(1, max_parallel)
+        self.rounds = 0
+        self.rescued = 0  # rodadas em que a primeira candidata falhou e outra respondeu
+
+    def _validate(self, candidate: Candidate) -> Candidate:
+        try:
+            candidate.cost = plan_cost(self.sql_guard.explain(candidate.sql))
+        except Exception as e:
+            candidate.error = f"Erro na consulta SQL: {e}"
+        return candidate
+
+    def _execute(self, candidate: Candidate) -> Candidate:
+        candidate.executed = True
+        try:
+            logger.info("Executando consulta SQL candidata %d: %s", candidate.rank, candidate.sql)
+            candidate.data = self.sql_guard.execute(candidate.sql)
+        except Exception as e:
+            logger.error("Erro ao executar consulta SQL candidata %d: %s", candidate.rank, e)
+            candidate.error = f"Erro na consulta SQL: {e}"
+        return candidate
+
+    async def run(self, queries: list[str]) -> CandidateOutcome:
+        """Escolhe e executa uma das ``queries`` (ordenadas pela preferência do LLM)."""
+        loop = asyncio.get_running_loop()
+        candidates = [Candidate(rank, sql) for rank, sql in enumerate(queries)]
+        await asyncio.gather(*(loop.run_in_executor(self.executor, self._validate, c) for c in candidates))
+
+        valid = [c for c in candidates if c.valid]
+        # A preferida do LLM roda sempre no primeiro lote; as demais vagas vão para as mais baratas:
+        valid = valid[:1] + sorted(valid[1:], key=lambda c: (c.cost, c.rank))
+        succeeded: list[Candidate] = []
+        # Lotes de ``max_parallel``: o próximo lote só roda se todas as do anterior falharam.
+        for start in range(0, len(valid), self.max_parallel):
+            batch = valid[start : start + self.max_parallel]
+            await asyncio.gather(*(loop.run_in_executor(self.executor, self._execute, c) for c in batch))
+            succeeded = sorted((c for c in candidates if c.data is not None), key=lambda c: c.rank)
+            if succeeded:
+                break
+
+        failed = next(c for c in candidates if c.error is not None) if not succeeded else None
+        chosen = next((c for c in succeeded if len(c.data)), succeeded[0]) if succeeded else failed
+        self.rounds += 1
+        if chosen.rank > 0 and chosen.data is not None and candidates[0].error is not None:
+            self.rescued += 1
+        logger.info(
+            "Candidatas SQL: %d geradas, %d válidas, %d executadas, escolhida a %d",
+            len(candidates), len(valid), sum(c.executed for c in candidates), chosen.rank,
+        )
+        return CandidateOutcome(chosen, candidates)
@@ -0,0 +1,190 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo sql_guard.py
+===================
+Guarda de execução para o SQL gerado pelo LLM, com custo limitado no
+pior caso:
+
+- o *authorizer* do SQLite só permite leitura (SELECT, leitura de
+  colunas, funções e CTEs recursivas); qualquer outra operação (DML, DDL,
+  PRAGMA, ATTACH...) é recusada já na compilação, com ``UnsafeQueryError``;
+- a consulta é envolvida num ``LIMIT`` automático (``max_rows`` + 1 para
+  detectar o corte) e o cursor nunca lê além disso;
+- as linhas são lidas em lotes (``fetchmany``) para um ``QueryResult``
+  colunar, que guarda só as primeiras ``keep_rows`` e resume o resto;
+- um *progress handler* interrompe a consulta que passar de
+  ``time_budget_s`` (``QueryTimeoutError``), o que protege os workers de
+  produtos cartesianos e varreduras enormes;
+- o texto do resultado que vai para o prompt (as linhas ou, acima de
+  ``summary_threshold`` linhas, o resumo) é limitado a ``token_budget``
+  tokens (``to_prompt_text``).
+
+O ``sqlglot`` não faz parte das dependências do projeto; o authorizer do
+próprio SQLite cobre a validação sem custo extra de parsing.
+"""
+import logging
+import re
+import sqlite3
+import time
+from typing import Any, Optional
+
+from utils.query_result import QueryResult
+from utils.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+_ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+
+# Ações internas do FTS5 ao abrir a tabela virtual (a conexão já é somente leitura):
+_VTAB_INTERNAL_ACTIONS = {
+    (sqlite3.SQLITE_PRAGMA, "data_version"),
+    (sqlite3.SQLITE_UPDATE, "sqlite_master"),
+}
+
+_READ_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+# Passos da VM do SQLite entre verificações do orçamento de tempo:
+PROGRESS_STEPS = 10_000
+
+# Linhas por lote lido do cursor:
+FETCH_BATCH_SIZE = 500
+
+
+class UnsafeQueryError(ValueError):
+    """Consulta recusada pela guarda (não é uma leitura simples)."""
+
+
+class QueryTimeoutError(TimeoutError):
+    """Consulta interrompida por exceder o orçamento de tempo."""
+
+
+def _authorizer(action: int, arg1: Optional[str], *_: Any) -> int:
+    if action in _ALLOWED_ACTIONS or (action, arg1) in _VTAB_INTERNAL_ACTIONS:
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
+
+class SQLGuard:
+    """Executa SELECTs com authorizer, LIMIT automático e orçamento de tempo."""
+
+    def __init__(
+        self,
+        engine: Any,
+        max_rows: int = 10_000,
+        time_budget_s: float = 2.0,
+        token_budget: int = 1000,
+        keep_rows: int = 200,
+        summary_threshold: int = 50,
+    ):
+        self.engine = engine
+        self.max_rows = max_rows
+        self.time_budget_s = time_budget_s
+        self.token_budget = token_budget
+        self.keep_rows = keep_rows
+        self.summary_threshold = summary_threshold
+        self.rejected = 0
+        self.timeouts = 0
+        self.truncated = 0
+
+    @staticmethod
+    def _strip(sql: str) -> str:
+        sql = sql.strip().rstrip(";").strip()
+        if not sql:
+            raise UnsafeQueryError("Consulta SQL vazia.")
+        if not _READ_STATEMENT.match(sql):
+            raise UnsafeQueryError(f"Apenas consultas SELECT são permitidas: {sql}")
+        return sql
+
+    def limited_sql(self, sql: str) -> str:
+        """SQL envolvido no LIMIT automático (uma linha a mais para detectar o corte)."""
+        # Quebras de linha: um comentário "--" no fim do SQL não engole o LIMIT.
+        return f"SELECT * FROM (\n{self._strip(sql)}\n) LIMIT {self.max_rows + 1}"
+
+    def execute(self, sql: str, parameters: Optional[dict] = None) -> QueryResult:
+        """Executa o SELECT e lê o resultado em lotes (``truncated`` = cortado em ``max_rows``)."""
+        try:
+            limited = self.limited_sql(sql)
+        except UnsafeQueryError:
+            self.rejected += 1
+            raise
+        deadline = time.perf_counter() + self.time_budget_s
+
+        def progress() -> int:
+            return 1 if time.perf_counter() > deadline else 0
+
+        raw = self.engine.raw_connection()
+        conn = raw.driver_connection
+        conn.set_authorizer(_authorizer)
+        conn.set_progress_handler(progress, PROGRESS_STEPS)
+        try:
+            cursor = conn.execute(limited, parameters or {})
+            result = QueryResult(
+                [d[0] for d in cursor.description],
+                keep_rows=self.keep_rows,
+                summary_threshold=self.summary_threshold,
+            )
+            while batch := cursor.fetchmany(FETCH_BATCH_SIZE):
+                # A linha extra do LIMIT só serve para detectar o corte:
+                kept = batch[: self.max_rows - result.row_count]
+                result.truncated = len(kept) < len(batch)
+                result.add_batch(kept)
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            message = str(e).lower()
+            if "not authorized" in message or "one statement at a time" in message:
+                self.rejected += 1
+                raise UnsafeQueryError(f"Consulta recusada (somente leitura é permitida): {sql}") from e
+            if "interrupted" in message:
+                self.timeouts += 1
+                raise QueryTimeoutError(f"Consulta excedeu o orçamento de {self.time_budget_s}s: {sql}") from e
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+            conn.set_authorizer(None)
+            raw.close()  # devolve a conexão ao pool
+
+        if result.truncated:
+            self.truncated += 1
+            logger.warning("Resultado cortado em %d linhas: %s", self.max_rows, sql)
+        return result
+
+    def explain(self, sql: str) -> list[str]:
+        """
+        Plano do SQLite (``EXPLAIN QUERY PLAN``) sem executar a consulta: só
+        compila, então erros de sintaxe, colunas inexistentes e escritas
+        (authorizer) aparecem aqui como exceção, a custo de microssegundos.
+        """
+        try:
+            stripped = self._strip(sql)
+        except UnsafeQueryError:
+            self.rejected += 1
+            raise
+        raw = self.engine.raw_connection()
+        conn = raw.driver_connection
+        conn.set_authorizer(_authorizer)
+        try:
+            return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {stripped}")]
+        except sqlite3.DatabaseError as e:
+            message = str(e).lower()
+            if "not authorized" in message or "one statement at a time" in message:
+                self.rejected += 1
+                raise UnsafeQueryError(f"Consulta recusada (somente leitura é permitida): {sql}") from e
+            raise
+        finally:
+            conn.set_authorizer(None)
+            raw.close()
+
+    def to_prompt_text(self, result: QueryResult) -> str:
+        """Texto do resultado (linhas ou resumo) para o prompt, limitado a ``token_budget`` tokens."""
+        text = result.to_prompt_text()
+        if count_tokens(text) > self.token_budget:
+            marker = f"\n... (resultado cortado; {result.row_count} linhas no total)"
+            text = truncate_to_tokens(text, self.token_budget, marker=marker)
+        return text
@@ -0,0 +1,391 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo sql_router.py
+====================
+Roteador determinístico NL -> SQL para os formatos de pergunta mais
+comuns do cardápio (pizza mais cara, pizzas com um ingrediente, ...).
+Os parâmetros são preenchidos a partir do vocabulário conhecido da
+tabela ``pizza`` (``name``, ``tamanho`` e ingredientes). Perguntas que
+não casam com nenhum modelo seguem para o ``sql_chain`` (LLM).
+
+Um modelo só responde se a pergunta não tem nada além do que ele cobre:
+negações ("sem cebola"), quantidades ("as 3 mais caras"), comparações
+("mais barata que"), agregações ("preço médio", "soma") e filtros extras
+(outro ingrediente, tamanho ou sabor) mandam a pergunta para o LLM, em
+vez de uma resposta rápida e errada. O mesmo vale para perguntas com
+duas intenções ("a mais cara e a mais barata") e para perguntas de
+sim/não sobre o cardápio ("o cardápio tem pizza doce?"): o cardápio
+inteiro só é listado a pedido explícito ("quais são as pizzas?").
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from utils.answer_cache import db_fingerprint, normalize_question
+from utils.db_engine import connect_reader
+from utils.menu_schema import FTS_TABLE, fts_phrase, has_fts
+
+logger = logging.getLogger(__name__)
+
+# Palavras que não identificam um ingrediente por si só:
+_STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "coberta", "coberto", "da", "das", "de", "do",
+    "dos", "e", "em", "molho", "o", "os", "refogada", "refogado", "rodelas",
+}
+
+
+@dataclass(frozen=True)
+class RoutedQuery:
+    """Consulta parametrizada produzida por um modelo do roteador."""
+
+    template: str
+    sql: str
+    params: dict = field(default_factory=dict)
+    # Ingrediente canônico da busca FTS (``com_ingrediente``), usado pelos fatos do cardápio:
+    term: Optional[str] = None
+
+    def display_sql(self) -> str:
+        """SQL com os parâmetros embutidos, para log e para o prompt de resposta."""
+        sql = self.sql
+        for name, value in self.params.items():
+            literal = str(value) if isinstance(value, (int, float)) else "'" + str(value).replace("'", "''") + "'"
+            sql = sql.replace(f":{name}", literal)
+        return sql
+
+
+@dataclass
+class MenuVocabulary:
+    """Vocabulário normalizado -> valor canônico da tabela ``pizza``."""
+
+    names: dict[str, str]
+    sizes: dict[str, str]
+    ingredients: dict[str, str]
+    # Se o banco tem a tabela FTS5 ``pizza_fts`` (busca indexada e sem acentos):
+    fts: bool = False
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple[str, str, str]]) -> "MenuVocabulary":
+        names, sizes, ingredients = {}, {}, {}
+        for name, tamanho, ingredientes in rows:
+            names.setdefault(normalize_question(name), name)
+            sizes.setdefault(normalize_question(tamanho), tamanho)
+            for phrase in re.split(r",|\be\b|\bcom\b|\bao\b", ingredientes.lower()):
+                phrase = " ".join(phrase.split())
+                if not phrase:
+                    continue
+                ingredients.setdefault(normalize_question(phrase), phrase)
+                for word in phrase.split():
+                    if len(word) > 2 and word not in _STOPWORDS:
+                        ingredients.setdefault(normalize_question(word), word)
+        return cls(names, sizes, ingredients)
+
+    @classmethod
+    def from_sqlite(cls, db_path: str) -> "MenuVocabulary":
+        conn = connect_reader(db_path)
+        try:
+            rows = conn.execute("SELECT name, tamanho, ingredientes FROM pizza").fetchall()
+            fts = has_fts(conn)
+        finally:
+            conn.close()
+        vocabulary = cls.from_rows(rows)
+        vocabulary.fts = fts
+        return vocabulary
+
+
+def _find_longest(text: str, vocabulary: dict[str, str]) -> Optional[str]:
+    """Retorna o valor canônico do termo mais longo do vocabulário presente no texto."""
+    padded = f" {text} "
+    best = None
+    for key, value in vocabulary.items():
+        if f" {key} " in padded and (best is None or len(key) > len(best[0])):
+            best = (key, value)
+    return best[1] if best else None
+
+
+def _find_size(text: str, vocabulary: MenuVocabulary) -> Optional[str]:
+    # "média de preço" / "em média" são agregações, não o tamanho "Média":
+    text = re.sub(r"\b(media (de|do|dos|das)|em media)\b", " ", text)
+    # Aceita plurais ("grandes", "pequenas", "medias"):
+    singular = re.sub(r"\b(\w+?)s\b", r"\1", text)
+    return _find_longest(text, vocabulary.sizes) or _find_longest(singular, vocabulary.sizes)
+
+
+def _size_filter(size: Optional[str]) -> tuple[str, dict]:
+    return ("WHERE tamanho = :tamanho ", {"tamanho": size}) if size else ("", {})
+
+
+# Qualificadores que nenhum modelo cobre (testados no texto sem os nomes das pizzas,
+# para "Quatro Queijos" não contar como quantidade):
+_NEGATION = re.compile(r"\b(nao|sem|exceto|tirando|nenhuma?|nem)\b")
+_QUANTITY = re.compile(r"\d|\b(duas|dois|tres|quatro|cinco|seis|sete|oito|nove|dez|cada|top)\b")
+_COMPARISON = re.compile(
+    r"\b(do que|mais \w+ que|menos|acima|abaixo|entre|ate|maior|menor|maiores|menores|superior|inferior)\b"
+)
+_AGGREGATE = re.compile(
+    r"\b(medio|medios|soma|somar|somando|somados?|total|totais|juntas|juntos)\b"
+    r"|\b(media (de|do|dos|das)|em media|na media)\b"
+)
+# "no total"/"ao todo" numa contagem não é agregação de preço:
+_COUNT_IDIOMS = re.compile(r"\b(no total|ao todo)\b")
+# Intenções de outros modelos (ou do LLM) que um modelo de listagem não pode ignorar:
+_OTHER_INTENT = re.compile(r"\bmais (cara|caro|barata|barato)s?\b|\bquant[ao]s\b|\bingredientes?\b")
+_PRICE_QUESTION = re.compile(r"\b(preco|precos|valor|valores|custa|custam|quanto)\b")
+_MOST_EXPENSIVE = re.compile(r"\bmais (cara|caro)s?\b")
+_CHEAPEST = re.compile(r"\bmais (barata|barato)s?\b")
+
+# Pedido explícito de listagem ("quais são as pizzas", "mostre o cardápio"):
+_LISTING = re.compile(
+    r"\b(quais|mostre|mostra|mostrar|liste|lista|listar|veja|ver)\b|\bqual e o (cardapio|menu)\b|\bo que (tem|ha)\b"
+)
+# Palavras de um pedido do cardápio inteiro; qualquer outra ("doce", "vegetariana") é um filtro:
+_LISTING_WORDS = {
+    "quais", "qual", "sao", "e", "o", "a", "as", "os", "que", "pizza", "pizzas", "sabor", "sabores", "opcoes",
+    "disponiveis", "disponivel", "cardapio", "menu", "todas", "todos", "completo", "inteiro", "de", "do", "da",
+    "das", "dos", "no", "na", "nas", "nos", "voces", "vcs", "tem", "temos", "ha", "existem", "hoje", "agora",
+    "me", "mostre", "mostra", "mostrar", "liste", "lista", "listar", "ver", "veja", "quero", "gostaria",
+    "poderia", "pode", "por", "favor", "seu", "sua", "oferecem", "servem", "vendem",
+}
+
+
+def _without(text: str, *phrases: Optional[str]) -> str:
+    """Texto sem as frases (normalizadas) já consumidas por um modelo."""
+    padded = f" {text} "
+    for phrase in filter(None, phrases):
+        padded = padded.replace(f" {normalize_question(phrase)} ", " ")
+    return " ".join(padded.split())
+
+
+def _as_ingredient(text: str, term: str) -> bool:
+    """O termo aparece como ingrediente ("pizzas com bacon") e não como sabor ("a Bacon")?"""
+    return re.search(rf"\b(com|tem|tenham|contem|contenham|levam?) {re.escape(normalize_question(term))}\b", text) is not None
+
+
+def _without_names(text: str, vocab: MenuVocabulary) -> str:
+    padded = f" {text} "
+    for key in vocab.names:
+        if f" {key} " in padded:
+            padded = padded.replace(f" {key} ", " ")
+    return " ".join(padded.split())
+
+
+def _unsupported(text: str, vocab: MenuVocabulary) -> bool:
+    """A pergunta tem negação, quantidade, comparação ou agregação?"""
+    rest = _COUNT_IDIOMS.sub(" ", _without_names(text, vocab))
+    return any(p.search(rest) for p in (_NEGATION, _QUANTITY, _COMPARISON, _AGGREGATE))
+
+
+def _ingredient_filter(ingredient: str, vocab: MenuVocabulary) -> tuple[str, str, dict]:
+    """(JOIN, condição do WHERE, parâmetros) para pizzas com o ingrediente."""
+    if vocab.fts:
+        return (
+            f"JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = pizza.id ",
+            f"{FTS_TABLE} MATCH :ingrediente",
+            {"ingrediente": fts_phrase(ingredient)},
+        )
+    return "", "pizza.ingredientes LIKE :ingrediente", {"ingrediente": f"%{ingredient}%"}
+
+
+# Cada modelo recebe (texto normalizado, vocabulário) e devolve um RoutedQuery ou None.
+Template = Callable[[str, MenuVocabulary], Optional[RoutedQuery]]
+
+
+def _superlative_filters(text: str, vocab: MenuVocabulary) -> bool:
+    """
+    A "mais cara/barata" tem filtro de sabor ou ingrediente (o modelo só filtra
+    o tamanho) ou pede as duas pontas ("a mais cara e a mais barata")?
+    """
+    if _MOST_EXPENSIVE.search(text) and _CHEAPEST.search(text):
+        return True
+    return bool(_find_longest(text, vocab.names) or _find_longest(text, vocab.ingredients))
+
+
+def _most_expensive(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    # Só o singular: "as mais caras" pede várias pizzas, não ``LIMIT 1``.
+    if not re.search(r"\bmais (cara|caro)\b", text) or _superlative_filters(text, vocab):
+        return None
+    where, params = _size_filter(_find_size(text, vocab))
+    return RoutedQuery("mais_cara", f"SELECT * FROM pizza {where}ORDER BY preco DESC LIMIT 1", params)
+
+
+def _cheapest(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    if not re.search(r"\bmais (barata|barato)\b", text) or _superlative_filters(text, vocab):
+        return None
+    where, params = _size_filter(_find_size(text, vocab))
+    return RoutedQuery("mais_barata", f"SELECT * FROM pizza {where}ORDER BY preco ASC LIMIT 1", params)
+
+
+def _name_filters(text: str, name: str, vocab: MenuVocabulary) -> bool:
+    """Além do sabor, a pergunta filtra tamanho ou ingrediente?"""
+    rest = _without(text, name)
+    return bool(_as_ingredient(text, name) or _find_size(rest, vocab) or _find_longest(rest, vocab.ingredients))
+
+
+def _ingredients_of(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    if not re.search(r"\bingredientes?\b", text):
+        return None
+    name = _find_longest(text, vocab.names)
+    if name is None or _name_filters(text, name, vocab):
+        return None
+    return RoutedQuery(
+        "ingredientes_da_pizza",
+        "SELECT name, tamanho, ingredientes FROM pizza WHERE name = :name COLLATE NOCASE",
+        {"name": name},
+    )
+
+
+def _price_of(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    if not re.search(r"\b(preco|precos|valor|quanto custa|quanto e)\b", text):
+        return None
+    name = _find_longest(text, vocab.names)
+    if name is None or _name_filters(text, name, vocab):
+        return None
+    return RoutedQuery(
+        "preco_da_pizza",
+        "SELECT name, tamanho, preco FROM pizza WHERE name = :name COLLATE NOCASE",
+        {"name": name},
+    )
+
+
+def _with_ingredient(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    if not re.search(r"\b(contem|contenham|tem|tenham|com|levam?)\b", text):
+        return None
+    ingredient = _find_longest(text, vocab.ingredients)
+    if ingredient is None or _OTHER_INTENT.search(text):
+        return None
+    # Um só ingrediente e nenhum tamanho (o modelo não combina filtros):
+    rest = _without(text, ingredient)
+    if _find_longest(rest, vocab.ingredients) or _find_size(rest, vocab):
+        return None
+    join, condition, params = _ingredient_filter(ingredient, vocab)
+    return RoutedQuery(
+        "com_ingrediente",
+        f"SELECT pizza.* FROM pizza {join}WHERE {condition} ORDER BY pizza.id",
+        params,
+        term=ingredient if vocab.fts else None,
+    )
+
+
+def _count(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    if not re.search(r"\bquant[ao]s\b", text):
+        return None
+    size = _find_size(text, vocab)
+    ingredient = _find_longest(text, vocab.ingredients)
+    # Outro ingrediente ou um sabor ("Bacon" é sabor e ingrediente: vale o ingrediente):
+    rest = _without(text, ingredient)
+    if (ingredient is not None and _find_longest(rest, vocab.ingredients)) or _find_longest(rest, vocab.names):
+        return None
+    # "Quantas Calabresa tem?" é ambíguo (sabor ou ingrediente): fica com o LLM.
+    if ingredient is not None and normalize_question(ingredient) in vocab.names and not _as_ingredient(text, ingredient):
+        return None
+    conditions, params, join = [], {}, ""
+    if ingredient is not None:
+        join, condition, params = _ingredient_filter(ingredient, vocab)
+        conditions.append(condition)
+    if size is not None:
+        conditions.append("pizza.tamanho = :tamanho")
+        params["tamanho"] = size
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return RoutedQuery(
+        "contagem",
+        f"SELECT COUNT(*) AS total FROM pizza {join}{where}".strip(),
+        params,
+        term=ingredient if ingredient is not None and vocab.fts else None,
+    )
+
+
+def _by_size(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    size = _find_size(text, vocab)
+    if size is None or not re.search(r"\bpizzas?\b", text) or _OTHER_INTENT.search(text):
+        return None
+    # "Quanto custa..." pede um preço, não a lista; sabor ou ingrediente é outro filtro:
+    if _PRICE_QUESTION.search(text) or _find_longest(text, vocab.names) or _find_longest(text, vocab.ingredients):
+        return None
+    return RoutedQuery("por_tamanho", "SELECT * FROM pizza WHERE tamanho = :tamanho", {"tamanho": size})
+
+
+def _list_all(text: str, vocab: MenuVocabulary) -> Optional[RoutedQuery]:
+    if not re.search(r"\b(disponiveis|cardapio|menu|pizzas|sabores)\b", text) or not _LISTING.search(text):
+        return None
+    # Sim/não ou filtro extra ("o cardápio tem pizza doce?", "quais pizzas doces..."): fica com o LLM.
+    if not _LISTING_WORDS.issuperset(text.split()):
+        return None
+    return RoutedQuery("cardapio", "SELECT * FROM pizza")
+
+
+# Ordem importa: do formato mais específico para o mais genérico.
+DEFAULT_TEMPLATES: list[Template] = [
+    _most_expensive,
+    _cheapest,
+    _ingredients_of,
+    _price_of,
+    _count,
+    _with_ingredient,
+    _by_size,
+    _list_all,
+]
+
+
+class SQLTemplateRouter:
+    """Roteia perguntas conhecidas direto para SQL parametrizado, sem chamar o LLM."""
+
+    def __init__(
+        self,
+        vocabulary: MenuVocabulary,
+        templates: Optional[list[Template]] = None,
+        db_path: Optional[str] = None,
+    ):
+        self.vocabulary = vocabulary
+        self.templates = templates or DEFAULT_TEMPLATES
+        self.db_path = db_path
+        self._fingerprint = db_fingerprint(db_path) if db_path else None
+        self._lock = threading.Lock()
+        self._total = 0
+        self._matches: Counter = Counter()
+
+    @classmethod
+    def from_sqlite(cls, db_path: str = "pizzas.db") -> "SQLTemplateRouter":
+        return cls(MenuVocabulary.from_sqlite(db_path), db_path=db_path)
+
+    def _refresh_if_changed(self) -> None:
+        """Recarrega o vocabulário quando o cardápio no DB muda."""
+        if self.db_path is None:
+            return
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint != self._fingerprint:
+            logger.info("Cardápio alterado, recarregando o vocabulário do roteador SQL.")
+            self.vocabulary = MenuVocabulary.from_sqlite(self.db_path)
+            self._fingerprint = fingerprint
+
+    def route(self, question: str) -> Optional[RoutedQuery]:
+        """Retorna a consulta do primeiro modelo que casar, ou ``None``."""
+        self._refresh_if_changed()
+        text = normalize_question(question)
+        routed = None
+        if not _unsupported(text, self.vocabulary):
+            for template in self.templates:
+                routed = template(text, self.vocabulary)
+                if routed is not None:
+                    break
+        with self._lock:
+            self._total += 1
+            if routed is not None:
+                self._matches[routed.template] += 1
+        if routed is not None:
+            logger.info("Roteador SQL: pergunta atendida pelo modelo '%s'", routed.template)
+        return routed
+
+    def coverage(self) -> dict:
+        """Fração de perguntas atendidas sem LLM, no total e por modelo."""
+        with self._lock:
+            matched = sum(self._matches.values())
+            return {
+                "total": self._total,
+                "matched": matched,
+                "coverage": round(matched / self._total, 4) if self._total else 0.0,
+                "by_template": dict(self._matches),
+            }
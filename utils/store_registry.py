@@ -0,0 +1,232 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo store_registry.py
+========================
+Registro de lojas (multi-tenant): cada loja (``tenant``) tem o seu
+próprio arquivo SQLite e o seu próprio ``PizzaQueryService``, com engine,
+contexto de esquema, cache de respostas e roteador SQL separados, de modo
+que caches e respostas nunca vazam de uma loja para outra.
+
+- Arquivo de cada loja: ``stores`` explícito (tenant -> caminho) ou, por
+  convenção, ``{stores_dir}/{tenant}.db``; a loja padrão usa
+  ``pizzas.db``.
+- Só ``max_open`` lojas ficam abertas (LRU): ao passar do limite, a
+  menos usada recentemente é fechada (conexões, pool de SQL, event loop,
+  cache de respostas e o diretório temporário do seu índice vetorial).
+  Lojas em uso (``lease``) só são fechadas quando a última requisição
+  termina.
+- O LLM, o embedder do cache semântico, o tracer e o pool de threads do
+  SQL são compartilhados entre as lojas.
+
+Configuração: ``PIZZABOT_STORES_DIR``, ``PIZZABOT_DEFAULT_STORE`` e
+``PIZZABOT_MAX_OPEN_STORES``.
+"""
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from utils.answer_cache import AnswerCache, make_openai_embedder
+
+logger = logging.getLogger(__name__)
+
+# Ids de loja aceitos (também impede caminhos como "../outro.db"):
+TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+# Pool pequeno por loja: com muitas lojas abertas, o total de conexões é o que pesa.
+TENANT_ENGINE_KWARGS = {"pool_size": 2, "max_overflow": 2}
+
+
+class UnknownStoreError(LookupError):
+    """Loja inexistente ou id de loja inválido."""
+
+
+class StoreRegistry:
+    """Mapeia ``tenant`` -> ``PizzaQueryService``, com LRU de lojas abertas."""
+
+    def __init__(
+        self,
+        stores_dir: str = "stores",
+        default_tenant: str = "default",
+        default_db: str = "pizzas.db",
+        stores: Optional[dict[str, str]] = None,
+        max_open: int = 32,
+        service_factory: Optional[Callable[[str, str], Any]] = None,
+        sql_workers: int = 8,
+        llm: Any = None,
+    ):
+        self.stores_dir = stores_dir
+        self.default_tenant = default_tenant
+        self.stores = dict(stores or {})
+        self.stores.setdefault(default_tenant, default_db)
+        self.max_open = max_open
+        self.service_factory = service_factory or self._default_factory
+        self.opens = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._services: "OrderedDict[str, Any]" = OrderedDict()
+        self._leases: dict[int, int] = {}  # id(service) -> requisições em andamento
+        self._retired: dict[int, Any] = {}  # despejadas com requisições em andamento
+        self._shared: Optional[dict] = None
+        self._shared_lock = threading.Lock()
+        self._llm = llm  # LLM compartilhado (padrão: ``create_llm()``)
+        # Um pool de SQL para todas as lojas (e não um por loja aberta):
+        self.sql_pool = ThreadPoolExecutor(max_workers=sql_workers, thread_name_prefix="pizzabot-sql")
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "StoreRegistry":
+        kwargs.setdefault("stores_dir", os.getenv("PIZZABOT_STORES_DIR", "stores"))
+        kwargs.setdefault("default_tenant", os.getenv("PIZZABOT_DEFAULT_STORE", "default"))
+        kwargs.setdefault("max_open", int(os.getenv("PIZZABOT_MAX_OPEN_STORES", "32")))
+        return cls(**kwargs)
+
+    # ------------------------------------------------------------------
+    # Lojas
+    # ------------------------------------------------------------------
+    def db_path(self, tenant: Optional[str]) -> str:
+        """Arquivo SQLite da loja (``UnknownStoreError`` se não existe)."""
+        tenant = tenant or self.default_tenant
+        if tenant in self.stores:
+            path = self.stores[tenant]
+        elif TENANT_ID.match(tenant):
+            path = os.path.join(self.stores_dir, f"{tenant}.db")
+        else:
+            raise UnknownStoreError(f"Id de loja inválido: {tenant!r}")
+        if not os.path.exists(path):
+            raise UnknownStoreError(f"Loja '{tenant}' não encontrada ({path})")
+        return path
+
+    def tenants(self) -> list[str]:
+        """Lojas conhecidas: as explícitas e os ``.db`` de ``stores_dir``."""
+        found = set(self.stores)
+        if os.path.isdir(self.stores_dir):
+            found.update(
+                name[:-3] for name in os.listdir(self.stores_dir)
+                if name.endswith(".db") and TENANT_ID.match(name[:-3])
+            )
+        return sorted(found)
+
+    def _shared_components(self) -> dict:
+        """LLM, embedder e tracer, criados uma vez e compartilhados entre as lojas."""
+        with self._shared_lock:
+            if self._shared is None:
+                from utils.llm_backend import create_llm
+                from utils.tracing import Tracer
+
+                self._shared = {
+                    "llm": self._llm or create_llm(),
+                    "embed_fn": make_openai_embedder(),
+                    "tracer": Tracer.from_env(),
+                }
+            return self._shared
+
+    def _default_factory(self, tenant: str, db_path: str) -> Any:
+        from utils.query_service import PizzaQueryService
+
+        shared = self._shared_components()
+        return PizzaQueryService.from_config(
+            db_path=db_path,
+            llm=shared["llm"],
+            tracer=shared["tracer"],
+            answer_cache=AnswerCache(db_path=db_path, embed_fn=shared["embed_fn"]),
+            engine_kwargs=TENANT_ENGINE_KWARGS,
+            sql_pool=self.sql_pool,
+        )
+
+    def get(self, tenant: Optional[str] = None) -> Any:
+        """Serviço da loja, abrindo-a (e despejando a menos usada) se preciso."""
+        return self._acquire(tenant or self.default_tenant, lease=False)
+
+    def _acquire(self, tenant: str, lease: bool) -> Any:
+        with self._lock:
+            service = self._services.get(tenant)
+            if service is not None:
+                self._services.move_to_end(tenant)
+                if lease:
+                    self._leases[id(service)] = self._leases.get(id(service), 0) + 1
+                return service
+
+        # Abre fora do lock: uma loja fria não bloqueia as outras.
+        logger.info("Abrindo a loja '%s'...", tenant)
+        service = self.service_factory(tenant, self.db_path(tenant))
+        evicted = []
+        with self._lock:
+            current = self._services.get(tenant)
+            if current is not None:  # outra thread abriu a mesma loja antes
+                evicted.append(service)
+                service = current
+            else:
+                self._services[tenant] = service
+                self.opens += 1
+                while len(self._services) > self.max_open:
+                    old_tenant, old = self._services.popitem(last=False)
+                    self.evictions += 1
+                    logger.info("Fechando a loja '%s' (LRU, %d lojas abertas)", old_tenant, self.max_open)
+                    if self._leases.get(id(old)):
+                        self._retired[id(old)] = old
+                    else:
+                        evicted.append(old)
+            self._services.move_to_end(tenant)
+            if lease:
+                self._leases[id(service)] = self._leases.get(id(service), 0) + 1
+        for old in evicted:
+            self._close_service(old)
+        return service
+
+    @contextmanager
+    def lease(self, tenant: Optional[str] = None) -> Iterator[Any]:
+        """Serviço da loja protegido de despejo enquanto a requisição roda."""
+        service = self._acquire(tenant or self.default_tenant, lease=True)
+        try:
+            yield service
+        finally:
+            with self._lock:
+                remaining = self._leases[id(service)] - 1
+                if remaining:
+                    self._leases[id(service)] = remaining
+                else:
+                    del self._leases[id(service)]
+                retired = self._retired.pop(id(service), None) if not remaining else None
+            if retired is not None:
+                self._close_service(retired)
+
+    @staticmethod
+    def _close_service(service: Any) -> None:
+        """Fecha o serviço e os recursos da loja que ele usa (criados pelo registro)."""
+        service.close()
+        if service.answer_cache is not None:
+            service.answer_cache.close()
+        if service.schema_provider is not None:
+            service.schema_provider.close()
+        service.sql_guard.engine.dispose()
+
+    def open_tenants(self) -> list[str]:
+        """Lojas abertas, da menos para a mais usada recentemente."""
+        with self._lock:
+            return list(self._services)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": len(self._services),
+                "max_open": self.max_open,
+                "opens": self.opens,
+                "evictions": self.evictions,
+                "retired": len(self._retired),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            services = list(self._services.values()) + list(self._retired.values())
+            self._services.clear()
+            self._retired.clear()
+        for service in services:
+            self._close_service(service)
+        self.sql_pool.shutdown(wait=False)
@@ -0,0 +1,32 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo streaming.py
+===================
+Utilitários de streaming de tokens para as interfaces. Streamlit e Mesop
+consomem geradores síncronos, enquanto o ``PizzaQueryService`` produz
+geradores assíncronos num event loop de fundo: ``iter_async`` faz a ponte
+entre os dois mundos, token a token.
+"""
+import asyncio
+from typing import AsyncIterator, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def iter_async(agen: AsyncIterator[T], loop: asyncio.AbstractEventLoop) -> Iterator[T]:
+    """
+    Consome um gerador assíncrono que roda em ``loop`` (em outra thread)
+    como um gerador síncrono. Exceções são repassadas ao consumidor.
+    """
+    try:
+        while True:
+            future = asyncio.run_coroutine_threadsafe(agen.__anext__(), loop)
+            try:
+                yield future.result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Consumidor abandonou o gerador (ex.: sessão encerrada): fecha o gerador assíncrono.
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop)
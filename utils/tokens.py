@@ -0,0 +1,40 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo tokens.py
+================
+Contagem aproximada de tokens para orçamentos de prompt. Usa o
+``tiktoken`` (cl100k_base) quando o encoding está disponível; offline,
+sem o encoding em cache, cai para a heurística de ~4 caracteres/token.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # tiktoken ausente ou encoding indisponível (sem rede)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Número (aproximado) de tokens do texto."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, budget: int, marker: str = "\n...") -> str:
+    """Corta o texto para caber em ``budget`` tokens, terminando com ``marker``."""
+    if count_tokens(text) <= budget:
+        return text
+    encoding = _encoding()
+    budget = max(budget - count_tokens(marker), 0)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:budget]) + marker
+    return text[: budget * 4] + marker
@@ -0,0 +1,424 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Módulo tracing.py
+=================
+Instrumentação de latência por etapa do pipeline de consulta.
+
+Cada requisição gera um ``RequestTrace`` com o tempo de parede de cada
+etapa (cache, roteamento, esquema, geração de SQL, execução do SQL,
+resposta, ferramentas do agente), tokens do LLM, linhas retornadas pelo
+SQL e acertos de cache. Os traces finalizados vão para exportadores:
+
+- ``JsonlExporter``: uma linha JSON por requisição;
+- ``PrometheusExporter``: histogramas/contadores no formato de texto do
+  Prometheus (para o textfile collector do node_exporter), regravando o
+  arquivo no máximo a cada ``flush_interval_s``.
+
+A exportação não roda na thread da requisição: ``Tracer.finish`` só põe
+o trace numa fila, e uma thread própria o entrega aos exportadores (como
+o ``QueueListener`` do ``utils.logging_setup``). ``Tracer.close`` esvazia
+a fila e grava o estado final (também no fim do processo).
+
+Com o tracer desligado, ``request()`` devolve um trace nulo
+pré-alocado e o custo por requisição fica praticamente zero.
+
+Resumo p50/p95/p99 por etapa a partir de um arquivo JSONL:
+    uv run python -m utils.tracing traces.jsonl
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from typing import Any, Iterable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+_NOOP_CONTEXT = nullcontext()
+
+# Limites (s) dos buckets dos histogramas do Prometheus:
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Percentil ``q`` (0-100) por interpolação linear de uma lista ordenada."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summary_table(stage_durations: dict[str, Iterable[float]]) -> str:
+    """Tabela de texto com contagem e p50/p95/p99 (ms) por etapa."""
+    lines = [f"{'etapa':<28}{'n':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}"]
+    for stage in sorted(stage_durations):
+        values = sorted(stage_durations[stage])
+        lines.append(
+            f"{stage:<28}{len(values):>7}"
+            + "".join(f"{percentile(values, q) * 1000:>11.2f}" for q in (50, 95, 99))
+        )
+    return "\n".join(lines)
+
+
+class _StageTimer:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: "RequestTrace", name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.trace.record(self.name, time.perf_counter() - self.start)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Callback do LangChain que registra chamadas ao LLM, tokens e ferramentas no trace."""
+
+    # Executa no próprio loop, sem despachar cada evento (inclusive tokens) para um executor:
+    run_inline = True
+
+    def __init__(self, trace: "RequestTrace"):
+        self.trace = trace
+        self._starts: dict[Any, float] = {}
+        self._tool_starts: dict[Any, tuple[float, str]] = {}
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: Any, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Any, prompts: Any, *, run_id: Any, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any) -> None:
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.trace.record("llm_call", time.perf_counter() - start)
+        self.trace.attributes["llm_calls"] = self.trace.attributes.get("llm_calls", 0) + 1
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        if not (prompt_tokens or completion_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        self.trace.add_tokens(prompt_tokens, completion_tokens)
+
+    def on_tool_start(self, serialized: Any, input_str: str, *, run_id: Any, **kwargs: Any) -> None:
+        self._tool_starts[run_id] = (time.perf_counter(), (serialized or {}).get("name", "tool"))
+
+    def on_tool_end(self, output: Any, *, run_id: Any, **kwargs: Any) -> None:
+        start = self._tool_starts.pop(run_id, None)
+        if start is not None:
+            started_at, name = start
+            self.trace.record(f"tool:{name}", time.perf_counter() - started_at)
+
+
+class RequestTrace:
+    """Medições de uma requisição."""
+
+    def __init__(self, tracer: "Tracer", kind: str, question: str):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex
+        self.kind = kind
+        self.question = question
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.stages: dict[str, float] = defaultdict(float)
+        self.attributes: dict[str, Any] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_s = 0.0
+
+    def stage(self, name: str) -> _StageTimer:
+        """Context manager que soma o tempo de parede do bloco à etapa ``name``."""
+        return _StageTimer(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages[name] += seconds
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def callbacks(self) -> list[BaseCallbackHandler]:
+        return [TracingCallbackHandler(self)]
+
+    def __enter__(self) -> "RequestTrace":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.total_s = time.perf_counter() - self._start
+        if exc_type is not None and exc_type is not GeneratorExit:
+            self.attributes["error"] = repr(exc)
+        self.tracer.finish(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "timestamp": self.started_at,
+            "question": self.question,
+            "total_ms": round(self.total_s * 1000, 3),
+            "stages_ms": {name: round(s * 1000, 3) for name, s in self.stages.items()},
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            **self.attributes,
+        }
+
+
+class _NoopTrace:
+    """Trace nulo usado com o tracer desligado (nenhuma alocação por requisição)."""
+
+    __slots__ = ()
+
+    def stage(self, name: str) -> nullcontext:
+        return _NOOP_CONTEXT
+
+    def record(self, name: str, seconds: float) -> None:
+        pass
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        pass
+
+    def callbacks(self) -> list:
+        return []
+
+    def __enter__(self) -> "_NoopTrace":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+NOOP_TRACE = _NoopTrace()
+
+
+class JsonlExporter:
+    """Anexa cada trace finalizado como uma linha JSON (arquivo aberto uma vez)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file: Optional[Any] = None
+
+    def export(self, trace: RequestTrace) -> None:
+        line = json.dumps(trace.to_dict(), ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class PrometheusExporter:
+    """Agrega os traces em histogramas e contadores no formato de texto do Prometheus."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        flush_interval_s: float = 5.0,
+    ):
+        self.path = path
+        self.buckets = buckets
+        self.flush_interval_s = flush_interval_s
+        self._written_at = float("-inf")
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._bucket_counts: dict[str, list[int]] = defaultdict(lambda: [0] * len(self.buckets))
+        self._sums: dict[str, float] = defaultdict(float)
+        self._counts: dict[str, int] = defaultdict(int)
+        self._counters: dict[str, float] = defaultdict(float)
+
+    def export(self, trace: RequestTrace) -> None:
+        with self._lock:
+            for stage, seconds in list(trace.stages.items()) + [("total", trace.total_s)]:
+                self._counts[stage] += 1
+                self._sums[stage] += seconds
+                counts = self._bucket_counts[stage]
+                for i, bound in enumerate(self.buckets):
+                    if seconds <= bound:
+                        counts[i] += 1
+            self._counters["pizzabot_requests_total"] += 1
+            self._counters["pizzabot_llm_prompt_tokens_total"] += trace.prompt_tokens
+            self._counters["pizzabot_llm_completion_tokens_total"] += trace.completion_tokens
+            self._counters["pizzabot_sql_rows_total"] += trace.attributes.get("sql_rows", 0)
+            if trace.attributes.get("cache_hit"):
+                self._counters["pizzabot_cache_hits_total"] += 1
+            self._dirty = True
+
+    def flush(self, force: bool = False) -> None:
+        """Regrava o arquivo se houve traces novos e já passou ``flush_interval_s``."""
+        if not self.path or not self._dirty:
+            return
+        if not force and time.monotonic() - self._written_at < self.flush_interval_s:
+            return
+        self._dirty = False
+        self._written_at = time.monotonic()
+        self.write(self.path)
+
+    def close(self) -> None:
+        self.flush(force=True)
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus."""
+        with self._lock:
+            lines = [
+                "# HELP pizzabot_stage_seconds Tempo de parede por etapa do pipeline.",
+                "# TYPE pizzabot_stage_seconds histogram",
+            ]
+            for stage in sorted(self._counts):
+                counts = self._bucket_counts[stage]
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'pizzabot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'pizzabot_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {self._counts[stage]}')
+                lines.append(f'pizzabot_stage_seconds_sum{{stage="{stage}"}} {self._sums[stage]:.6f}')
+                lines.append(f'pizzabot_stage_seconds_count{{stage="{stage}"}} {self._counts[stage]}')
+            for name in sorted(self._counters):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {self._counters[name]:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+class Tracer:
+    """Ponto de entrada da instrumentação; desligado por padrão."""
+
+    def __init__(self, enabled: bool = False, exporters: Optional[list[Any]] = None, window: int = 10_000):
+        self.enabled = enabled
+        self.exporters = exporters or []
+        self._lock = threading.Lock()
+        self._durations: dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._queue: "queue.Queue[Optional[RequestTrace]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """
+        Configura pelo ambiente: ``PIZZABOT_TRACING=1`` liga o tracer,
+        ``PIZZABOT_TRACE_JSONL`` e ``PIZZABOT_TRACE_PROM`` definem os arquivos.
+        """
+        if os.getenv("PIZZABOT_TRACING", "0").lower() not in ("1", "true", "yes"):
+            return cls(enabled=False)
+        exporters: list[Any] = []
+        if jsonl_path := os.getenv("PIZZABOT_TRACE_JSONL", "traces_pizzabot.jsonl"):
+            exporters.append(JsonlExporter(jsonl_path))
+        if prom_path := os.getenv("PIZZABOT_TRACE_PROM"):
+            exporters.append(PrometheusExporter(prom_path))
+        return cls(enabled=True, exporters=exporters)
+
+    def request(self, kind: str, question: str) -> Any:
+        """Abre o trace de uma requisição (use com ``with``)."""
+        if not self.enabled:
+            return NOOP_TRACE
+        return RequestTrace(self, kind, question)
+
+    def finish(self, trace: RequestTrace) -> None:
+        with self._lock:
+            for stage, seconds in trace.stages.items():
+                self._durations[stage].append(seconds)
+            self._durations["total"].append(trace.total_s)
+            if self.exporters and self._worker is None:
+                self._worker = threading.Thread(target=self._export_loop, name="tracing-export", daemon=True)
+                self._worker.start()
+                atexit.register(self.close)
+        if self.exporters:
+            self._queue.put(trace)
+
+    def _export_loop(self) -> None:
+        """Thread de exportação: entrega os traces da fila e descarrega os arquivos quando ela esvazia."""
+        while True:
+            trace = self._queue.get()
+            try:
+                if trace is None:
+                    return
+                for exporter in self.exporters:
+                    exporter.export(trace)
+                if self._queue.empty():
+                    for exporter in self.exporters:
+                        if hasattr(exporter, "flush"):
+                            exporter.flush()
+            except Exception:
+                logger.exception("Erro ao exportar trace")
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Espera a exportação dos traces já finalizados."""
+        if self._worker is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Esvazia a fila, encerra a thread de exportação e grava o estado final dos exportadores."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        self._queue.put(None)
+        worker.join()
+        atexit.unregister(self.close)
+        for exporter in self.exporters:
+            if hasattr(exporter, "close"):
+                exporter.close()
+
+    def summary(self) -> str:
+        """Tabela p50/p95/p99 por etapa das requisições recentes."""
+        with self._lock:
+            return summary_table({stage: list(values) for stage, values in self._durations.items()})
+
+
+def summarize_jsonl(path: str) -> str:
+    """Tabela p50/p95/p99 por etapa a partir de um arquivo JSONL de traces."""
+    durations: dict[str, list[float]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            for stage, ms in record.get("stages_ms", {}).items():
+                durations[stage].append(ms / 1000)
+            durations["total"].append(record["total_ms"] / 1000)
+    return summary_table(durations)
+
+
+if __name__ == "__main__":
+    print(summarize_jsonl(sys.argv[1] if len(sys.argv) > 1 else "traces_pizzabot.jsonl"))